@@ -0,0 +1,123 @@
+"""
+Import-time benchmark for the modules loaded before the Streamlit UI renders.
+
+Runs `python -X importtime -c "import <module>"` for each pipeline module that
+main.py loads before the first paint, in a fresh interpreter. The list is read from
+main.py's source, so it follows the app: its top-level imports, plus the imports in
+the functions it calls at top level on every render (and the functions they call),
+e.g. the sidebar's storage usage. It reports the cumulative import time and fails
+(exit code 1) when a module exceeds its budget or pulls in a heavy dependency that
+should be deferred.
+
+Usage:
+    python benchmarks/import_time.py [--budget-ms 150]
+"""
+
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages of this repository; main.py's other imports are third-party
+PACKAGES = ("utils", "docgen", "llm", "prompts")
+
+# Heavy third-party packages that must only load on the code path that needs them
+DEFERRED = ["langchain", "langchain_core", "langchain_google_genai", "git", "pygments"]
+
+
+def _imported(node):
+    if isinstance(node, ast.Import):
+        return [alias.name for alias in node.names]
+    if isinstance(node, ast.ImportFrom) and node.module and not node.level:
+        return [node.module]
+    return []
+
+
+def _called(node, functions):
+    return [n.func.id for n in ast.walk(node)
+            if isinstance(n, ast.Call) and isinstance(n.func, ast.Name) and n.func.id in functions]
+
+
+def app_modules(entry_point="main.py"):
+    """Repository modules entry_point imports on every run: at top level, and in the
+    functions called from top-level statements (conditional blocks, e.g. the bodies of
+    button handlers, excluded), transitively."""
+    with open(os.path.join(REPO_ROOT, entry_point), "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    functions = {node.name: node for node in tree.body if isinstance(node, ast.FunctionDef)}
+
+    names, pending = [], []
+    for node in tree.body:
+        names.extend(_imported(node))
+        if not isinstance(node, (ast.FunctionDef, ast.ClassDef, ast.If, ast.For, ast.While, ast.Try)):
+            pending.extend(_called(node, functions))
+    visited = set()
+    while pending:
+        name = pending.pop(0)
+        if name in visited:
+            continue
+        visited.add(name)
+        for node in ast.walk(functions[name]):
+            names.extend(_imported(node))
+        pending.extend(_called(functions[name], functions))
+
+    modules = []
+    for name in names:
+        if name.split(".")[0] in PACKAGES and name not in modules:
+            modules.append(name)
+    return modules
+
+
+def measure(module):
+    """Return (cumulative import time in microseconds, set of imported top-level packages)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr}")
+
+    total_us = 0
+    imported = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = [f.strip() for f in line[len("import time:"):].split("|")]
+        if not fields[1].isdigit():
+            continue  # header line
+        name = fields[2]
+        imported.add(name.strip().split(".")[0])
+        if name.strip() == module:
+            total_us = int(fields[1])
+    return total_us, imported
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--budget-ms", type=float, default=150.0,
+                            help="Maximum cumulative import time per module in milliseconds")
+    args = arg_parser.parse_args()
+
+    failures = []
+    for module in app_modules():
+        total_us, imported = measure(module)
+        leaked = sorted(imported.intersection(DEFERRED))
+        status = "ok"
+        if total_us / 1000 > args.budget_ms:
+            status = "over budget"
+            failures.append(module)
+        if leaked:
+            status = f"imports {', '.join(leaked)}"
+            failures.append(module)
+        print(f"{module:<24} {total_us / 1000:8.1f} ms  {status}")
+
+    if failures:
+        print(f"FAILED: {len(set(failures))} module(s) exceed the import budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Cross-repository parse cache benchmark.
+
+Copies one repository into three layouts that share its files: the original,
+a fork (same paths) and a project vendoring it under vendor/. Each is parsed
+with a fresh utils.parse_cache.ParseCache shared by all three, and compared
+with parsing without the cache. The first build fills the cache; the others
+only run import resolution. The component graphs must be identical either way.
+
+Usage:
+    python benchmarks/parse_cache.py [--repo path/to/repo]
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.parser import DependencyParser
+from utils.parse_cache import ParseCache
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse(repo, cache=None):
+    t0 = time.perf_counter()
+    components = DependencyParser(repo, parse_cache=cache).parse_repository()
+    return {comp_id: comp.to_dict() for comp_id, comp in components.items()}, time.perf_counter() - t0
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--repo", default=REPO_ROOT, help="Repository to copy (default: this one)")
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        ignore = shutil.ignore_patterns(".git", "__pycache__", "output", "knowledge_base")
+        layouts = {
+            "original": os.path.join(root, "original"),
+            "fork": os.path.join(root, "fork"),
+            "vendored": os.path.join(root, "app", "vendor", "lib"),
+        }
+        for path in layouts.values():
+            shutil.copytree(args.repo, path, ignore=ignore)
+        layouts["vendored"] = os.path.join(root, "app")
+
+        cache = ParseCache(os.path.join(root, "parse_cache.sqlite3"))
+        print(f"{'layout':<10} {'uncached':>9} {'cached':>8} {'hit rate':>9} {'saved':>8}")
+        for name, path in layouts.items():
+            expected, uncached_s = parse(path)
+            before = cache.stats.stats()
+            graph, cached_s = parse(path, cache)
+            after = cache.stats.stats()
+            assert graph == expected, f"{name}: cached parse differs"
+            files = after["files"] - before["files"]
+            hits = after["hits"] - before["hits"]
+            print(f"{name:<10} {uncached_s:>8.2f}s {cached_s:>7.2f}s {hits / max(files, 1):>9.0%} "
+                  f"{after['saved_s'] - before['saved_s']:>7.2f}s")
+        cache.close()
+        print(f"cache size: {os.path.getsize(os.path.join(root, 'parse_cache.sqlite3')) / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Parser memory benchmark on a generated repository.
+
+Measures, with tracemalloc, the peak and retained memory of
+DependencyParser.parse_repository, which keeps one file's AST alive at a time and
+ends with slotted, AST-free CodeComponents, against the same components in the
+representation the parser used before (BaselineComponent: a copy of the former
+CodeComponent, holding its node of a parent-linked tree and a set of
+dependencies), built from freshly parsed files.
+
+Usage:
+    python benchmarks/parser_memory.py [--modules 50] [--classes 10] [--methods 8]
+"""
+
+import os
+import ast
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Optional, Set
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.parser import DependencyParser, add_parent_to_nodes
+
+
+def make_repo(root, modules, classes, methods):
+    package = os.path.join(root, "pkg")
+    os.makedirs(package)
+    for m in range(modules):
+        lines = ["import os", "from pkg import mod_0" if m else "", ""]
+        for c in range(classes):
+            lines.append(f"class Class{c}:")
+            lines.append(f'    """Class {c} of module {m}."""')
+            for k in range(methods):
+                lines.append(f"    def method_{k}(self, value):")
+                lines.append(f"        result = os.path.join(str(value), '{m}-{c}-{k}')")
+                if m:
+                    lines.append(f"        helper = mod_0.Class{c}()")
+                    lines.append(f"        return helper.method_{k}(result)")
+                else:
+                    lines.append("        return result")
+            lines.append("")
+        lines.append(f"SETTING_{m} = Class0()")
+        with open(os.path.join(package, f"mod_{m}.py"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+def measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - t0
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained, peak, elapsed
+
+
+@dataclass
+class BaselineComponent:
+    """CodeComponent before it became slotted and AST-free."""
+    id: str
+    node: ast.AST
+    component_type: str  # 'class', 'function', 'method', 'assignment'
+    file_path: str
+    relative_path: str
+    depends_on: Set[str] = field(default_factory=set)
+    source_code: Optional[str] = None
+    start_line: int = 0
+    end_line: int = 0
+    has_docstring: bool = False
+    docstring: str = ""
+    fingerprint: str = ""
+
+
+DEFINITIONS = (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef, ast.Assign, ast.AnnAssign)
+
+
+def baseline_components(parsed):
+    """parsed (component dicts) as BaselineComponents on the nodes of parent-linked trees."""
+    by_file = {}
+    for comp in parsed.values():
+        by_file.setdefault(comp["file_path"], []).append(comp)
+    components = {}
+    for file_path, comps in by_file.items():
+        with open(file_path, "r", encoding="utf-8") as f:
+            source = f.read()
+        tree = ast.parse(source)
+        add_parent_to_nodes(tree)
+        nodes = {node.lineno: node for node in ast.walk(tree) if isinstance(node, DEFINITIONS)}
+        for comp in comps:
+            node = nodes[comp["start_line"]]
+            components[comp["id"]] = BaselineComponent(
+                id=comp["id"], node=node, component_type=comp["component_type"], file_path=file_path,
+                relative_path=comp["relative_path"], depends_on=set(comp["depends_on"]),
+                source_code=ast.get_source_segment(source, node), start_line=node.lineno,
+                end_line=node.end_lineno, has_docstring=comp["has_docstring"],
+                docstring=(ast.get_docstring(node) or "") if comp["has_docstring"] else "",
+                fingerprint=comp["fingerprint"],
+            )
+    return components
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--modules", type=int, default=50)
+    arg_parser.add_argument("--classes", type=int, default=10)
+    arg_parser.add_argument("--methods", type=int, default=8)
+    args = arg_parser.parse_args()
+
+    mb = 1024 * 1024
+    with tempfile.TemporaryDirectory() as repo:
+        make_repo(repo, args.modules, args.classes, args.methods)
+
+        components, retained, peak, elapsed = measure(lambda: DependencyParser(repo).parse_repository())
+        print(f"{len(components)} components from {args.modules} modules")
+        print(f"DependencyParser:   {elapsed:6.2f} s, peak {peak / mb:7.1f} MB, "
+              f"retained {retained / mb:7.1f} MB ({retained / len(components):.0f} B/component)")
+
+        parsed = {comp_id: comp.to_dict() for comp_id, comp in components.items()}
+        del components
+        before, before_retained, before_peak, _ = measure(lambda: baseline_components(parsed))
+        print(f"Before (with ASTs):           peak {before_peak / mb:7.1f} MB, "
+              f"retained {before_retained / mb:7.1f} MB ({before_retained / len(before):.0f} B/component)")
+        print(f"Retained memory: {before_retained / retained:.1f}x less without AST references")
+
+
+if __name__ == "__main__":
+    main()
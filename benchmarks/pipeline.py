@@ -0,0 +1,84 @@
+"""
+Sequential vs pipelined parse + generate benchmark on a generated repository.
+
+The LLM is replaced by a chain that sleeps for --latency seconds per call, so the
+numbers show how well parsing overlaps with generation: sequential wall time is
+parse + generate, the pipelined executor (docgen.pipelined) should get close to
+max(parse, generate).
+
+Usage:
+    python benchmarks/pipeline.py [--modules 40] [--latency 0.02] [--workers 8]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.parser_memory import make_repo
+from utils.parser import DependencyParser
+from utils.toposort import build_work_plan
+from docgen.generator import _invoke_chain
+from docgen.pipelined import PipelinedGenerator
+
+
+class SleepingChain:
+    """Stands in for the documentation chain: fixed latency, valid JSON answer."""
+
+    class Answer:
+        def __init__(self, content):
+            self.content = content
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def invoke(self, inputs):
+        time.sleep(self.latency)
+        return self.Answer(json.dumps({"code": "", "content": f"Docs for {len(inputs['query_code'])} chars"}))
+
+
+def sequential(repo, chain, workers):
+    t0 = time.perf_counter()
+    components = DependencyParser(repo).parse_repository()
+    graph = {comp_id: comp.to_dict() for comp_id, comp in components.items()}
+    parse_s = time.perf_counter() - t0
+
+    plan = build_work_plan({comp_id: set(comp["depends_on"]) for comp_id, comp in graph.items()})
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for level in plan.levels:
+            list(executor.map(lambda unit: [_invoke_chain(chain, graph[c], "") for c in unit], level))
+    return parse_s, time.perf_counter() - t0 - parse_s, len(graph)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--modules", type=int, default=40)
+    arg_parser.add_argument("--classes", type=int, default=4)
+    arg_parser.add_argument("--methods", type=int, default=4)
+    arg_parser.add_argument("--latency", type=float, default=0.02, help="Seconds per fake LLM call")
+    arg_parser.add_argument("--workers", type=int, default=8)
+    args = arg_parser.parse_args()
+
+    chain = SleepingChain(args.latency)
+    with tempfile.TemporaryDirectory() as repo:
+        make_repo(repo, args.modules, args.classes, args.methods)
+
+        parse_s, generate_s, count = sequential(repo, chain, args.workers)
+        print(f"{count} components")
+        print(f"sequential: parse {parse_s:.2f} s + generate {generate_s:.2f} s = {parse_s + generate_s:.2f} s")
+
+        pipeline = PipelinedGenerator(repo, chain, max_workers=args.workers)
+        pipeline.run()
+        stats = pipeline.stats.stats()
+        print(f"pipelined:  {stats['wall_s']:.2f} s, first doc after {stats['first_doc_s']:.2f} s")
+        print(f"            latency p50 {stats['latency_p50_s']:.2f} s / p95 {stats['latency_p95_s']:.2f} s, "
+              f"utilization {stats['utilization']}")
+
+
+if __name__ == "__main__":
+    main()
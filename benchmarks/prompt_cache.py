@@ -0,0 +1,77 @@
+"""
+Prompt prefix caching benchmark: the original prompt layout vs the static prefix.
+
+Documents the first entry points of a repository (this one by default) twice
+with the "fake" provider and its local prompt cache (llm.context_cache):
+
+  - before: the original prompt, system guidelines followed by a human message
+            that starts with query_code; the only repeated prefix is shorter than
+            the providers' minimum cacheable size
+  - after:  prompts.doc_prompt, guidelines + repository overview as one static
+            system message, the variable part last
+
+and reports billed (uncached) input tokens per call, the cache hit rate and time
+to first token, with prompt processing simulated at --prefill-rate tokens/s.
+
+Usage:
+    python benchmarks/prompt_cache.py [--repo .] [--calls 60] [--prefill-rate 20000]
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.prompts import ChatPromptTemplate
+from utils.parser import DependencyParser
+from docgen.entrypoints import find_entrypoints
+from docgen.generator import generate_docs
+from docgen.repo_context import repo_overview
+from llm.chain_setup import get_chain
+from llm.providers import ProviderConfig, get_llm, get_usage
+from prompts.doc_prompt import prompt_template
+
+legacy_prompt = ChatPromptTemplate.from_messages([
+    ("system", prompt_template.split("<repository>")[0]),
+    ("human", "query_code: {query_code}, dependent_comps: {dependent_comps}, previous_docs: {previous_docs}"),
+])
+
+
+def document(graph, chain, usage, calls):
+    ids = list(graph.keys())
+    for entry_point in find_entrypoints(graph):
+        generate_docs(entry_point, graph, chain, [], ids, [], [])
+        if usage.calls >= calls:
+            break
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--repo", default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    arg_parser.add_argument("--calls", type=int, default=60, help="Stop after the entry point that reaches this")
+    arg_parser.add_argument("--prefill-rate", type=float, default=20000,
+                            help="Simulated prompt processing speed, tokens per second")
+    args = arg_parser.parse_args()
+
+    components = DependencyParser(args.repo).parse_repository()
+    graph = {comp_id: comp.to_dict() for comp_id, comp in components.items()}
+    overview = repo_overview(graph)
+    print(f"{len(graph)} components, repository overview {len(overview)} characters")
+
+    for layout in ("before", "after"):
+        config = ProviderConfig(provider="fake", model=layout, prefill_rate=args.prefill_rate)
+        if layout == "before":
+            chain = legacy_prompt | get_llm(config)
+        else:
+            chain = get_chain(config, repo_context=overview)
+        get_llm(config)
+        document(graph, chain, get_usage(config), args.calls)
+        stats = get_usage(config).stats()
+        print(f"{layout:>6}: {stats['calls']} calls, {stats['input_tokens'] / stats['calls']:7.1f} input tokens/call, "
+              f"{stats['billed_input_tokens_per_call']:7.1f} billed, cache hit rate {stats['cache_hit_rate']:.0%}, "
+              f"first token p50 {stats['first_token_p50_s'] * 1000:.1f} ms / p95 {stats['first_token_p95_s'] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Reachability index benchmark on a synthetic 100k-component dependency graph.
+
+The graph mimics a repository: components grouped in modules, mostly depending on
+components of the same or lower-numbered modules, with a few cycles. Reports the
+build time of utils.reachability.ReachabilityIndex and the mean latency of
+reaches / closure / impact queries against a per-query DFS like the one retrieve()
+does without an index. closure() walks a node's dependencies in retrieve()'s order
+on its first query and serves the cached order afterwards; both are reported.
+
+Usage:
+    python benchmarks/reachability.py [--nodes 100000] [--queries 1000] [--cross-module 0.2]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.reachability import ReachabilityIndex
+
+
+def make_graph(nodes, cross_module=0.2, seed=0):
+    rng = random.Random(seed)
+    per_module = 50
+    graph = {}
+    for i in range(nodes):
+        module = i // per_module
+        deps = set()
+        for _ in range(rng.randint(0, 4)):
+            if module and rng.random() < cross_module:
+                target_module = rng.randrange(max(0, module - 10), module)
+            else:
+                target_module = module
+            j = target_module * per_module + rng.randrange(per_module)
+            if j < i or rng.random() < 0.001:  # mostly acyclic, occasional back edge
+                deps.add(f"m{j // per_module}.c{j}")
+        graph[f"m{module}.c{i}"] = deps
+    return graph
+
+
+def dfs_closure(graph, node):
+    seen = set()
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        for dep in graph[current]:
+            if dep not in seen:
+                seen.add(dep)
+                stack.append(dep)
+    return seen
+
+
+def mean_us(fn, items):
+    t0 = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - t0) / len(items) * 1e6
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--nodes", type=int, default=100000)
+    arg_parser.add_argument("--queries", type=int, default=1000)
+    arg_parser.add_argument("--cross-module", type=float, default=0.2,
+                            help="Share of edges pointing into one of the 10 preceding modules")
+    args = arg_parser.parse_args()
+
+    graph = make_graph(args.nodes, args.cross_module)
+    t0 = time.perf_counter()
+    index = ReachabilityIndex(graph)
+    print(f"{args.nodes} nodes, {sum(len(d) for d in graph.values())} edges, "
+          f"index built in {time.perf_counter() - t0:.2f} s")
+
+    rng = random.Random(1)
+    names = list(graph)
+    pairs = [(rng.choice(names), rng.choice(names)) for _ in range(args.queries)]
+    sources = [a for a, _ in pairs]
+
+    print(f"reaches:        {mean_us(lambda p: index.reaches(*p), pairs):10.1f} us/query")
+    print(f"closure:        {mean_us(index.closure, sources):10.1f} us/query (first)")
+    print(f"closure:        {mean_us(index.closure, sources):10.1f} us/query (cached)")
+    print(f"impact:         {mean_us(index.impact, sources):10.1f} us/query")
+    print(f"DFS closure:    {mean_us(lambda n: dfs_closure(graph, n), sources):10.1f} us/query (no index)")
+
+
+if __name__ == "__main__":
+    main()
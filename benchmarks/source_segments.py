@@ -0,0 +1,87 @@
+"""
+Source segment extraction benchmark on a generated 20k-line module.
+
+Compares ast.get_source_segment (re-splits the file on every call) with the
+per-file SourceIndex used by DependencyParser, checks that both return the same
+text and reports the per-component cost of each.
+
+Usage:
+    python benchmarks/source_segments.py [--lines 20000] [--sample 50]
+"""
+
+import os
+import ast
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.parser import SourceIndex
+
+
+def make_module(lines):
+    chunks = []
+    count = 0
+    i = 0
+    while count < lines:
+        chunks.append(
+            f"CONSTANT_{i} = {i}  # café\n"
+            f"\n"
+            f"class Component{i}:\n"
+            f"    \"\"\"Component number {i}.\"\"\"\n"
+            f"\n"
+            f"    def run(self, value):\n"
+            f"        return value + CONSTANT_{i}\n"
+            f"\n"
+            f"\n"
+            f"def helper_{i}(x, y='ü'):\n"
+            f"    return Component{i}().run(x)\n"
+            f"\n"
+        )
+        count += 12
+        i += 1
+    return "".join(chunks)
+
+
+def component_nodes(tree):
+    nodes = []
+    for node in tree.body:
+        nodes.append(node)
+        if isinstance(node, ast.ClassDef):
+            nodes.extend(item for item in node.body if isinstance(item, ast.FunctionDef))
+    return nodes
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--lines", type=int, default=20000)
+    arg_parser.add_argument("--sample", type=int, default=50, help="Components timed with ast.get_source_segment")
+    args = arg_parser.parse_args()
+
+    source = make_module(args.lines)
+    nodes = component_nodes(ast.parse(source))
+
+    # ast.get_source_segment is quadratic over the whole module, so it is timed on
+    # an evenly spread sample and compared per call
+    sample = nodes[::max(1, len(nodes) // args.sample)]
+    t0 = time.perf_counter()
+    expected = [ast.get_source_segment(source, node) for node in sample]
+    baseline = (time.perf_counter() - t0) / len(sample)
+
+    t0 = time.perf_counter()
+    index = SourceIndex(source)
+    actual = {id(node): index.segment(node) for node in nodes}
+    indexed = (time.perf_counter() - t0) / len(nodes)
+
+    assert [actual[id(node)] for node in sample] == expected, \
+        "SourceIndex segments differ from ast.get_source_segment"
+    print(f"{len(source.splitlines())} lines, {len(nodes)} components ({len(sample)} sampled for the baseline)")
+    print(f"ast.get_source_segment: {baseline * 1e6:10.1f} us/component  "
+          f"(~{baseline * len(nodes):.1f} s for the whole module)")
+    print(f"SourceIndex:            {indexed * 1e6:10.1f} us/component  "
+          f"({indexed * len(nodes):.3f} s for the whole module, {baseline / indexed:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
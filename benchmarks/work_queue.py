@@ -0,0 +1,73 @@
+"""
+Work queue throughput benchmark with local worker processes.
+
+Enqueues a synthetic dependency graph into a fresh docgen.work_queue database and
+drains it with 1, 2, 4, ... worker processes whose LLM sleeps for --latency
+seconds, reporting jobs per second for each worker count. With LLM-bound jobs
+throughput should grow roughly linearly until the graph's dependency levels (or
+SQLite write contention) limit it.
+
+Usage:
+    python benchmarks/work_queue.py [--components 400] [--latency 0.05] [--workers 1 2 4 8]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from multiprocessing import Process
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.pipeline import SleepingChain
+from benchmarks.reachability import make_graph
+from docgen.work_queue import WorkQueue, run_worker
+
+
+def make_components(count):
+    graph = {}
+    for comp_id, deps in make_graph(count).items():
+        graph[comp_id] = {
+            "id": comp_id, "component_type": "function", "file_path": f"{comp_id}.py",
+            "relative_path": f"{comp_id}.py", "depends_on": sorted(deps),
+            "source_code": f"def {comp_id.replace('.', '_')}():\n    pass\n", "start_line": 1, "end_line": 2,
+        }
+    return graph
+
+
+def drain(graph, workers, latency):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "jobs.sqlite3")
+        work_queue = WorkQueue(path)
+        work_queue.enqueue("bench", graph)
+
+        t0 = time.perf_counter()
+        processes = [Process(target=run_worker, args=(path,), kwargs={"chain": SleepingChain(latency),
+                                                                      "poll_interval": 0.05})
+                     for _ in range(workers)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - t0
+        progress = work_queue.progress("bench")
+        work_queue.close()
+    return elapsed, progress
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--components", type=int, default=400)
+    arg_parser.add_argument("--latency", type=float, default=0.05, help="Seconds per fake LLM call")
+    arg_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = arg_parser.parse_args()
+
+    graph = make_components(args.components)
+    for workers in args.workers:
+        elapsed, progress = drain(graph, workers, args.latency)
+        print(f"{workers:3d} workers: {elapsed:6.2f} s, {progress['done'] / elapsed:7.1f} jobs/s ({progress})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,466 @@
+"""
+Headless batch entry point: documents many repositories without Streamlit.
+
+Runs clone -> BuildGraph -> find_entrypoints -> generate_docs for every repository
+given on the command line (GitHub links or local paths). Repositories are processed
+concurrently; graph building runs on a process pool (CPU bound) and LLM calls share
+a separate concurrency limit (IO bound). Progress is checkpointed after every entry
+point so an interrupted run can be resumed with --resume. With --pipelined, parsing
+and LLM calls overlap inside each repository instead (docgen.pipelined). With a
+--budget-* limit, each repository documents its most central components first and
+lists the rest next to the docs (docgen.budget); rerunning fills in the skipped ones.
+With --route, trivial components are documented from templates and the others go to
+a cheap or a strong model by their complexity, each with its own pool (docgen.routing).
+
+Usage:
+    python cli.py https://github.com/org/repo1 path/to/repo2 --llm-workers 8
+    python cli.py --repos-file repos.txt --run-id nightly --resume
+    python cli.py path/to/repo --pipelined --llm-workers 16
+    python cli.py path/to/repo --queue output/queue/jobs.sqlite3 --queue-workers 4   # + worker.py elsewhere
+    python cli.py path/to/repo --cassette runs.jsonl.gz --cassette-mode record
+    python cli.py path/to/repo --cassette runs.jsonl.gz --simulate-latency 1   # offline replay
+    python cli.py path/to/repo --budget-tokens 200000 --run-id plan   # most central components first
+    python cli.py path/to/repo --route --strong-model gemini-2.5-pro --strong-workers 2
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+import multiprocessing
+from datetime import datetime
+from multiprocessing import Process
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dotenv import load_dotenv
+from utils.build_graph import BuildGraph
+from utils.parse_cache import open_parse_cache
+from utils.loader import load_graph
+from utils.graph_diff import diff_graphs
+from utils.reachability import ReachabilityIndex
+from docgen.entrypoints import find_entrypoints
+from docgen.generator import generate_docs
+from docgen.budget import IMPORTANCE_METHODS, Budget, generate_within_budget, importance, prompt_overhead
+from docgen.pipelined import PipelinedGenerator
+from docgen.routing import build_router, routing_configs
+from docgen.retriever import retrieve
+from docgen.work_queue import WorkQueue, merge_entry_point, run_worker
+from docgen.parts import source_hash
+from docgen.dedup import DocCache
+from docgen.summaries import SummaryCache, build_summaries
+from docgen.repo_context import repo_overview
+from docgen.diagrams import DiagramCache, coarsen
+from docgen.site import SITE_FORMATS, build_site
+from docgen.storage import COMPRESS_ENV, QUOTA_ENV, StorageManager
+from llm.chain_setup import get_chain, get_summary_chains
+from llm.providers import ProviderConfig, get_cassette, get_usage
+from docgen.doc_store import DocStore
+from docgen.pipeline import (
+    repo_dir_name, clone_repository, dependency_graph_path_for,
+    repo_key, doc_store_path_for, documentation_path_for, save_documentation
+)
+
+logger = logging.getLogger("docstring_generator")
+
+
+class Checkpoint:
+    """Per-run progress file, rewritten atomically after every completed step."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.state = {"repos": {}}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    def repo(self, repo):
+        with self._lock:
+            return self.state["repos"].setdefault(repo, {"status": "pending", "entry_points": {}})
+
+    def update(self, repo, **fields):
+        with self._lock:
+            self.state["repos"].setdefault(repo, {"status": "pending", "entry_points": {}}).update(fields)
+            self._save()
+
+    def complete_entry_point(self, repo, entry_point, output_file):
+        with self._lock:
+            self.state["repos"][repo]["entry_points"][entry_point] = str(output_file)
+            self._save()
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def build_graph_job(repo_path, dependency_graph_path):
+    """Runs in a worker process; returns the parse cache stats of the build (or None)."""
+    parse_cache = open_parse_cache()
+    if parse_cache is None:
+        BuildGraph(repo_path=repo_path, dependency_graph_path=dependency_graph_path)
+        return None
+    try:
+        BuildGraph(repo_path=repo_path, dependency_graph_path=dependency_graph_path, parse_cache=parse_cache)
+    finally:
+        parse_cache.close()
+    return parse_cache.stats.stats()
+
+
+def document_repo(repo, args, checkpoint, parse_pool, chain, chain_config, storage, route_configs=None):
+    timings = {}
+    started = time.perf_counter()
+    state = checkpoint.repo(repo)
+    if state["status"] == "done":
+        logger.info(f"Skipping {repo}: already documented in this run")
+        return state
+
+    # Local paths are used as is, links are cloned into the knowledge base
+    repo_path = repo if os.path.isdir(repo) else os.path.join(args.knowledge_base, repo_dir_name(repo))
+    # Unique per link or absolute path: repositories with the same name do not share artifacts
+    name = repo_key(repo_path, args.knowledge_base)
+    # Referenced artifacts are neither evicted nor compressed by concurrent runs
+    holder = storage.acquire(name)
+    try:
+        t0 = time.perf_counter()
+        if not os.path.exists(repo_path):
+            clone_repository(repo, repo_path)
+        timings["clone_s"] = time.perf_counter() - t0
+
+        doc_cache = DocCache()
+        repo_context = None
+        part_store = DocStore(doc_store_path_for(args.output_dir), repo=name)
+        dependency_graph_path = dependency_graph_path_for(repo_path, args.output_dir, args.knowledge_base)
+        os.makedirs(os.path.dirname(dependency_graph_path), exist_ok=True)
+        t0 = time.perf_counter()
+        if args.pipelined:
+            if route_configs is not None:
+                # The graph is still being parsed: fan-in is not known yet
+                router = chain = build_router(None, route_configs)
+            # Parse and document every component in one overlapped pass; the entry
+            # points below then only assemble the stored parts
+            pipeline = PipelinedGenerator(repo_path, chain, max_workers=args.llm_workers,
+                                          doc_cache=doc_cache, part_store=part_store)
+            graph, _ = pipeline.run(dependency_graph_path)
+            part_store.save()
+            timings["pipeline"] = pipeline.stats.stats()
+        else:
+            # Build the dependency graph in a separate process
+            previous_graph = None
+            if args.refresh or not os.path.exists(dependency_graph_path):
+                if os.path.exists(dependency_graph_path):
+                    previous_graph = load_graph(dependency_graph_path)
+                timings["parse_cache"] = parse_pool.submit(build_graph_job, repo_path, dependency_graph_path).result()
+            graph = load_graph(dependency_graph_path)
+            if previous_graph is not None:
+                # What moved since the previous build, for review next to the run report
+                changeset = diff_graphs(previous_graph, graph)
+                changeset_path = os.path.join(args.output_dir, "runs", args.run_id, "changesets", f"{name}.json")
+                os.makedirs(os.path.dirname(changeset_path), exist_ok=True)
+                with open(changeset_path, "w", encoding="utf-8") as f:
+                    json.dump(changeset.to_dict(), f)
+                checkpoint.update(repo, changes=changeset.stats())
+            part_store.mark_dirty(graph)
+            # Same model, with the repository overview in the static (cached) prompt prefix;
+            # routed per repository, so fan-in and the routing stats are its own
+            repo_context = repo_overview(graph)
+            if route_configs is not None:
+                router = chain = build_router(graph, route_configs, repo_context=repo_context)
+            else:
+                chain = get_chain(chain_config, repo_context=repo_context)
+        entry_points = find_entrypoints(graph)
+        # Closures of the entry points, walked once and shared by every retrieve below
+        reachability = ReachabilityIndex.from_components(graph)
+        timings["parse_s"] = time.perf_counter() - t0
+        documentation_dir = os.path.join(args.output_dir, "documentation", name)
+        if args.diagram:
+            t0 = time.perf_counter()
+            coarse = coarsen(graph)
+            diagram_cache = DiagramCache(os.path.join(args.output_dir, "diagrams"))
+            os.makedirs(documentation_dir, exist_ok=True)
+            for fmt in ("svg", "dot"):
+                with open(os.path.join(documentation_dir, f"architecture.{fmt}"), "w", encoding="utf-8") as f:
+                    f.write(diagram_cache.render(coarse, fmt))
+            timings["diagram_s"] = time.perf_counter() - t0
+        checkpoint.update(repo, status="generating", components=len(graph))
+
+        outputs = None
+        if args.queue:
+            # One job per component for the worker processes (worker.py), merged below
+            t0 = time.perf_counter()
+            work_queue = WorkQueue(args.queue, shared_storage=args.shared_storage)
+            ids = {comp["id"] for entry_point in entry_points
+                   for comp in retrieve(graph, entry_point, reachability)}
+            work_queue.enqueue(name, graph, ids, part_store=part_store)
+            timings["queue"] = work_queue.wait(name)
+            outputs = work_queue.outputs(name)
+            work_queue.close()
+            stored = part_store.stored_hashes()
+            for comp_id, output in outputs.items():
+                if stored.get(comp_id) != source_hash(graph[comp_id]):
+                    part_store.put(comp_id, graph[comp_id], output)
+            part_store.save()
+            timings["queue_s"] = time.perf_counter() - t0
+
+        # Generate documentation, skipping entry points finished before an interruption
+        t0 = time.perf_counter()
+        summaries = None
+        if args.summaries:
+            summary_chain, module_chain = get_summary_chains(chain_config)
+            # Only components some entry point documents need a summary
+            closure_ids = {comp["id"] for entry_point in entry_points
+                           for comp in retrieve(graph, entry_point, reachability)}
+            summaries = build_summaries(graph, summary_chain, module_chain,
+                                        cache=SummaryCache(os.path.join(args.output_dir, "summaries", "summaries.json")),
+                                        ids=closure_ids)
+        budget = scores = None
+        if has_budget(args):
+            budget = Budget(max_tokens=args.budget_tokens, max_cost=args.budget_cost,
+                            max_seconds=args.budget_seconds,
+                            input_cost_per_1k=args.token_prices[0], output_cost_per_1k=args.token_prices[1],
+                            prompt_overhead_tokens=prompt_overhead(repo_context))
+            scores = importance(graph, method=args.priority)
+        skipped = {}
+        for entry_point in entry_points:
+            if entry_point in state["entry_points"]:
+                continue
+            output_file = documentation_path_for(entry_point, documentation_dir)
+            skipped_file = f"{os.path.splitext(output_file)[0]}.skipped.json"
+            if outputs is not None:
+                final_docs = merge_entry_point(graph, entry_point, outputs, index=reachability)
+            elif budget is not None:
+                result = generate_within_budget(entry_point, graph, chain, budget, scores=scores,
+                                                doc_cache=doc_cache, part_store=part_store, summaries=summaries,
+                                                index=reachability)
+                final_docs = result.parts
+                if result.skipped:
+                    skipped[entry_point] = len(result.skipped)
+                    os.makedirs(documentation_dir, exist_ok=True)
+                    with open(skipped_file, "w", encoding="utf-8") as f:
+                        json.dump({"exhausted": result.exhausted, "coverage": round(result.coverage, 4),
+                                   "skipped": result.skipped}, f, indent=2)
+            else:
+                final_docs = generate_docs(entry_point, graph, chain,
+                    [], list(graph.keys()), [], [],
+                    doc_cache=doc_cache, part_store=part_store, summaries=summaries
+                    )
+            part_store.save()
+            part_store.save_entry_point(entry_point, final_docs or [])
+            save_documentation(final_docs or [], output_file)
+            # Partial entry points stay open so a rerun (or --resume) fills them in
+            if entry_point not in skipped:
+                if os.path.exists(skipped_file):
+                    os.remove(skipped_file)
+                checkpoint.complete_entry_point(repo, entry_point, output_file)
+        timings["generate_s"] = time.perf_counter() - t0
+        if route_configs is not None:
+            timings["routing"] = router.stats.stats()
+        if args.site:
+            # Only pages whose inputs changed since the last build are rendered
+            site = build_site(graph, part_store, os.path.join(args.output_dir, "site", name),
+                              fmt=args.site_format, workers=args.parse_workers, title=name)
+            timings["site"] = site.stats()
+
+        timings["total_s"] = time.perf_counter() - started
+        budget_fields = {} if budget is None else {"budget": budget.spent(), "skipped": skipped}
+        checkpoint.update(repo, status="partial" if skipped else "done", error=None, timings=timings,
+                          llm_calls=doc_cache.generated, deduplicated=doc_cache.deduplicated,
+                          reused=part_store.reused, **budget_fields)
+        part_store.close()
+    except Exception as e:
+        logger.exception(f"Failed to document {repo}")
+        timings["total_s"] = time.perf_counter() - started
+        checkpoint.update(repo, status="failed", error=str(e), timings=timings)
+    finally:
+        storage.release(name, holder)
+
+    return checkpoint.repo(repo)
+
+
+def read_repos(args):
+    repos = list(args.repos)
+    if args.repos_file:
+        with open(args.repos_file, "r", encoding="utf-8") as f:
+            repos.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    # Keep order, drop duplicates
+    return list(dict.fromkeys(repos))
+
+
+def has_budget(args):
+    return any(limit is not None for limit in (args.budget_tokens, args.budget_cost, args.budget_seconds))
+
+
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("repos", nargs="*", help="GitHub repository links or local repository paths")
+    arg_parser.add_argument("--repos-file", help="File with one repository link or path per line")
+    arg_parser.add_argument("--repo-workers", type=int, default=4, help="Repositories processed at the same time")
+    arg_parser.add_argument("--parse-workers", type=int, default=os.cpu_count() or 2,
+                            help="Processes used to build dependency graphs")
+    arg_parser.add_argument("--llm-workers", type=int, default=4, help="Concurrent LLM calls across all repositories")
+    arg_parser.add_argument("--provider", choices=["gemini", "openai", "fake"],
+                            help="LLM provider (default: LLM_PROVIDER or gemini)")
+    arg_parser.add_argument("--model", help="Model name (default: LLM_MODEL or the provider default)")
+    arg_parser.add_argument("--cassette", help="Record LLM calls to / replay them from this file (llm.cassette)")
+    arg_parser.add_argument("--cassette-mode", choices=["record", "replay"],
+                            help="With --cassette: record real calls or replay them offline (default: replay)")
+    arg_parser.add_argument("--simulate-latency", type=float,
+                            help="On replay, sleep this multiple of each call's recorded latency (1 = original)")
+    arg_parser.add_argument("--stream", action="store_true",
+                            help="Stream LLM responses to measure time to first token (report.json usage)")
+    arg_parser.add_argument("--summaries", action="store_true",
+                            help="Bottom-up component/module summaries instead of the growing history in prompts")
+    arg_parser.add_argument("--pipelined", action="store_true",
+                            help="Overlap parsing with LLM calls (docgen.pipelined); always re-parses")
+    arg_parser.add_argument("--queue", help="Distribute generation through this work queue database (worker.py)")
+    arg_parser.add_argument("--queue-workers", type=int, default=0,
+                            help="With --queue: local worker processes to start (0 = only external workers)")
+    arg_parser.add_argument("--shared-storage", action="store_true",
+                            help="With --queue: the database is shared with other hosts")
+    arg_parser.add_argument("--budget-tokens", type=int, help="Estimated LLM tokens per repository (docgen.budget)")
+    arg_parser.add_argument("--budget-cost", type=float, help="LLM cost per repository, priced with --token-prices")
+    arg_parser.add_argument("--budget-seconds", type=float, help="Generation time per repository")
+    arg_parser.add_argument("--token-prices", type=float, nargs=2, default=[0.0, 0.0], metavar=("IN", "OUT"),
+                            help="Price per 1k input and output tokens for --budget-cost")
+    arg_parser.add_argument("--priority", choices=IMPORTANCE_METHODS, default="pagerank",
+                            help="With a budget: how components are ranked")
+    arg_parser.add_argument("--route", action="store_true",
+                            help="Document trivial components from templates and route the rest to --cheap-model "
+                                 "or --strong-model by complexity (docgen.routing)")
+    arg_parser.add_argument("--cheap-model", help="With --route: model for simple components "
+                                                  "(default: a lighter model of the provider, else --model)")
+    arg_parser.add_argument("--strong-model", help="With --route: model for complex components (default: --model)")
+    arg_parser.add_argument("--cheap-workers", type=int,
+                            help="With --route: concurrent cheap-model calls (default: --llm-workers)")
+    arg_parser.add_argument("--strong-workers", type=int,
+                            help="With --route: concurrent strong-model calls (default: --llm-workers)")
+    arg_parser.add_argument("--diagram", action="store_true",
+                            help="Write a package-level architecture diagram (SVG and DOT) next to the docs")
+    arg_parser.add_argument("--site", action="store_true",
+                            help="Build (or incrementally update) a static documentation site under output/site")
+    arg_parser.add_argument("--site-format", choices=SITE_FORMATS, default="html", help="Page format of --site")
+    arg_parser.add_argument("--refresh", action="store_true",
+                            help="Re-parse repositories even if a dependency graph exists (incremental regeneration); "
+                                 "the diff to the previous graph goes to runs/<run_id>/changesets")
+    arg_parser.add_argument("--storage-quota", type=float, metavar="MB",
+                            help="Evict least recently used repositories (clones and outputs) beyond this size "
+                                 f"(default: {QUOTA_ENV})")
+    arg_parser.add_argument("--compress-after", type=float, metavar="DAYS",
+                            help=f"Gzip graphs and docs of repositories idle this long (default: {COMPRESS_ENV})")
+    arg_parser.add_argument("--output-dir", default="output")
+    arg_parser.add_argument("--knowledge-base", default="knowledge_base")
+    arg_parser.add_argument("--run-id", default=datetime.now().strftime('%Y%m%d%H%M%S'))
+    arg_parser.add_argument("--resume", action="store_true", help="Continue an interrupted run with the same --run-id")
+    args = arg_parser.parse_args(argv)
+    if args.pipelined and args.summaries:
+        arg_parser.error("--pipelined cannot be combined with --summaries (summaries need the whole graph first)")
+    if args.queue and (args.pipelined or args.summaries):
+        arg_parser.error("--queue cannot be combined with --pipelined or --summaries")
+    if has_budget(args) and (args.queue or args.pipelined):
+        arg_parser.error("--budget-* limits cannot be combined with --queue or --pipelined")
+    if args.route and args.queue:
+        arg_parser.error("--route cannot be combined with --queue (workers use their own model)")
+    if args.budget_cost is not None and not any(args.token_prices):
+        arg_parser.error("--budget-cost needs --token-prices")
+    return args
+
+
+def main(argv=None):
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stderr)
+        ]
+    )
+    load_dotenv()
+    args = parse_args(argv)
+    repos = read_repos(args)
+    if not repos:
+        logger.error("No repositories given")
+        return 2
+
+    run_dir = os.path.join(args.output_dir, "runs", args.run_id)
+    checkpoint_path = os.path.join(run_dir, "checkpoint.json")
+    if os.path.exists(checkpoint_path) and not args.resume:
+        logger.error(f"Run {args.run_id} already exists; pass --resume to continue it")
+        return 2
+    os.makedirs(run_dir, exist_ok=True)
+    checkpoint = Checkpoint(checkpoint_path)
+
+    # The provider's concurrency limit is shared by all repositories of the run
+    chain_config = ProviderConfig.from_env(provider=args.provider, model=args.model,
+                                           max_concurrency=args.llm_workers, cassette=args.cassette,
+                                           cassette_mode=args.cassette_mode,
+                                           simulate_latency=args.simulate_latency,
+                                           stream=args.stream or None)
+    chain = get_chain(chain_config)
+    route_configs = None
+    if args.route:
+        route_configs = routing_configs(chain_config, cheap_model=args.cheap_model, strong_model=args.strong_model,
+                                       cheap_concurrency=args.cheap_workers, strong_concurrency=args.strong_workers)
+
+    queue_workers = [
+        Process(target=run_worker, name=f"worker-{i}", args=(args.queue,), daemon=True, kwargs={
+            "chain_config": chain_config, "exit_when_idle": False, "shared_storage": args.shared_storage
+        })
+        for i in range(args.queue_workers if args.queue else 0)
+    ]
+    for process in queue_workers:
+        process.start()
+
+    storage = StorageManager.from_env(args.output_dir, args.knowledge_base)
+    if args.storage_quota is not None:
+        storage.quota_bytes = int(args.storage_quota * 1024 * 1024)
+    if args.compress_after is not None:
+        storage.compress_after_seconds = args.compress_after * 86400
+
+    started = time.perf_counter()
+    # Parse workers are started lazily from repository threads; forking this multi-threaded
+    # process could hand them a lock (e.g. SQLite's) held by another thread, so they come
+    # from a fork server instead
+    with ProcessPoolExecutor(max_workers=args.parse_workers,
+                             mp_context=multiprocessing.get_context("forkserver")) as parse_pool, \
+            ThreadPoolExecutor(max_workers=args.repo_workers) as repo_pool:
+        results = list(repo_pool.map(
+            lambda repo: document_repo(repo, args, checkpoint, parse_pool, chain, chain_config, storage,
+                                       route_configs), repos
+        ))
+
+    # Every job of the run is finished; idle local workers can go
+    for process in queue_workers:
+        process.terminate()
+
+    report = {
+        "run_id": args.run_id,
+        "total_s": time.perf_counter() - started,
+        "repos": {repo: result for repo, result in zip(repos, results)},
+        "succeeded": sum(1 for r in results if r["status"] == "done"),
+        "partial": sum(1 for r in results if r["status"] == "partial"),
+        "failed": sum(1 for r in results if r["status"] == "failed"),
+    }
+    report["storage"] = dict(storage.maintain(), total_bytes=storage.total_bytes())
+    storage.close()
+    usage = get_usage(chain_config)
+    if usage is not None:
+        report["usage"] = usage.stats()
+    for tier, config in (route_configs or {}).items():
+        usage = get_usage(config)
+        if usage is not None:
+            report.setdefault("usage_by_tier", {})[tier] = dict(usage.stats(), model=config.model)
+    cassette = get_cassette(chain_config.cassette) if chain_config.cassette else None
+    if cassette is not None:
+        report["cassette"] = {"path": cassette.path, "mode": chain_config.cassette_mode,
+                              "hits": cassette.hits, "misses": cassette.misses}
+    report_path = os.path.join(run_dir, "report.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Run report written to {report_path}")
+    return 0 if report["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""
+Budget-bounded, importance-ordered generation.
+
+Components of an entry point's closure are ranked by their importance in the
+dependency graph and documented most important first until a token, cost or
+time budget would be exceeded. The rest is returned as a skipped list (still in
+priority order). Parts already in the part store are reused for free, so running
+again with the same store resumes where the budget ran out.
+
+Importance is either PageRank with rank flowing from dependents to their
+dependencies (a component many important components rely on ranks high),
+computed with vectorized NumPy power iteration, or the plain in-degree (number
+of dependents). Betweenness is not offered: it is O(V * E) on large graphs.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from docgen.generator import _invoke_chain, _lookup, _remember
+from docgen.retriever import retrieve
+
+IMPORTANCE_METHODS = ("pagerank", "in_degree")
+
+# Roughly 4 characters per token, plus the fixed system prompt of prompts.doc_prompt
+# (without a repository overview; see prompt_overhead)
+CHARS_PER_TOKEN = 4
+PROMPT_OVERHEAD_TOKENS = 450
+
+
+def estimate_tokens(text):
+    return len(text or "") // CHARS_PER_TOKEN + 1
+
+
+def prompt_overhead(repo_context=None):
+    """Estimated tokens every documentation call sends besides the component: the
+    system prompt of prompts.doc_prompt with the repo_context given to get_chain
+    (docgen.repo_context.repo_overview) and the labels of the human message."""
+    from prompts.doc_prompt import doc_prompt, prompt_template
+
+    repo_context = repo_context if repo_context is not None else doc_prompt.partial_variables["repo_context"]
+    system = prompt_template.replace("{{", "{").replace("}}", "}").replace("{repo_context}", repo_context)
+    return estimate_tokens(system) + estimate_tokens("dependent_comps: \n\nprevious_docs: \n\nquery_code: ")
+
+
+def importance(graph, method="pagerank", damping=0.85, max_iterations=100, tol=1e-10):
+    """Importance score of every component of the serialized graph."""
+    if method not in IMPORTANCE_METHODS:
+        raise ValueError(f"Unknown importance method '{method}', expected one of {IMPORTANCE_METHODS}")
+    nodes = list(graph)
+    if method == "in_degree":
+        scores = dict.fromkeys(nodes, 0.0)
+        for comp in graph.values():
+            for dep in comp["depends_on"]:
+                if dep in scores:
+                    scores[dep] += 1.0
+        return scores
+
+    import numpy as np
+
+    n = len(nodes)
+    if n == 0:
+        return {}
+    index = {node: i for i, node in enumerate(nodes)}
+    edges = [(index[node], index[dep]) for node, comp in graph.items()
+             for dep in set(comp["depends_on"]) if dep in index]
+    src = np.fromiter((s for s, _ in edges), dtype=np.int64, count=len(edges))
+    dst = np.fromiter((d for _, d in edges), dtype=np.int64, count=len(edges))
+    out_degree = np.bincount(src, minlength=n).astype(np.float64)
+    dangling = out_degree == 0
+    weight = 1.0 / out_degree[src]
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iterations):
+        flow = np.bincount(dst, weights=rank[src] * weight, minlength=n)
+        new_rank = (1.0 - damping) / n + damping * (flow + rank[dangling].sum() / n)
+        converged = np.abs(new_rank - rank).sum() < tol
+        rank = new_rank
+        if converged:
+            break
+    return dict(zip(nodes, rank.tolist()))
+
+
+@dataclass
+class Budget:
+    """
+    Spending limits of a run (None = unlimited), shared by all its entry points.
+    Token counts are estimates from prompt and answer lengths; cost uses the given
+    prices per 1k input / output tokens. prompt_overhead_tokens is the fixed part
+    of every prompt (prompt_overhead of the chain's repository overview).
+    """
+    max_tokens: Optional[int] = None
+    max_cost: Optional[float] = None
+    max_seconds: Optional[float] = None
+    input_cost_per_1k: float = 0.0
+    output_cost_per_1k: float = 0.0
+    prompt_overhead_tokens: int = PROMPT_OVERHEAD_TOKENS
+    input_tokens: int = 0
+    output_tokens: int = 0
+    calls: int = 0
+    llm_seconds: float = 0.0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def tokens(self):
+        return self.input_tokens + self.output_tokens
+
+    @property
+    def cost(self):
+        return (self.input_tokens * self.input_cost_per_1k + self.output_tokens * self.output_cost_per_1k) / 1000
+
+    def exceeded_by(self, input_tokens):
+        """Why a call with input_tokens would break the budget (None if it fits). The
+        answer length and call duration are projected from the calls so far."""
+        output_tokens = self.output_tokens // self.calls if self.calls else input_tokens
+        if self.max_tokens is not None and self.tokens + input_tokens + output_tokens > self.max_tokens:
+            return "tokens"
+        if self.max_cost is not None:
+            call_cost = (input_tokens * self.input_cost_per_1k + output_tokens * self.output_cost_per_1k) / 1000
+            if self.cost + call_cost > self.max_cost:
+                return "cost"
+        if self.max_seconds is not None:
+            call_seconds = self.llm_seconds / self.calls if self.calls else 0.0
+            if time.monotonic() - self.started + call_seconds > self.max_seconds:
+                return "time"
+        return None
+
+    def charge(self, input_tokens, output_tokens, seconds):
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        self.llm_seconds += seconds
+        self.calls += 1
+
+    def spent(self):
+        return {
+            "calls": self.calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cost": round(self.cost, 6),
+            "seconds": round(time.monotonic() - self.started, 3),
+        }
+
+
+@dataclass
+class BudgetResult:
+    parts: List[dict]
+    skipped: List[str]
+    exhausted: Optional[str]
+    coverage: float
+    spent: Dict[str, float]
+
+
+def generate_within_budget(entry_point_id, graph, chain, budget, scores=None, doc_cache=None,
+                           part_store=None, summaries=None, index=None):
+    """
+    Document the closure of entry_point_id in decreasing importance until the budget
+    runs out.
+
+    Args:
+        budget: Budget shared by the run; charged for every LLM call
+        scores: Precomputed importance(graph), to rank many entry points with one pass
+        doc_cache, part_store, summaries: As for generate_docs
+        index: utils.reachability.ReachabilityIndex of graph, if built (see retrieve)
+
+    Returns a BudgetResult: the documented parts in generate_docs order, the skipped
+    component IDs in priority order, why the budget ran out (None if it did not),
+    and the importance-weighted share of the closure that is documented.
+    """
+    closure = [comp["id"] for comp in retrieve(graph, entry_point_id, index)]
+    position = {comp_id: i for i, comp_id in enumerate(closure)}
+    scores = scores if scores is not None else importance(graph)
+    priority = sorted(closure, key=lambda comp_id: (-scores.get(comp_id, 0.0), position[comp_id]))
+
+    outputs = {}
+    skipped = []
+    exhausted = None
+    for comp_id in priority:
+        component = graph[comp_id]
+        # Stored and deduplicated parts cost nothing, even once the budget is spent
+        output = _lookup(comp_id, component, doc_cache, part_store)
+        if output is None:
+            if summaries is not None:
+                prev_docs = summaries.context_for(comp_id, graph)
+            else:
+                prev_docs = "\n\n".join(
+                    outputs[dep]["content"].strip() for dep in component["depends_on"]
+                    if dep in outputs and outputs[dep].get("content")
+                )
+            input_tokens = estimate_tokens(component["source_code"]) + estimate_tokens(prev_docs) \
+                + estimate_tokens(str(component["depends_on"])) + budget.prompt_overhead_tokens
+            exhausted = exhausted or budget.exceeded_by(input_tokens)
+            if exhausted:
+                skipped.append(comp_id)
+                continue
+            t0 = time.monotonic()
+            output = _invoke_chain(chain, component, prev_docs)
+            answer = output.get("content") if isinstance(output, dict) else None
+            budget.charge(input_tokens, estimate_tokens(answer), time.monotonic() - t0)
+            _remember(comp_id, component, output, doc_cache, part_store)
+        if isinstance(output, dict) and "content" in output:
+            output["component_id"] = comp_id
+            output["file_path"] = component['file_path']
+            output["start_line"] = component['start_line']
+            output["end_line"] = component['end_line']
+            outputs[comp_id] = output
+        else:
+            # Unreadable answer: left for the next run, like a skipped component
+            skipped.append(comp_id)
+
+    total = sum(scores.get(comp_id, 0.0) for comp_id in closure)
+    covered = sum(scores.get(comp_id, 0.0) for comp_id in outputs)
+    return BudgetResult(
+        parts=[outputs[comp_id] for comp_id in closure if comp_id in outputs],
+        skipped=skipped,
+        exhausted=exhausted,
+        coverage=covered / total if total else float(len(outputs) == len(closure)),
+        spent=budget.spent(),
+    )
@@ -0,0 +1,50 @@
+import ast
+import hashlib
+import textwrap
+import threading
+
+from utils.parser import component_fingerprint
+
+
+def fingerprint_of(component):
+    """Fingerprint recorded by the parser, or, for graphs saved before fingerprints
+    existed, utils.parser.component_fingerprint of the parsed source. Source that
+    does not parse on its own is hashed with its indentation kept (only trailing
+    whitespace and blank lines are dropped), since indentation is significant."""
+    if component.get("fingerprint"):
+        return component["fingerprint"]
+    source = component.get("source_code") or ""
+    component_type = component.get("component_type", "")
+    try:
+        tree = ast.parse(textwrap.dedent(source))
+    except SyntaxError:
+        normalized = "\n".join(line.rstrip() for line in source.splitlines() if line.strip())
+        return hashlib.sha256(f"{component_type}:{normalized}".encode("utf-8")).hexdigest()
+    return component_fingerprint(tree.body[0] if len(tree.body) == 1 else tree, component_type)
+
+
+class DocCache:
+    """
+    Shares one generated documentation result between all components whose
+    normalized source is identical (vendored copies, repeated __init__ methods,
+    copy-pasted helpers). Keep one instance per run so the savings span entry points.
+    """
+
+    def __init__(self):
+        self._outputs = {}
+        self._lock = threading.Lock()
+        self.generated = 0
+        self.deduplicated = 0
+
+    def get(self, component):
+        with self._lock:
+            output = self._outputs.get(fingerprint_of(component))
+            if output is not None:
+                self.deduplicated += 1
+                return dict(output)
+        return None
+
+    def put(self, component, output):
+        with self._lock:
+            self.generated += 1
+            self._outputs[fingerprint_of(component)] = dict(output)
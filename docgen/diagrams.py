@@ -0,0 +1,255 @@
+"""
+Architecture diagrams from the dependency graph.
+
+A diagram never lays out individual components. Every component is placed in a
+hierarchy taken from its relative_path and dotted ID (package / ... / module.py /
+Class / method), and the graph is coarsened to one level of that hierarchy:
+the children of the focused node (the top-level packages by default) plus, for
+context, every other branch collapsed to the sibling of the focus it hangs
+from. Edge weights count the component-level dependencies between two
+super-nodes. Drilling down is just coarsening again with a deeper focus, so one
+linear pass over the graph serves any level of a 100k-component repository.
+
+Diagrams render to DOT or to SVG: with Graphviz' `dot` when it is installed,
+otherwise with a built-in layered layout (dependents above their dependencies).
+Rendered SVG is cached on disk under a digest of the coarse graph, so every
+graph version that coarsens to the same picture reuses the layout.
+"""
+
+import os
+import math
+import html
+import json
+import shutil
+import hashlib
+import subprocess
+from dataclasses import dataclass, field
+from typing import Dict, Set, Tuple
+
+from utils.toposort import build_work_plan
+
+ENGINES = ("auto", "graphviz", "builtin")
+
+NODE_HEIGHT = 40
+LAYER_GAP = 90
+NODE_GAP = 24
+CHAR_WIDTH = 7.5
+
+
+def hierarchy_key(comp_id, comp):
+    """(dir, ..., file.py, Class, method) for a serialized component."""
+    path = comp["relative_path"].replace(os.sep, "/").split("/")
+    module = path[:-1] + [path[-1][:-3] if path[-1].endswith(".py") else path[-1]]
+    if module[-1] == "__init__":
+        module = module[:-1]
+    prefix = ".".join(module)
+    if prefix and comp_id.startswith(prefix + "."):
+        names = comp_id[len(prefix) + 1:].split(".")
+    else:
+        names = [comp_id.rsplit(".", 1)[-1]]
+    return tuple(path) + tuple(names)
+
+
+def _node_for(key, focus):
+    if key[:len(focus)] == focus:
+        return key[:len(focus) + 1]
+    common = 0
+    while common < min(len(key), len(focus)) - 1 and key[common] == focus[common]:
+        common += 1
+    return key[:common + 1]
+
+
+@dataclass
+class CoarseGraph:
+    """
+    One level of the hierarchy. Node names are "/"-joined hierarchy keys; nodes
+    maps them to their component count, edges (dependent, dependency) to the number
+    of component dependencies between them.
+    """
+    focus: Tuple[str, ...]
+    nodes: Dict[str, int] = field(default_factory=dict)
+    edges: Dict[Tuple[str, str], int] = field(default_factory=dict)
+    expandable: Set[str] = field(default_factory=set)
+
+    def digest(self):
+        payload = json.dumps([list(self.focus), sorted(self.nodes.items()), sorted(self.expandable),
+                              sorted([u, v, w] for (u, v), w in self.edges.items())])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def in_focus(self, node):
+        return tuple(node.split("/")[:len(self.focus)]) == self.focus
+
+
+def coarsen(graph, focus=()):
+    """
+    Collapse the serialized graph to the children of focus (a hierarchy key prefix,
+    e.g. ("docgen",) or ("docgen", "budget.py")).
+    """
+    focus = tuple(focus)
+    coarse = CoarseGraph(focus=focus)
+    node_of = {}
+    for comp_id, comp in graph.items():
+        key = hierarchy_key(comp_id, comp)
+        node = _node_for(key, focus)
+        name = "/".join(node)
+        node_of[comp_id] = name
+        coarse.nodes[name] = coarse.nodes.get(name, 0) + 1
+        if len(key) > len(node):
+            coarse.expandable.add(name)
+
+    for comp_id, comp in graph.items():
+        source = node_of[comp_id]
+        for dep in comp["depends_on"]:
+            target = node_of.get(dep)
+            if target is not None and target != source:
+                coarse.edges[(source, target)] = coarse.edges.get((source, target), 0) + 1
+    return coarse
+
+
+def _label(coarse, node):
+    return node if not coarse.in_focus(node) and coarse.focus else node.rsplit("/", 1)[-1]
+
+
+def _dot_quote(text):
+    return text.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def to_dot(coarse):
+    lines = [
+        "digraph architecture {",
+        '  rankdir=TB; node [shape=box, style="rounded,filled", fontname="Helvetica", fontsize=11];',
+    ]
+    for name, count in sorted(coarse.nodes.items()):
+        fill = "#dbe7fb" if coarse.in_focus(name) else "#eeeeee"
+        peripheries = 2 if name in coarse.expandable else 1
+        label = f"{_dot_quote(_label(coarse, name))}\\n{count} component{'s' if count != 1 else ''}"
+        lines.append(f'  "{_dot_quote(name)}" [label="{label}", tooltip="{_dot_quote(name)}", '
+                     f'fillcolor="{fill}", peripheries={peripheries}];')
+    for (source, target), weight in sorted(coarse.edges.items()):
+        lines.append(f'  "{_dot_quote(source)}" -> "{_dot_quote(target)}" '
+                     f'[penwidth={1 + math.log2(weight):.2f}, tooltip="{weight} dependencies"];')
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def layout(coarse):
+    """
+    Layered layout: {node: (x, y, width)}. Layers are the levels of the condensed
+    dependency graph (utils.toposort.build_work_plan) with dependents drawn above
+    their dependencies; nodes are ordered within a layer by the mean position of
+    their neighbours to reduce crossings.
+    """
+    deps = {name: set() for name in coarse.nodes}
+    neighbours = {name: [] for name in coarse.nodes}
+    for source, target in coarse.edges:
+        deps[source].add(target)
+        neighbours[source].append(target)
+        neighbours[target].append(source)
+    levels = build_work_plan(deps).levels
+    layers = [sorted(node for unit in level for node in unit) for level in reversed(levels)]
+
+    order = {}
+    for layer in layers:
+        for i, node in enumerate(layer):
+            order[node] = i - len(layer) / 2
+    for _ in range(4):
+        for layer in layers:
+            layer.sort(key=lambda node: (sum(order[n] for n in neighbours[node]) / len(neighbours[node])
+                                         if neighbours[node] else order[node]))
+            for i, node in enumerate(layer):
+                order[node] = i - len(layer) / 2
+
+    widths = {node: max(90.0, CHAR_WIDTH * max(len(_label(coarse, node)), 14) + 20) for node in coarse.nodes}
+    layer_widths = [sum(widths[node] for node in layer) + NODE_GAP * (len(layer) - 1) for layer in layers]
+    canvas = max(layer_widths, default=0)
+    positions = {}
+    for depth, (layer, layer_width) in enumerate(zip(layers, layer_widths)):
+        x = (canvas - layer_width) / 2
+        for node in layer:
+            positions[node] = (x, depth * (NODE_HEIGHT + LAYER_GAP), widths[node])
+            x += widths[node] + NODE_GAP
+    return positions
+
+
+def to_svg(coarse, positions=None):
+    """SVG of the built-in layout (positions from layout() unless given)."""
+    positions = positions or layout(coarse)
+    margin = 20
+    width = max((x + w for x, _, w in positions.values()), default=0) + 2 * margin
+    height = max((y for _, y, _ in positions.values()), default=0) + NODE_HEIGHT + 2 * margin
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" height="{height:.0f}" '
+        f'viewBox="0 0 {width:.0f} {height:.0f}" font-family="Helvetica, Arial, sans-serif" font-size="11">',
+        '<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="7" markerHeight="7" '
+        'orient="auto-start-reverse"><path d="M 0 0 L 10 5 L 0 10 z" fill="#7a869a"/></marker></defs>',
+    ]
+    for (source, target), weight in sorted(coarse.edges.items()):
+        sx, sy, sw = positions[source]
+        tx, ty, tw = positions[target]
+        x1, x2 = margin + sx + sw / 2, margin + tx + tw / 2
+        if sy == ty:
+            # Same layer (a dependency cycle): arc below the boxes
+            y1 = y2 = margin + sy + NODE_HEIGHT
+            path = f"M {x1:.1f} {y1:.1f} Q {(x1 + x2) / 2:.1f} {y1 + LAYER_GAP / 2:.1f} {x2:.1f} {y2:.1f}"
+        else:
+            y1 = margin + sy + (NODE_HEIGHT if sy < ty else 0)
+            y2 = margin + ty + (0 if sy < ty else NODE_HEIGHT)
+            path = f"M {x1:.1f} {y1:.1f} L {x2:.1f} {y2:.1f}"
+        parts.append(f'<path d="{path}" fill="none" stroke="#7a869a" stroke-opacity="0.7" '
+                     f'stroke-width="{1 + math.log2(weight):.2f}" marker-end="url(#arrow)">'
+                     f'<title>{html.escape(source)} → {html.escape(target)}: {weight} dependencies</title></path>')
+    for name, count in sorted(coarse.nodes.items()):
+        x, y, w = positions[name]
+        fill = "#dbe7fb" if coarse.in_focus(name) else "#eeeeee"
+        stroke_width = 2.5 if name in coarse.expandable else 1
+        parts.append(
+            f'<g><title>{html.escape(name)} ({count} components)</title>'
+            f'<rect x="{margin + x:.1f}" y="{margin + y:.1f}" width="{w:.1f}" height="{NODE_HEIGHT}" rx="6" '
+            f'fill="{fill}" stroke="#4a5a78" stroke-width="{stroke_width}"/>'
+            f'<text x="{margin + x + w / 2:.1f}" y="{margin + y + 17:.1f}" text-anchor="middle">'
+            f'{html.escape(_label(coarse, name))}</text>'
+            f'<text x="{margin + x + w / 2:.1f}" y="{margin + y + 31:.1f}" text-anchor="middle" fill="#666">'
+            f'{count} component{"s" if count != 1 else ""}</text></g>'
+        )
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+def _resolve_engine(engine):
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown layout engine '{engine}', expected one of {ENGINES}")
+    if engine == "auto":
+        return "graphviz" if shutil.which("dot") else "builtin"
+    return engine
+
+
+def render_svg(coarse, engine="auto"):
+    if _resolve_engine(engine) == "graphviz":
+        result = subprocess.run(["dot", "-Tsvg"], input=to_dot(coarse), capture_output=True, text=True, check=True)
+        return result.stdout
+    return to_svg(coarse)
+
+
+class DiagramCache:
+    """Rendered diagrams on disk, keyed by the coarse graph's digest."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.hits = 0
+
+    def render(self, coarse, fmt="svg", engine="auto"):
+        """DOT source or SVG of coarse, laid out at most once per distinct coarse graph."""
+        if fmt == "dot":
+            return to_dot(coarse)
+        path = os.path.join(self.directory, f"{coarse.digest()}-{_resolve_engine(engine)}.svg")
+        if os.path.exists(path):
+            self.hits += 1
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        svg = render_svg(coarse, engine)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(svg)
+        os.replace(tmp_path, path)
+        return svg
@@ -0,0 +1,270 @@
+import os
+import json
+import sqlite3
+import threading
+
+from docgen.parts import PartStore, source_hash
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS parts (
+    repo TEXT NOT NULL,
+    component_id TEXT NOT NULL,
+    source_hash TEXT NOT NULL,
+    component_type TEXT,
+    file_path TEXT,
+    start_line INTEGER,
+    end_line INTEGER,
+    code TEXT,
+    content TEXT,
+    output TEXT NOT NULL,
+    PRIMARY KEY (repo, component_id)
+);
+CREATE INDEX IF NOT EXISTS parts_source_hash ON parts (source_hash);
+
+CREATE TABLE IF NOT EXISTS entry_docs (
+    repo TEXT NOT NULL,
+    entry_point TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    component_id TEXT NOT NULL,
+    PRIMARY KEY (repo, entry_point, position)
+);
+CREATE INDEX IF NOT EXISTS entry_docs_component ON entry_docs (repo, entry_point, component_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS parts_fts USING fts5(
+    component_id, content, code, content='parts', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS parts_ai AFTER INSERT ON parts BEGIN
+    INSERT INTO parts_fts (rowid, component_id, content, code)
+    VALUES (new.rowid, new.component_id, new.content, new.code);
+END;
+CREATE TRIGGER IF NOT EXISTS parts_ad AFTER DELETE ON parts BEGIN
+    INSERT INTO parts_fts (parts_fts, rowid, component_id, content, code)
+    VALUES ('delete', old.rowid, old.component_id, old.content, old.code);
+END;
+CREATE TRIGGER IF NOT EXISTS parts_au AFTER UPDATE ON parts BEGIN
+    INSERT INTO parts_fts (parts_fts, rowid, component_id, content, code)
+    VALUES ('delete', old.rowid, old.component_id, old.content, old.code);
+    INSERT INTO parts_fts (rowid, component_id, content, code)
+    VALUES (new.rowid, new.component_id, new.content, new.code);
+END;
+"""
+
+PART_COLUMNS = "p.component_id, p.file_path, p.start_line, p.end_line, p.content"
+
+
+def _part(row):
+    return {
+        "component_id": row[0],
+        "file_path": row[1],
+        "start_line": row[2],
+        "end_line": row[3],
+        "content": row[4],
+    }
+
+
+class DocStore(PartStore):
+    """
+    SQLite-backed documentation store shared by all repositories.
+
+    Parts are keyed by (repo, component ID) and carry the source hash they were
+    generated from, so it is a drop-in replacement for the JSON PartStore during
+    generation. Each entry point's ordered output is stored as a list of component
+    IDs, which allows paginated reads without loading whole documents, and an FTS5
+    index over generated content and code backs keyword search.
+
+    The database is shared by every repository, process and watch session, so no
+    transaction is held open between calls (in particular not across LLM calls):
+    each put() commits on its own and multi-statement writes are short explicit
+    transactions, with a long busy timeout for concurrent writers.
+    """
+
+    def __init__(self, path, repo):
+        self.path = path
+        self.repo = repo
+        self._lock = threading.Lock()
+        self.dirty = set()
+        self.reused = 0
+        self.regenerated = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def _transaction(self, fn, *args):
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(*args)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            return result
+
+    def stored_hashes(self):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT component_id, source_hash FROM parts WHERE repo = ?", (self.repo,)
+            ).fetchall()
+        return dict(rows)
+
+    def get(self, comp_id, component):
+        if comp_id in self.dirty:
+            return None
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT source_hash, output FROM parts WHERE repo = ? AND component_id = ?",
+                (self.repo, comp_id)
+            ).fetchone()
+            if row is None or row[0] != source_hash(component):
+                return None
+            self.reused += 1
+        return json.loads(row[1])
+
+    def put(self, comp_id, component, output):
+        with self._lock:
+            self.regenerated += 1
+            self.conn.execute(
+                """INSERT INTO parts (repo, component_id, source_hash, component_type, file_path,
+                                      start_line, end_line, code, content, output)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (repo, component_id) DO UPDATE SET
+                       source_hash = excluded.source_hash, component_type = excluded.component_type,
+                       file_path = excluded.file_path, start_line = excluded.start_line,
+                       end_line = excluded.end_line, code = excluded.code,
+                       content = excluded.content, output = excluded.output""",
+                (self.repo, comp_id, source_hash(component), component.get("component_type"),
+                 component.get("file_path"), component.get("start_line"), component.get("end_line"),
+                 component.get("source_code"), output.get("content"), json.dumps(output))
+            )
+            self.dirty.discard(comp_id)
+
+    def save(self):
+        """Nothing to do: every put() is already committed (kept for the PartStore interface)."""
+
+    def save_entry_point(self, entry_point, documentation_parts):
+        """Record the ordered component IDs of one entry point's documentation."""
+        def apply():
+            self.conn.execute("DELETE FROM entry_docs WHERE repo = ? AND entry_point = ?",
+                              (self.repo, entry_point))
+            self.conn.executemany(
+                "INSERT INTO entry_docs (repo, entry_point, position, component_id) VALUES (?, ?, ?, ?)",
+                [(self.repo, entry_point, i, part["component_id"]) for i, part in enumerate(documentation_parts)]
+            )
+        self._transaction(apply)
+
+    def entry_points(self):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT entry_point FROM entry_docs WHERE repo = ? ORDER BY entry_point", (self.repo,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def delete_entry_point(self, entry_point):
+        with self._lock:
+            self.conn.execute("DELETE FROM entry_docs WHERE repo = ? AND entry_point = ?",
+                              (self.repo, entry_point))
+
+    def count(self, entry_point):
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM entry_docs WHERE repo = ? AND entry_point = ?", (self.repo, entry_point)
+            ).fetchone()[0]
+
+    def page(self, entry_point, offset=0, limit=50):
+        """Documentation parts of an entry point in generation order, one page at a time."""
+        with self._lock:
+            rows = self.conn.execute(
+                f"""SELECT {PART_COLUMNS} FROM entry_docs e
+                    JOIN parts p ON p.repo = e.repo AND p.component_id = e.component_id
+                    WHERE e.repo = ? AND e.entry_point = ? AND e.position >= ?
+                    ORDER BY e.position LIMIT ?""",
+                (self.repo, entry_point, offset, limit)
+            ).fetchall()
+        return [_part(row) for row in rows]
+
+    def find(self, entry_point, text, limit=20):
+        """(position, component ID) of an entry point's components matching text: IDs
+        starting with it first (index range scan), then IDs containing it."""
+        with self._lock:
+            rows = self.conn.execute(
+                """SELECT position, component_id FROM entry_docs
+                   WHERE repo = ? AND entry_point = ? AND component_id >= ? AND component_id < ?
+                   ORDER BY component_id LIMIT ?""",
+                (self.repo, entry_point, text, text + "\uffff", limit)
+            ).fetchall()
+            if len(rows) < limit:
+                rows += self.conn.execute(
+                    """SELECT position, component_id FROM entry_docs
+                       WHERE repo = ? AND entry_point = ? AND instr(component_id, ?) > 1
+                       ORDER BY position LIMIT ?""",
+                    (self.repo, entry_point, text, limit - len(rows))
+                ).fetchall()
+        return rows
+
+    def all_parts(self):
+        """Every stored part of the repository, in component ID order."""
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {PART_COLUMNS} FROM parts p WHERE p.repo = ? ORDER BY p.component_id", (self.repo,)
+            ).fetchall()
+        return [_part(row) for row in rows]
+
+    def entry_point_components(self, entry_point):
+        """Component IDs of an entry point's documentation in generation order."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT component_id FROM entry_docs WHERE repo = ? AND entry_point = ? ORDER BY position",
+                (self.repo, entry_point)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def lookup(self, component_id):
+        """Documentation of one component (primary key lookup)."""
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT {PART_COLUMNS} FROM parts p WHERE p.repo = ? AND p.component_id = ?",
+                (self.repo, component_id)
+            ).fetchone()
+        return _part(row) if row else None
+
+    def search(self, query, limit=20, all_repos=False, offset=0):
+        """Keyword search over generated content, code and component IDs, best matches first."""
+        # Quote every term so user input is never parsed as FTS5 syntax
+        terms = " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+        if not terms:
+            return []
+        sql = f"""SELECT {PART_COLUMNS}, p.repo,
+                         snippet(parts_fts, 1, '**', '**', ' … ', 12)
+                  FROM parts_fts JOIN parts p ON p.rowid = parts_fts.rowid
+                  WHERE parts_fts MATCH ?"""
+        params = [terms]
+        if not all_repos:
+            sql += " AND p.repo = ?"
+            params.append(self.repo)
+        sql += " ORDER BY bm25(parts_fts) LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [dict(_part(row), repo=row[5], snippet=row[6]) for row in rows]
+
+    def sizes(self):
+        """Approximate bytes of stored documentation per repository (all repositories)."""
+        with self._lock:
+            rows = self.conn.execute(
+                """SELECT repo, SUM(LENGTH(output) + COALESCE(LENGTH(code), 0) + COALESCE(LENGTH(content), 0))
+                   FROM parts GROUP BY repo"""
+            ).fetchall()
+        return {repo: size or 0 for repo, size in rows}
+
+    def delete_repo(self):
+        """Remove every part and entry point of the repository."""
+        def apply():
+            self.conn.execute("DELETE FROM entry_docs WHERE repo = ?", (self.repo,))
+            return self.conn.execute("DELETE FROM parts WHERE repo = ?", (self.repo,)).rowcount
+        return self._transaction(apply)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
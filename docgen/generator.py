@@ -1,51 +1,158 @@
 import re
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.toposort import build_work_plan
+from docgen.retriever import retrieve
+from docgen.routing import ModelRouter
 
-def generate_docs(entry_point_id, graph, chain, seen, ids, documentation_parts, conversation_history):
-    """Generate documentation step by step, expanding dependencies layer by layer,
-    with short-term memory of last few sections for consistency.
-    """
-    if entry_point_id in seen or entry_point_id not in ids:
-        return
-    seen.append(entry_point_id)
 
-    prev_docs = "\n\n".join([c for c in conversation_history])
-    # print("PrevDocs:", prev_docs) 
-    dependent_comps = graph[entry_point_id]['depends_on']
+def _invoke_chain(chain, component, prev_docs):
+    """Ask the LLM to document a single component and parse its JSON answer.
+
+    chain may be a docgen.routing.ModelRouter: the component then goes to the chain
+    of its tier, or is documented from a template without calling the LLM.
+    """
+    if isinstance(chain, ModelRouter):
+        tier = chain.route(component)
+        if tier == "template":
+            return chain.template(component)
+        t0 = time.perf_counter()
+        output = _invoke_chain(chain.chains[tier], component, prev_docs)
+        chain.observe(tier, time.perf_counter() - t0)
+        return output
 
     doc = chain.invoke({
-        "query_code": graph[entry_point_id]["source_code"],
+        "query_code": component["source_code"],
         "previous_docs": prev_docs,
-        "dependent_comps": dependent_comps
-    }) 
+        "dependent_comps": component['depends_on']
+    })
 
     clean_output = re.sub(r"^```(?:json)?\s*|\s*```$", "", doc.content.strip())
 
     # clean_output = re.sub(r'(?<=f)"(.*?)"', r'f\"\1\"', clean_output)
     # 3. Parse the cleaned JSON
     try:
-        output = json.loads(clean_output) 
+        return json.loads(clean_output)
+    except Exception as e:
+        print(f"Error loading JSON - {doc}")
+        return None
 
-        match = output["content"]
 
-        # print(output["file_path"])
+def _lookup(comp_id, component, doc_cache, part_store):
+    """Stored or deduplicated output for a component, if it need not be regenerated."""
+    output = part_store.get(comp_id, component) if part_store is not None else None
+    if output is None and doc_cache is not None:
+        output = doc_cache.get(component)
+        if output is not None and part_store is not None:
+            part_store.put(comp_id, component, output)
+    return output
 
-        extracted_content = ""
 
-        if match:
-            extracted_content = match.strip()
-        # print("--------------------------------------------")
-        output["file_path"] = graph[entry_point_id]['file_path']
-        output["start_line"] = graph[entry_point_id]['start_line']
-        output["end_line"] = graph[entry_point_id]['end_line']
+def _remember(comp_id, component, output, doc_cache, part_store):
+    if output is None:
+        return
+    if doc_cache is not None:
+        doc_cache.put(component, output)
+    if part_store is not None:
+        part_store.put(comp_id, component, output)
 
-        documentation_parts.append(output)
-        conversation_history.append(extracted_content)
-    except Exception as e:
-        print(f"Error loading JSON - {doc}")
-        # print(clean_output)
 
-    for deps in graph[entry_point_id]['depends_on']:
-        generate_docs(deps, graph, chain, seen, ids, documentation_parts, conversation_history)
-    
-    return documentation_parts
\ No newline at end of file
+def generate_docs(entry_point_id, graph, chain, seen, ids, documentation_parts, conversation_history,
+                  doc_cache=None, part_store=None, summaries=None):
+    """Generate documentation step by step, expanding dependencies layer by layer,
+    with short-term memory of last few sections for consistency.
+
+    If a docgen.dedup.DocCache is given, components with identical source reuse
+    the result generated for the first copy instead of calling the LLM again.
+    If a docgen.parts.PartStore is given, only its dirty components are sent to
+    the LLM; stored parts are spliced into the output for all the others.
+    If docgen.summaries.Summaries are given, previous_docs is the bounded summary
+    context of the component instead of the whole conversation history.
+    """
+    if entry_point_id in seen or entry_point_id not in ids:
+        return
+    seen.append(entry_point_id)
+
+    component = graph[entry_point_id]
+
+    output = _lookup(entry_point_id, component, doc_cache, part_store)
+    if output is None:
+        if summaries is not None:
+            prev_docs = summaries.context_for(entry_point_id, graph)
+        else:
+            prev_docs = "\n\n".join([c for c in conversation_history])
+        # print("PrevDocs:", prev_docs)
+        output = _invoke_chain(chain, component, prev_docs)
+        _remember(entry_point_id, component, output, doc_cache, part_store)
+
+    if output is not None:
+        try:
+            match = output["content"]
+
+            extracted_content = ""
+
+            if match:
+                extracted_content = match.strip()
+            output["component_id"] = entry_point_id
+            output["file_path"] = component['file_path']
+            output["start_line"] = component['start_line']
+            output["end_line"] = component['end_line']
+
+            documentation_parts.append(output)
+            conversation_history.append(extracted_content)
+        except Exception as e:
+            print(f"Error reading documentation output for {entry_point_id} - {output}")
+
+    for deps in component['depends_on']:
+        generate_docs(deps, graph, chain, seen, ids, documentation_parts, conversation_history,
+                      doc_cache, part_store, summaries)
+
+    return documentation_parts
+
+
+def generate_docs_by_level(entry_point_id, graph, chain, max_workers=4, doc_cache=None, part_store=None,
+                           summaries=None, index=None):
+    """Generate documentation for the dependency closure of an entry point level by level.
+
+    Components are scheduled with utils.toposort.build_work_plan: every level of the
+    SCC-condensed graph is sent to the LLM concurrently, and each prompt gets the
+    documentation of the component's own dependencies (already generated in earlier
+    levels) as previous_docs. Parts are returned in the same top-down order as
+    generate_docs. index: utils.reachability.ReachabilityIndex of graph, if built.
+    """
+    closure = [comp["id"] for comp in retrieve(graph, entry_point_id, index)]
+    deps_graph = {comp_id: set(graph[comp_id]["depends_on"]) for comp_id in closure}
+    plan = build_work_plan(deps_graph, nodes=closure)
+
+    outputs = {}
+
+    def document_unit(unit):
+        # Members of a cycle are documented one after another
+        for comp_id in unit:
+            component = graph[comp_id]
+            output = _lookup(comp_id, component, doc_cache, part_store)
+            if output is None:
+                if summaries is not None:
+                    prev_docs = summaries.context_for(comp_id, graph)
+                else:
+                    prev_docs = "\n\n".join(
+                        outputs[dep]["content"].strip() for dep in component["depends_on"]
+                        if dep in outputs and outputs[dep].get("content")
+                    )
+                output = _invoke_chain(chain, component, prev_docs)
+                _remember(comp_id, component, output, doc_cache, part_store)
+            if isinstance(output, dict) and "content" in output:
+                output["component_id"] = comp_id
+                output["file_path"] = component['file_path']
+                output["start_line"] = component['start_line']
+                output["end_line"] = component['end_line']
+                outputs[comp_id] = output
+            else:
+                print(f"Error reading documentation output for {comp_id} - {output}")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for level in plan.levels:
+            list(executor.map(document_unit, level))
+
+    return [outputs[comp_id] for comp_id in closure if comp_id in outputs]
@@ -0,0 +1,432 @@
+"""
+Background documentation jobs for the Streamlit app.
+
+JobService runs generation on its own worker threads instead of the Streamlit
+script thread, so reruns, widget interaction and closed browser tabs no longer
+interrupt it. Every job is a row in a SQLite database holding its stage,
+progress and result; the UI only submits jobs and polls them, and a reopened
+page finds its user's jobs (finished or still running) in the database.
+
+- Submitting a repository revision that is already queued or running (same path,
+  commit and options) attaches the new user to that job instead of adding one.
+- Queued jobs are dispatched fairly: the user with the fewest running jobs goes
+  first, then the user served longest ago, so one user's batch cannot starve the
+  others. Jobs of a repository that is being documented wait for it to finish.
+- A running job is leased by the service that claimed it and kept alive with
+  heartbeats, so several services (e.g. app processes) can share one database.
+  Jobs whose lease expired (their process stopped) are queued again.
+- A user cancelling a shared job only detaches from it; a queued job is cancelled
+  once no user is left.
+"""
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+import socket
+import sqlite3
+import threading
+
+from utils.build_graph import BuildGraph
+from utils.loader import load_graph
+from utils.reachability import ReachabilityIndex
+from docgen.entrypoints import find_entrypoints
+from docgen.retriever import retrieve
+from docgen.generator import generate_docs
+from docgen.dedup import DocCache
+from docgen.doc_store import DocStore
+from docgen.repo_context import repo_overview
+from docgen.watch import RepoPoller
+from docgen.storage import StorageManager
+from docgen.pipeline import (
+    dependency_graph_path_for, repo_key, doc_store_path_for, documentation_path_for, save_documentation
+)
+
+logger = logging.getLogger("docstring_generator")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    key TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    repo_path TEXT NOT NULL,
+    revision TEXT NOT NULL,
+    options TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    stage TEXT,
+    done INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    lease_owner TEXT,
+    lease_expires REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, status);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+
+CREATE TABLE IF NOT EXISTS job_users (
+    job_id TEXT NOT NULL,
+    user TEXT NOT NULL,
+    submitted_at REAL NOT NULL,
+    PRIMARY KEY (user, job_id)
+);
+"""
+
+# Statuses: queued -> running -> done or failed; queued jobs can be cancelled
+ACTIVE = ("queued", "running")
+
+JOB_COLUMNS = "id, key, owner, repo_path, revision, options, status, stage, done, total, result, error, " \
+              "created_at, started_at, finished_at"
+
+
+def jobs_path_for(output_dir="output"):
+    return f"{output_dir}/jobs.sqlite3"
+
+
+def repo_revision(repo_path):
+    """The checked out commit of a clean git repository, else a hash of the .py files' stamps."""
+    try:
+        from git import Repo
+
+        repo = Repo(repo_path)
+        if not repo.is_dirty(untracked_files=True):
+            return repo.head.commit.hexsha
+    except Exception:
+        # Not a git checkout (uploaded files), no commit yet, or GitPython missing
+        pass
+    stamps = sorted(RepoPoller(repo_path).snapshot().items())
+    return "files:" + hashlib.sha1(json.dumps(stamps).encode("utf-8")).hexdigest()
+
+
+def _job(row):
+    job = dict(zip([column.strip() for column in JOB_COLUMNS.split(",")], row))
+    job["options"] = json.loads(job["options"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+class JobService:
+    """
+    Args:
+        path: SQLite database of the jobs
+        workers: Jobs run at the same time
+        runner: runner(job, progress) -> JSON-serializable result; progress(stage,
+                done=None, total=None) records how far the job got (run_generation
+                by default)
+        poll_interval: Seconds between checks for jobs submitted by other processes
+    """
+
+    def __init__(self, path, workers=2, runner=None, poll_interval=1.0, lease_seconds=60):
+        self.path = path
+        self.workers = workers
+        self.runner = runner or run_generation
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Transactions are managed explicitly (BEGIN IMMEDIATE) to serialize claims
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        # Databases created before jobs were leased
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("lease_owner", "TEXT"), ("lease_expires", "REAL")):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+
+    def _transaction(self, fn, *args):
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(*args)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            return result
+
+    # Lifecycle
+
+    def start(self):
+        """Requeue jobs whose process stopped (expired leases) and start the workers."""
+        requeued = self._transaction(self._requeue_expired)
+        if requeued:
+            logger.info(f"Job service {self.path}: {requeued} interrupted job(s) requeued")
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"docgen-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        """Stop after the running jobs finish."""
+        self._stop.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def close(self):
+        self.stop()
+        with self._lock:
+            self.conn.close()
+
+    # Submitting and polling
+
+    def submit(self, user, repo_path, options=None):
+        """
+        Queue documentation of repo_path for user; returns the job ID. An identical
+        job (same repository, revision and options) that is still queued or running
+        is shared instead.
+        """
+        options = options or {}
+        repo_path = os.path.abspath(repo_path)
+        revision = repo_revision(repo_path)
+        key = hashlib.sha1(json.dumps([repo_path, revision, options], sort_keys=True).encode("utf-8")).hexdigest()
+
+        def apply():
+            now = time.time()
+            row = self.conn.execute(
+                f"SELECT id FROM jobs WHERE key = ? AND status IN {ACTIVE} ORDER BY created_at LIMIT 1", (key,)
+            ).fetchone()
+            if row is not None:
+                job_id = row[0]
+            else:
+                job_id = uuid.uuid4().hex
+                self.conn.execute(
+                    """INSERT INTO jobs (id, key, owner, repo_path, revision, options, stage, created_at)
+                       VALUES (?, ?, ?, ?, ?, ?, 'Queued', ?)""",
+                    (job_id, key, user, repo_path, revision, json.dumps(options, sort_keys=True), now)
+                )
+            self.conn.execute("INSERT OR IGNORE INTO job_users (job_id, user, submitted_at) VALUES (?, ?, ?)",
+                              (job_id, user, now))
+            return job_id, row is not None
+
+        job_id, merged = self._transaction(apply)
+        logger.info(f"Job {job_id} for {repo_path}@{revision[:12]} "
+                    f"{'shared with an identical job' if merged else 'queued'} by {user}")
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id):
+        with self._lock:
+            row = self.conn.execute(f"SELECT {JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job(row) if row is not None else None
+
+    def jobs_for(self, user, limit=20):
+        """A user's jobs (submitted or joined), newest first."""
+        with self._lock:
+            rows = self.conn.execute(
+                f"""SELECT {', '.join('j.' + column.strip() for column in JOB_COLUMNS.split(','))}
+                    FROM jobs j JOIN job_users u ON u.job_id = j.id
+                    WHERE u.user = ? ORDER BY u.submitted_at DESC LIMIT ?""",
+                (user, limit)
+            ).fetchall()
+        return [_job(row) for row in rows]
+
+    def cancel(self, job_id, user):
+        """
+        Detach user from a job; False if they were not attached. The job itself is
+        cancelled only if it has not started and no other user is attached to it.
+        """
+        def apply():
+            detached = self.conn.execute("DELETE FROM job_users WHERE job_id = ? AND user = ?",
+                                         (job_id, user)).rowcount == 1
+            if detached and self.conn.execute("SELECT 1 FROM job_users WHERE job_id = ? LIMIT 1",
+                                              (job_id,)).fetchone() is None:
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'cancelled', stage = 'Cancelled', finished_at = ? "
+                    "WHERE id = ? AND status = 'queued'", (time.time(), job_id)
+                )
+            return detached
+
+        return self._transaction(apply)
+
+    def counts(self):
+        with self._lock:
+            counts = dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in ("queued", "running", "done", "failed")}
+
+    # Workers
+
+    def _requeue_expired(self):
+        """Queue running jobs again whose lease expired (or that predate leases)."""
+        return self.conn.execute(
+            """UPDATE jobs SET status = 'queued', stage = 'Requeued after its worker stopped', started_at = NULL,
+                   lease_owner = NULL, lease_expires = NULL
+               WHERE status = 'running' AND (lease_expires IS NULL OR lease_expires < ?)""", (time.time(),)
+        ).rowcount
+
+    def claim(self):
+        """Lease the next job (fair across users), mark it running and return it, or None."""
+        def apply():
+            self._requeue_expired()
+            row = self.conn.execute(
+                f"""SELECT {JOB_COLUMNS} FROM jobs j
+                    WHERE status = 'queued' AND NOT EXISTS (
+                        SELECT 1 FROM jobs r WHERE r.status = 'running' AND r.repo_path = j.repo_path)
+                    ORDER BY
+                        (SELECT COUNT(*) FROM jobs r WHERE r.status = 'running' AND r.owner = j.owner),
+                        COALESCE((SELECT MAX(started_at) FROM jobs s WHERE s.owner = j.owner), 0),
+                        created_at
+                    LIMIT 1"""
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            self.conn.execute(
+                """UPDATE jobs SET status = 'running', stage = 'Starting', started_at = ?, lease_owner = ?,
+                       lease_expires = ? WHERE id = ?""",
+                (now, self.owner, now + self.lease_seconds, row[0])
+            )
+            return _job(row)
+
+        return self._transaction(apply)
+
+    def heartbeat(self, job_id):
+        """Extend the lease on a running job; False if it was lost (expired and requeued)."""
+        with self._lock:
+            return self.conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (time.time() + self.lease_seconds, job_id, self.owner)
+            ).rowcount == 1
+
+    def _progress(self, job_id, stage, done=None, total=None):
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET stage = ?, done = COALESCE(?, done), total = COALESCE(?, total) WHERE id = ?",
+                (stage, done, total, job_id)
+            )
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with self._lock:
+            finished = self.conn.execute(
+                """UPDATE jobs SET status = ?, stage = ?, result = ?, error = ?, finished_at = ?,
+                       lease_owner = NULL, lease_expires = NULL
+                   WHERE id = ? AND status = 'running' AND lease_owner = ?""",
+                (status, "Done" if status == "done" else "Failed",
+                 json.dumps(result) if result is not None else None, error, time.time(), job_id, self.owner)
+            ).rowcount == 1
+        if not finished:
+            logger.warning(f"Job {job_id}: lease lost before it finished, result dropped")
+        # A repository's next job may have been waiting for this one
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    def run_one(self):
+        """Claim and run one job; False if none was ready."""
+        job = self.claim()
+        if job is None:
+            return False
+        logger.info(f"Job {job['id']} started: {job['repo_path']}")
+        started = time.perf_counter()
+        done = threading.Event()
+
+        def beat():
+            while not done.wait(self.lease_seconds / 3):
+                if not self.heartbeat(job["id"]):
+                    logger.warning(f"Lost the lease on job {job['id']}")
+                    return
+
+        heartbeat = threading.Thread(target=beat, daemon=True)
+        heartbeat.start()
+        try:
+            result = self.runner(job, lambda stage, done=None, total=None: self._progress(job["id"], stage,
+                                                                                          done, total))
+        except Exception as e:
+            logger.exception(f"Job {job['id']} failed")
+            self._finish(job["id"], "failed", error=str(e))
+        else:
+            self._finish(job["id"], "done", result=result)
+            logger.info(f"Job {job['id']} done in {time.perf_counter() - started:.1f} s")
+        finally:
+            done.set()
+            heartbeat.join()
+        return True
+
+    def _work(self):
+        while not self._stop.is_set():
+            if self.run_one():
+                continue
+            with self._wakeup:
+                self._wakeup.wait(self.poll_interval)
+
+
+def run_generation(job, progress, output_dir="output"):
+    """
+    Document a repository the way the app's Generate button does (job options:
+    refresh to re-parse, bottom_up for summaries). Returns the repository key, the
+    documentation file per entry point and the LLM call counts.
+
+    The repository's artifacts are referenced in the storage manager while the job
+    runs; afterwards the configured quota and cold compression are applied.
+    """
+    storage = StorageManager.from_env(output_dir)
+    try:
+        with storage.using(repo_key(job["repo_path"])):
+            result = _generate(job, progress, output_dir)
+        storage.maintain()
+        return result
+    finally:
+        storage.close()
+
+
+def _generate(job, progress, output_dir):
+    from llm.chain_setup import get_chain
+
+    repo_path, options = job["repo_path"], job["options"]
+    dependency_graph_path = dependency_graph_path_for(repo_path, output_dir)
+    os.makedirs(os.path.dirname(dependency_graph_path), exist_ok=True)
+    if options.get("refresh") or not os.path.exists(dependency_graph_path):
+        progress("Understanding repository structure")
+        BuildGraph(repo_path=repo_path, dependency_graph_path=dependency_graph_path)
+
+    progress("Finding entry points")
+    graph = load_graph(dependency_graph_path)
+    entry_points = find_entrypoints(graph)
+    chain = get_chain(repo_context=repo_overview(graph))
+
+    summaries = None
+    if options.get("bottom_up"):
+        from llm.chain_setup import get_summary_chains
+        from docgen.summaries import SummaryCache, build_summaries
+
+        progress("Summarizing components bottom-up")
+        summary_chain, module_chain = get_summary_chains()
+        # Only components some entry point documents need a summary
+        index = ReachabilityIndex.from_components(graph)
+        ids = {comp["id"] for entry_point in entry_points for comp in retrieve(graph, entry_point, index)}
+        summaries = build_summaries(graph, summary_chain, module_chain,
+                                    cache=SummaryCache(f"{output_dir}/summaries/summaries.json"), ids=ids)
+
+    documentation_dir = os.path.join(output_dir, "documentation", repo_key(repo_path))
+    doc_cache = DocCache()
+    part_store = DocStore(doc_store_path_for(output_dir), repo=repo_key(repo_path))
+    try:
+        part_store.mark_dirty(graph)
+        outputs = []
+        for i, entry_point in enumerate(entry_points):
+            progress(f"Generating documentation for {entry_point}", done=i, total=len(entry_points))
+            final_docs = generate_docs(entry_point, graph, chain, [], list(graph.keys()), [], [],
+                                       doc_cache=doc_cache, part_store=part_store, summaries=summaries)
+            part_store.save()
+            part_store.save_entry_point(entry_point, final_docs or [])
+            output_file = save_documentation(final_docs or [], documentation_path_for(entry_point, documentation_dir))
+            outputs.append([entry_point, str(output_file)])
+        progress("Done", done=len(entry_points), total=len(entry_points))
+        return {"repo": repo_key(repo_path), "entry_points": outputs, "llm_calls": doc_cache.generated,
+                "deduplicated": doc_cache.deduplicated, "reused": part_store.reused}
+    finally:
+        part_store.close()
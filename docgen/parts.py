@@ -0,0 +1,86 @@
+import os
+import json
+import threading
+
+# Hash of the exact source a documentation part was generated from: the changeset's
+# content hash, so graph diffs and part stores always agree on what changed
+from utils.graph_diff import content_hash as source_hash
+
+
+def reverse_edges(graph):
+    """Map every component to the components that depend on it."""
+    dependents = {comp_id: set() for comp_id in graph}
+    for comp_id, comp in graph.items():
+        for dep in comp["depends_on"]:
+            if dep in dependents:
+                dependents[dep].add(comp_id)
+    return dependents
+
+
+class PartStore:
+    """
+    Generated documentation parts of one repository, persisted per component
+    together with the source hash they were generated from.
+
+    Call mark_dirty(graph) before generating: components whose source changed since
+    their part was stored and their direct dependents are regenerated, every other
+    component reuses its stored part. Components without a stored part (never
+    documented, an unreadable answer, skipped by a budget) are simply generated;
+    they do not invalidate their dependents.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.parts = {}
+        self.dirty = set()
+        self.reused = 0
+        self.regenerated = 0
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.parts = json.load(f)
+
+    def stored_hashes(self):
+        """Component ID -> source hash of every stored part."""
+        return {comp_id: part["source_hash"] for comp_id, part in self.parts.items()}
+
+    def changed(self, graph):
+        """Components whose stored part was generated from a different source."""
+        stored = self.stored_hashes()
+        return {
+            comp_id for comp_id, comp in graph.items()
+            if comp_id in stored and stored[comp_id] != source_hash(comp)
+        }
+
+    def mark_dirty(self, graph):
+        changed = self.changed(graph)
+        dependents = reverse_edges(graph)
+        self.dirty = set(changed)
+        for comp_id in changed:
+            self.dirty.update(dependents[comp_id])
+        return self.dirty
+
+    def get(self, comp_id, component):
+        if comp_id in self.dirty:
+            return None
+        with self._lock:
+            stored = self.parts.get(comp_id)
+            if stored is None or stored["source_hash"] != source_hash(component):
+                return None
+            self.reused += 1
+            return dict(stored["output"])
+
+    def put(self, comp_id, component, output):
+        with self._lock:
+            self.regenerated += 1
+            self.parts[comp_id] = {"source_hash": source_hash(component), "output": dict(output)}
+            # Regenerated once per run, later entry points reuse it
+            self.dirty.discard(comp_id)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.parts, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,70 @@
+import os
+import json
+import shutil
+import hashlib
+from pathlib import Path
+
+KNOWLEDGE_BASE = "knowledge_base"
+
+
+def _short_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:8]
+
+
+def repo_dir_name(repo):
+    """
+    Directory name used for a repository link or a local path: its last segment plus
+    a short hash of the whole link (absolute path), so that org-a/src and org-b/src
+    get different clones and artifacts.
+    """
+    repo = repo.rstrip("/")
+    name = repo.split("/")[-1]
+    if "://" in repo or repo.startswith("git@"):
+        name = name.split(".")[0]
+        source = repo[:-len(".git")] if repo.endswith(".git") else repo
+    else:
+        source = os.path.abspath(repo)
+    return f"{name}-{_short_hash(source)}"
+
+
+def clone_repository(repo_url, clone_dir):
+    """Clone repo_url into clone_dir, replacing any previous clone."""
+    from git import Repo
+
+    if os.path.exists(clone_dir):
+        shutil.rmtree(clone_dir)
+    Repo.clone_from(repo_url, clone_dir)
+    return clone_dir
+
+
+def dependency_graph_path_for(repo_path, output_dir="output", knowledge_base=KNOWLEDGE_BASE):
+    return f"{output_dir}/dependency_graphs/dependency_graph_{repo_key(repo_path, knowledge_base)}.json"
+
+
+def repo_key(repo_path, knowledge_base=KNOWLEDGE_BASE):
+    """
+    Name a repository's artifacts (graph, documentation, site, stored parts, storage
+    accounting) are kept under. Clones and uploads directly under the knowledge base
+    are already named uniquely (repo_dir_name) and keep their directory name; any
+    other path gets repo_dir_name, so two checkouts called src do not collide.
+    """
+    repo_path = repo_path.rstrip("/")
+    if os.path.dirname(os.path.abspath(repo_path)) == os.path.abspath(knowledge_base):
+        return os.path.basename(repo_path)
+    return repo_dir_name(repo_path)
+
+
+def doc_store_path_for(output_dir="output"):
+    return f"{output_dir}/documentation/docs.sqlite3"
+
+
+def documentation_path_for(entry_point, documentation_dir="output/documentation"):
+    safe_name = entry_point.replace(".", "_").replace(" ", "_")
+    return Path(f"{documentation_dir}/documentation_{safe_name}.json")
+
+
+def save_documentation(final_docs, output_file):
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    with open(output_file, "w", encoding="utf-8", errors="ignore") as f:
+        f.write(json.dumps(final_docs))
+    return output_file
@@ -0,0 +1,338 @@
+"""
+Pipelined parse -> resolve -> generate executor.
+
+Instead of parsing the whole repository, writing and re-reading the dependency
+graph and only then calling the LLM, three stages run at the same time:
+
+  - parse:    one thread walks the repository file by file (DependencyParser.iter_parsed_files)
+  - resolve:  one thread filters each component's dependencies as soon as every module
+              it refers to has been parsed, and releases it once its dependencies are
+              documented
+  - generate: a pool of workers sends released components to the LLM
+
+Stages are connected by bounded queues: when the LLM falls behind, the ready queue
+fills up, the resolver blocks and the parser stops after max_parsed_files files
+that the resolver has not consumed, so memory stays bounded. Cycles can only be
+recognized once everything is parsed; they are then released one SCC level at a
+time (utils.toposort.build_work_plan) and their members are documented without
+each other's documentation.
+
+Total wall time approaches max(parse, generate) instead of their sum. The
+returned PipelineStats report per-component latency and stage utilization.
+"""
+
+import time
+import queue
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from utils.parser import DependencyParser, CodeComponent
+from utils.toposort import build_work_plan
+from docgen.generator import _invoke_chain, _lookup, _remember
+from docgen.parts import source_hash
+
+logger = logging.getLogger("docstring_generator")
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+@dataclass
+class PipelineStats:
+    workers: int
+    wall_s: float = 0.0
+    parse_busy_s: float = 0.0
+    resolve_busy_s: float = 0.0
+    generate_busy_s: float = 0.0
+    files: int = 0
+    components: int = 0
+    generated: int = 0
+    cycle_releases: int = 0
+    first_doc_s: Optional[float] = None
+    latencies: List[float] = field(default_factory=list)
+
+    def stats(self):
+        """Summary for logs and run reports. Latency runs from the moment a component's
+        file was parsed to the moment its documentation was ready."""
+        wall = self.wall_s or 1e-9
+        return {
+            "wall_s": round(self.wall_s, 3),
+            "sequential_estimate_s": round(self.parse_busy_s + self.generate_busy_s / self.workers, 3),
+            "files": self.files,
+            "components": self.components,
+            "generated": self.generated,
+            "cycle_releases": self.cycle_releases,
+            "first_doc_s": round(self.first_doc_s, 3) if self.first_doc_s is not None else None,
+            "latency_p50_s": round(_percentile(self.latencies, 0.5), 3),
+            "latency_p95_s": round(_percentile(self.latencies, 0.95), 3),
+            "latency_max_s": round(max(self.latencies, default=0.0), 3),
+            "utilization": {
+                "parse": round(self.parse_busy_s / wall, 3),
+                "resolve": round(self.resolve_busy_s / wall, 3),
+                "generate": round(self.generate_busy_s / (wall * self.workers), 3),
+            },
+        }
+
+
+class PipelinedGenerator:
+    """
+    Parses a repository and documents every component in one overlapped pass.
+
+    Args:
+        repo_path: Repository to parse
+        chain: Documentation chain (llm.chain_setup.get_chain)
+        max_workers: Concurrent LLM calls
+        ready_queue_size: Released components waiting for a worker
+        max_parsed_files: Parsed files the resolver may lag behind the parser
+        doc_cache: Optional docgen.dedup.DocCache shared with the rest of the run
+        part_store: Optional docgen.parts.PartStore; unchanged components whose direct
+                    dependencies did not change either reuse their stored part
+    """
+
+    def __init__(self, repo_path, chain, max_workers=4, ready_queue_size=None, max_parsed_files=8,
+                 doc_cache=None, part_store=None):
+        self.parser = DependencyParser(repo_path)
+        self.chain = chain
+        self.max_workers = max_workers
+        self.doc_cache = doc_cache
+        self.part_store = part_store
+        self.stats = PipelineStats(workers=max_workers)
+
+        self.graph: Dict[str, dict] = {}
+        self.outputs: Dict[str, dict] = {}
+
+        # Events for the resolver: ("file", module_path, components, parsed_at),
+        # ("done", comp_id, None, None) and ("parsed", None, None, None)
+        self._inbox = queue.Queue()
+        self._file_slots = threading.BoundedSemaphore(max_parsed_files)
+        self._ready = queue.Queue(maxsize=ready_queue_size or 2 * max_workers)
+        self._stats_lock = threading.Lock()
+        self._errors = []
+
+        # Resolver state
+        self._known = {}                # comp_id -> ParsedComponent of every parsed component
+        self._parsed_modules = set()
+        self._waiting_on_module = {}    # module -> components waiting for it to be parsed
+        self._unparsed_count = {}       # comp_id -> number of modules still to be parsed
+        self._parsed_at = {}            # comp_id -> time its file was parsed
+        self._missing = {}              # comp_id -> number of undocumented dependencies
+        self._dependents = {}           # comp_id -> released-pending components waiting on it
+        self._done = set()
+        self._changed = set()
+        self._stored_hashes = part_store.stored_hashes() if part_store is not None else {}
+        self._in_flight = 0
+        self._started = 0.0
+
+    # Parse stage
+
+    def _parse(self):
+        started = time.perf_counter()
+        waited = 0.0
+        try:
+            for module_path, components in self.parser.iter_parsed_files():
+                # Blocks while the resolver lags max_parsed_files files behind
+                t0 = time.perf_counter()
+                self._file_slots.acquire()
+                waited += time.perf_counter() - t0
+                self._inbox.put(("file", module_path, components, time.perf_counter()))
+        except Exception as e:
+            logger.exception("Pipelined parse failed")
+            self._errors.append(e)
+        finally:
+            self.stats.parse_busy_s = time.perf_counter() - started - waited
+            self._inbox.put(("parsed", None, None, None))
+
+    # Resolve stage
+
+    def _modules_for(self, dep):
+        """Repository modules that may define dep (every dotted prefix that is a module)."""
+        parts = dep.split(".")
+        prefixes = (".".join(parts[:end]) for end in range(1, len(parts) + 1))
+        return {module for module in prefixes if module in self.parser.modules}
+
+    def _keep(self, dep):
+        # Same filter as DependencyParser._resolve_dependencies
+        return dep in self._known or dep.split(".", 1)[0] in self.parser.modules
+
+    def _add_file(self, module_path, components, parsed_at):
+        self.stats.files += 1
+        for component in components:
+            self._known[component.id] = component
+            self._parsed_at[component.id] = parsed_at
+        self._parsed_modules.add(module_path)
+
+        for component in components:
+            pending = set()
+            for dep in component.depends_on:
+                pending.update(self._modules_for(dep))
+            pending -= self._parsed_modules
+            if not pending:
+                self._resolve(component.id)
+                continue
+            self._unparsed_count[component.id] = len(pending)
+            for module in pending:
+                self._waiting_on_module.setdefault(module, []).append(component.id)
+
+        for comp_id in self._waiting_on_module.pop(module_path, []):
+            self._unparsed_count[comp_id] -= 1
+            if self._unparsed_count[comp_id] == 0:
+                del self._unparsed_count[comp_id]
+                self._resolve(comp_id)
+
+    def _resolve(self, comp_id):
+        """All modules the component refers to are parsed: fix its dependencies."""
+        record = self._known[comp_id]
+        component = record.freeze().to_dict()
+        component["depends_on"] = sorted(dep for dep in record.depends_on if self._keep(dep))
+        self.graph[comp_id] = component
+        self.stats.components += 1
+        stored_hash = self._stored_hashes.get(comp_id)
+        if stored_hash is not None and stored_hash != source_hash(component):
+            self._changed.add(comp_id)
+
+        waiting_on = {dep for dep in component["depends_on"]
+                      if dep in self._known and dep != comp_id and dep not in self._done}
+        if not waiting_on:
+            self._release(comp_id)
+            return
+        self._missing[comp_id] = len(waiting_on)
+        for dep in waiting_on:
+            self._dependents.setdefault(dep, []).append(comp_id)
+
+    def _complete(self, comp_id):
+        self._in_flight -= 1
+        self._done.add(comp_id)
+        for dependent in self._dependents.pop(comp_id, []):
+            if dependent not in self._missing:
+                continue  # Already released as part of a cycle
+            self._missing[dependent] -= 1
+            if self._missing[dependent] == 0:
+                del self._missing[dependent]
+                self._release(dependent)
+
+    def _release_cycles(self):
+        """Everything is parsed and nothing is in flight, yet components are still
+        waiting: release the lowest level of the remaining SCC-condensed graph."""
+        remaining = {
+            comp_id: {dep for dep in self.graph[comp_id]["depends_on"] if dep in self._missing}
+            for comp_id in self._missing
+        }
+        plan = build_work_plan(remaining)
+        for unit in plan.levels[0]:
+            self.stats.cycle_releases += 1
+            for comp_id in unit:
+                del self._missing[comp_id]
+                self._release(comp_id)
+
+    def _release(self, comp_id):
+        self._in_flight += 1
+        t0 = time.perf_counter()
+        self._ready.put(comp_id)
+        # Time spent blocked on a full ready queue is backpressure, not work
+        self.stats.resolve_busy_s -= time.perf_counter() - t0
+
+    def _run_resolver(self):
+        parsing = True
+        while True:
+            if not parsing and self._in_flight == 0:
+                if not self._missing:
+                    break
+                t0 = time.perf_counter()
+                self._release_cycles()
+                self.stats.resolve_busy_s += time.perf_counter() - t0
+                continue
+            kind, value, components, parsed_at = self._inbox.get()
+            t0 = time.perf_counter()
+            if kind == "file":
+                self._add_file(value, components, parsed_at)
+                self._file_slots.release()
+            elif kind == "done":
+                self._complete(value)
+            else:
+                parsing = False
+            self.stats.resolve_busy_s += time.perf_counter() - t0
+
+        for _ in range(self.max_workers):
+            self._ready.put(None)
+
+    # Generate stage
+
+    def _generate(self, comp_id):
+        component = self.graph[comp_id]
+        if self.part_store is not None and any(dep in self._changed for dep in component["depends_on"]):
+            # Mirrors PartStore.mark_dirty: a changed dependency invalidates the stored part
+            self.part_store.dirty.add(comp_id)
+        output = _lookup(comp_id, component, self.doc_cache, self.part_store)
+        if output is None:
+            prev_docs = "\n\n".join(
+                self.outputs[dep]["content"].strip() for dep in component["depends_on"]
+                if dep in self.outputs and self.outputs[dep].get("content")
+            )
+            output = _invoke_chain(self.chain, component, prev_docs)
+            _remember(comp_id, component, output, self.doc_cache, self.part_store)
+            with self._stats_lock:
+                self.stats.generated += 1
+        if isinstance(output, dict) and "content" in output:
+            output["component_id"] = comp_id
+            output["file_path"] = component['file_path']
+            output["start_line"] = component['start_line']
+            output["end_line"] = component['end_line']
+            self.outputs[comp_id] = output
+        else:
+            print(f"Error reading documentation output for {comp_id} - {output}")
+
+    def _worker(self):
+        while True:
+            comp_id = self._ready.get()
+            if comp_id is None:
+                return
+            t0 = time.perf_counter()
+            try:
+                self._generate(comp_id)
+            except Exception as e:
+                logger.exception(f"Failed to document {comp_id}")
+                self._errors.append(e)
+            finished = time.perf_counter()
+            with self._stats_lock:
+                self.stats.generate_busy_s += finished - t0
+                self.stats.latencies.append(finished - self._parsed_at[comp_id])
+                if self.stats.first_doc_s is None:
+                    self.stats.first_doc_s = finished - self._started
+            self._inbox.put(("done", comp_id, None, None))
+
+    def run(self, dependency_graph_path=None):
+        """Run all stages to completion and optionally save the dependency graph.
+
+        Returns (graph, outputs): the serialized dependency graph, as load_graph
+        would return it, and the generated parts by component ID.
+        """
+        self._started = time.perf_counter()
+        workers = [threading.Thread(target=self._worker, name=f"pipeline-generate-{i}", daemon=True)
+                   for i in range(self.max_workers)]
+        for worker in workers:
+            worker.start()
+
+        parse_thread = threading.Thread(target=self._parse, name="pipeline-parse", daemon=True)
+        parse_thread.start()
+        self._run_resolver()
+        parse_thread.join()
+        for worker in workers:
+            worker.join()
+
+        self.stats.wall_s = time.perf_counter() - self._started
+        if self._errors:
+            raise self._errors[0]
+        logger.info(f"Pipelined generation stats: {self.stats.stats()}")
+
+        if dependency_graph_path:
+            self.parser.components = {
+                comp_id: CodeComponent.from_dict(component) for comp_id, component in self.graph.items()
+            }
+            self.parser.save_dependency_graph(dependency_graph_path)
+        return self.graph, self.outputs
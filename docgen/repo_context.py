@@ -0,0 +1,43 @@
+"""
+Repository-level context for the static prefix of documentation prompts.
+
+The overview lists every module with its classes (and their methods) and
+functions. It is rendered deterministically (sorted, bounded) from the dependency
+graph, so every prompt of a repository starts with byte-identical text that
+providers can serve from their prompt cache; it only changes when modules or
+names change.
+"""
+
+# Upper bound in characters (roughly 4 per token): enough to clear the minimum
+# cacheable prefix of the providers without dominating the prompt
+REPO_CONTEXT_CHARS = 6000
+
+
+def repo_overview(graph, max_chars=REPO_CONTEXT_CHARS):
+    """One line per module: `relative/path.py: ClassA(method, ...), func_b, ...`."""
+    modules = {}
+    methods = {}
+    for comp_id, comp in graph.items():
+        names = modules.setdefault(comp["relative_path"], set())
+        if comp["component_type"] in ("class", "function"):
+            names.add(comp_id)
+        elif comp["component_type"] == "method":
+            class_id, method = comp_id.rsplit(".", 1)
+            methods.setdefault(class_id, set()).add(method)
+
+    lines = []
+    used = 0
+    for relative_path in sorted(modules):
+        names = []
+        for comp_id in sorted(modules[relative_path]):
+            name = comp_id.rsplit(".", 1)[-1]
+            if comp_id in methods:
+                name = f"{name}({', '.join(sorted(methods[comp_id]))})"
+            names.append(name)
+        line = f"{relative_path}: {', '.join(names)}" if names else relative_path
+        if used + len(line) + 1 > max_chars:
+            lines.append(f"... and {len(modules) - len(lines)} more modules")
+            break
+        lines.append(line)
+        used += len(line) + 1
+    return "\n".join(lines)
@@ -1,4 +1,15 @@
-def retrieve(graph,entry_point_id):
+def retrieve(graph, entry_point_id, index=None):
+    """Return the entry point and every component it depends on.
+
+    With a utils.reachability.ReachabilityIndex built once for the graph the closure
+    is read from the index, in the same order, instead of being recomputed by a DFS
+    on every call.
+    """
+    if index is not None:
+        if entry_point_id not in index:
+            return []
+        return [graph[comp_id] for comp_id in index.closure(entry_point_id, include_self=True)]
+
     expanded = []
     seen = set()
     
@@ -12,4 +23,4 @@ def retrieve(graph,entry_point_id):
 
     add_with_deps(entry_point_id)
 
-    return expanded
\ No newline at end of file
+    return expanded
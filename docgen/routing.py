@@ -0,0 +1,186 @@
+"""
+Complexity-aware model routing.
+
+Documenting a one-line constant and a 400-line class with the same model wastes
+either money or quality. Every component gets metrics (ComponentMetrics): its
+line count, cyclomatic complexity (measured by utils.parser while collecting
+components), fan-in / fan-out in the dependency graph and estimated source
+tokens. A RoutingPolicy maps them to a tier:
+
+- "template": trivial components (short assignments that refer to nothing in the
+  repository, short functions that already have a docstring) are documented from
+  a local template, without any LLM call
+- "cheap":    small, simple components that few others depend on
+- "strong":   everything else
+
+ModelRouter holds one documentation chain per LLM tier and is passed wherever a
+chain is expected; docgen.generator._invoke_chain asks it for the component's
+tier. routing_configs gives each tier its own ProviderConfig pool, so each has
+its own pooled client and concurrency limit and slow strong calls do not hold
+up cheap ones.
+"""
+
+import ast
+import inspect
+import textwrap
+import threading
+from dataclasses import dataclass, field, replace
+from typing import Dict, NamedTuple, Optional
+
+from llm.context_cache import estimate_tokens
+from utils.parser import cyclomatic_complexity
+
+TIERS = ("template", "cheap", "strong")
+LLM_TIERS = ("cheap", "strong")
+
+# Cheap model per provider when none is given (otherwise the configured model is used
+# for both tiers, still with separate pools)
+CHEAP_MODELS = {"gemini": "gemini-2.0-flash-lite"}
+
+
+class ComponentMetrics(NamedTuple):
+    lines: int
+    complexity: int
+    fan_in: int
+    fan_out: int
+    tokens: int
+
+
+def _source_complexity(source):
+    """Cyclomatic complexity from source, for graphs saved before the parser recorded it."""
+    try:
+        return cyclomatic_complexity(ast.parse(textwrap.dedent(source or "")))
+    except SyntaxError:
+        return 1
+
+
+def _metrics(component, fan_in):
+    return ComponentMetrics(
+        lines=component["end_line"] - component["start_line"] + 1,
+        complexity=component.get("complexity") or _source_complexity(component["source_code"]),
+        fan_in=fan_in,
+        fan_out=len(component["depends_on"]),
+        tokens=estimate_tokens(component["source_code"] or ""),
+    )
+
+
+def component_metrics(graph):
+    """ComponentMetrics of every component of the serialized graph."""
+    fan_in = dict.fromkeys(graph, 0)
+    for comp in graph.values():
+        for dep in set(comp["depends_on"]):
+            if dep in fan_in:
+                fan_in[dep] += 1
+    return {comp_id: _metrics(comp, fan_in[comp_id]) for comp_id, comp in graph.items()}
+
+
+@dataclass(frozen=True)
+class RoutingPolicy:
+    """
+    Thresholds of the tiers. A component goes to the cheap tier only if it is within
+    all cheap_* limits; components with more than cheap_max_fan_in dependents are
+    central enough to always get the strong model.
+    """
+    template_max_lines: int = 3
+    cheap_max_tokens: int = 400
+    cheap_max_complexity: int = 5
+    cheap_max_fan_in: int = 10
+
+    def route(self, component, metrics):
+        if metrics.complexity <= 1 and metrics.fan_out == 0:
+            if component["component_type"] == "assignment" and metrics.lines <= self.template_max_lines:
+                return "template"
+            if component["component_type"] in ("function", "method") and component.get("has_docstring"):
+                docstring_lines = len(component["docstring"].splitlines()) or 1
+                if metrics.lines - docstring_lines <= self.template_max_lines:
+                    return "template"
+        if (metrics.tokens <= self.cheap_max_tokens and metrics.complexity <= self.cheap_max_complexity
+                and metrics.fan_in <= self.cheap_max_fan_in):
+            return "cheap"
+        return "strong"
+
+
+def template_doc(component):
+    """Documentation of a trivial component, in the same {"code", "content"} form as the LLM's."""
+    owner, _, name = component["id"].rpartition(".")
+    source = (component["source_code"] or "").strip()
+    if component["component_type"] == "assignment":
+        content = f"`{name}` is a module-level assignment in `{owner}`:\n\n```python\n{source}\n```"
+    else:
+        kind = "Method of the class" if component["component_type"] == "method" else "Function in the module"
+        content = f"`{name}`: {kind} `{owner}`.\n\n{inspect.cleandoc(component['docstring'])}"
+    return {"code": source, "content": content}
+
+
+@dataclass
+class RoutingStats:
+    components: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(TIERS, 0))
+    llm_seconds: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(LLM_TIERS, 0.0))
+
+    def stats(self):
+        total = sum(self.components.values())
+        stats = {"components": total}
+        for tier in TIERS:
+            count = self.components[tier]
+            stats[tier] = {"components": count, "share": round(count / total, 4) if total else 0.0}
+            if tier in self.llm_seconds:
+                stats[tier]["llm_s"] = round(self.llm_seconds[tier], 3)
+                stats[tier]["avg_s"] = round(self.llm_seconds[tier] / count, 3) if count else 0.0
+        return stats
+
+
+class ModelRouter:
+    """
+    Stands in for a documentation chain and picks one per component.
+
+    Args:
+        graph: Serialized dependency graph (for fan-in); components that are not in
+            it (e.g. while docgen.pipelined is still parsing) are measured on their own
+        chains: {"cheap": chain, "strong": chain}
+        policy: RoutingPolicy (defaults if None)
+    """
+
+    def __init__(self, graph, chains, policy: Optional[RoutingPolicy] = None):
+        self.chains = chains
+        self.policy = policy or RoutingPolicy()
+        self.metrics = component_metrics(graph or {})
+        self.stats = RoutingStats()
+        self._lock = threading.Lock()
+
+    def route(self, component):
+        """Tier of a component (counted in stats)."""
+        metrics = self.metrics.get(component["id"]) or _metrics(component, 0)
+        tier = self.policy.route(component, metrics)
+        with self._lock:
+            self.stats.components[tier] += 1
+        return tier
+
+    def template(self, component):
+        return template_doc(component)
+
+    def observe(self, tier, seconds):
+        with self._lock:
+            self.stats.llm_seconds[tier] += seconds
+
+
+def routing_configs(config, cheap_model=None, strong_model=None, cheap_concurrency=None, strong_concurrency=None):
+    """
+    {"cheap": ProviderConfig, "strong": ProviderConfig} derived from config. The
+    strong tier defaults to the configured model, the cheap tier to CHEAP_MODELS;
+    both default to config's concurrency limit, each in its own pool.
+    """
+    cheap_model = cheap_model or CHEAP_MODELS.get(config.provider, config.model)
+    return {
+        "cheap": replace(config, model=cheap_model, pool="cheap",
+                         max_concurrency=cheap_concurrency or config.max_concurrency),
+        "strong": replace(config, model=strong_model or config.model, pool="strong",
+                          max_concurrency=strong_concurrency or config.max_concurrency),
+    }
+
+
+def build_router(graph, configs, repo_context=None, policy=None):
+    """ModelRouter with a documentation chain (llm.chain_setup.get_chain) per routing_configs entry."""
+    from llm.chain_setup import get_chain
+
+    chains = {tier: get_chain(config, repo_context=repo_context) for tier, config in configs.items()}
+    return ModelRouter(graph, chains, policy)
@@ -0,0 +1,428 @@
+"""
+Static documentation site built from the stored documentation parts.
+
+Every page is described by a job: a small dict holding everything the page is
+rendered from (content, links, source ranges, file stamps). The SHA-1 of the job
+is the page's content hash, and the manifest written next to the site maps page
+paths to those hashes, so a rebuild renders only pages whose inputs changed and
+deletes pages that disappeared. Changed pages are rendered on a process pool.
+
+The manifest also keeps a signature of every documented component (its stored
+documentation, source, location and edges) and the stamp of every source file.
+A rebuild only plans the pages of components whose signature changed, of the
+neighbours of components that gained or lost their documentation (their links
+change), and of the modules and source files involved; every other page keeps
+its hash from the manifest.
+
+Pages (HTML, or Markdown with fmt="markdown"):
+  - index:             entry points and modules
+  - entry/<id>:        an entry point's components in generation order
+  - modules/<path>:    the documented components of one file
+  - components/<id>:   documentation, highlighted source range, links to the
+                       component's dependencies, dependents and source file
+  - source/<path>:     the whole highlighted file with line anchors
+"""
+
+import os
+import json
+import html
+import time
+import hashlib
+import logging
+import multiprocessing
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+
+from docgen.parts import reverse_edges
+
+logger = logging.getLogger("docstring_generator")
+
+SITE_VERSION = 1
+SITE_FORMATS = ("html", "markdown")
+MANIFEST = "manifest.json"
+
+# Fewer changed pages than this are rendered in-process: the pool would cost more
+PARALLEL_MIN_PAGES = 200
+CHUNK_SIZE = 64
+
+STYLE = """
+body { font-family: -apple-system, Segoe UI, Helvetica, Arial, sans-serif; max-width: 960px;
+       margin: 2rem auto; padding: 0 1rem; color: #1f2328; line-height: 1.5; }
+nav { margin-bottom: 1rem; font-size: 0.9rem; }
+a { color: #0b5cad; text-decoration: none; }
+a:hover { text-decoration: underline; }
+.meta { color: #59636e; }
+pre { overflow-x: auto; background: #f6f8fa; padding: 0.75rem; border-radius: 6px; }
+.highlight .hll { background: #fff3b0; }
+ul.links { columns: 2; }
+"""
+
+
+@dataclass
+class SiteStats:
+    pages: int = 0
+    rendered: int = 0
+    removed: int = 0
+    seconds: float = 0.0
+
+    def stats(self):
+        return {"pages": self.pages, "rendered": self.rendered, "removed": self.removed,
+                "seconds": round(self.seconds, 3)}
+
+
+def _ext(fmt):
+    return "html" if fmt == "html" else "md"
+
+
+def _link(from_path, to_path):
+    """Relative link between two site-root-relative page paths (posixpath.relpath
+    is far too slow for the millions of links of a large site)."""
+    directory = from_path.rpartition("/")[0]
+    if directory and to_path.startswith(directory + "/") and "/" not in to_path[len(directory) + 1:]:
+        return to_path[len(directory) + 1:]
+    return "../" * from_path.count("/") + to_path
+
+
+def _job_hash(job):
+    # Jobs are built in a fixed key order, so repr is a stable (and fast) serialization
+    return hashlib.sha1(f"{SITE_VERSION}:{job!r}".encode("utf-8")).hexdigest()
+
+
+def _signature(comp, part, dependents):
+    """Hash of everything a component's page is made of, except whether its neighbours are documented."""
+    key = "\0".join((part.get("content") or "", comp["component_type"], comp["source_code"] or "",
+                     comp["relative_path"], str(comp["start_line"]), str(comp["end_line"]),
+                     " ".join(sorted(comp["depends_on"])), " ".join(sorted(dependents))))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def _file_stamp(file_path):
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def plan_site(graph, parts, entry_points, fmt="html", title="Documentation", components=None, modules=None,
+              dependents=None):
+    """{page path: job} for the documented components of graph (parts: stored parts
+    as from DocStore.all_parts, entry_points: {entry point: ordered component IDs}).
+
+    components and modules restrict the component pages, and the module and source
+    pages (by relative path), that are planned; the files of planned components are
+    always included, as are the index, entry point and style pages. dependents:
+    docgen.parts.reverse_edges of graph, if already computed."""
+    ext = _ext(fmt)
+    documented = {part["component_id"]: part for part in parts if part["component_id"] in graph}
+    if dependents is None:
+        dependents = reverse_edges(graph)
+
+    files = {}
+    for comp_id in documented:
+        comp = graph[comp_id]
+        files.setdefault(comp["relative_path"], {"file_path": comp["file_path"], "components": []})
+        files[comp["relative_path"]]["components"].append(comp_id)
+
+    planned = documented if components is None else {c: documented[c] for c in components if c in documented}
+    if modules is None and components is None:
+        planned_files = files
+    else:
+        modules = set(modules or ()) | {graph[comp_id]["relative_path"] for comp_id in planned}
+        planned_files = {relative_path: files[relative_path] for relative_path in modules if relative_path in files}
+
+    jobs = {}
+    source_path = {}
+    for relative_path, info in planned_files.items():
+        path = f"source/{relative_path}.{ext}"
+        stamp = _file_stamp(info["file_path"])
+        if stamp is None:
+            continue
+        source_path[relative_path] = path
+        jobs[path] = {
+            "kind": "source", "fmt": fmt, "path": path, "title": relative_path,
+            "file_path": info["file_path"], "stamp": stamp,
+            "anchors": sorted({graph[comp_id]["start_line"] for comp_id in info["components"]}),
+            "index": _link(path, f"index.{ext}"),
+        }
+
+    # Links to components are (ID, documented) pairs; hrefs are made when rendering
+    def links(ids):
+        return [(comp_id, comp_id in documented) for comp_id in ids]
+
+    for comp_id, part in planned.items():
+        comp = graph[comp_id]
+        path = f"components/{comp_id}.{ext}"
+        source = source_path.get(comp["relative_path"])
+        jobs[path] = {
+            "kind": "component", "fmt": fmt, "path": path, "title": comp_id,
+            "component_type": comp["component_type"], "content": part.get("content") or "",
+            "source_code": comp["source_code"], "relative_path": comp["relative_path"],
+            "start_line": comp["start_line"], "end_line": comp["end_line"],
+            "source": f"{_link(path, source)}#L-{comp['start_line']}" if source else None,
+            "module": _link(path, f"modules/{comp['relative_path']}.{ext}"),
+            "depends_on": links(sorted(comp["depends_on"])),
+            "used_by": links(sorted(dependents.get(comp_id, ()))),
+            "index": _link(path, f"index.{ext}"),
+        }
+
+    for relative_path, info in planned_files.items():
+        path = f"modules/{relative_path}.{ext}"
+        source = source_path.get(relative_path)
+        jobs[path] = {
+            "kind": "module", "fmt": fmt, "path": path, "title": relative_path,
+            "source": _link(path, source) if source else None,
+            "components": links(sorted(info["components"], key=lambda c: graph[c]["start_line"])),
+            "index": _link(path, f"index.{ext}"),
+        }
+
+    entry_paths = {}
+    for entry_point, ids in entry_points.items():
+        path = entry_paths[entry_point] = f"entry/{entry_point}.{ext}"
+        jobs[path] = {
+            "kind": "entry", "fmt": fmt, "path": path, "title": entry_point,
+            "components": links([comp_id for comp_id in ids if comp_id in documented]),
+            "index": _link(path, f"index.{ext}"),
+        }
+
+    index = f"index.{ext}"
+    jobs[index] = {
+        "kind": "index", "fmt": fmt, "path": index, "title": title,
+        "entry_points": [(entry_point, entry_paths[entry_point]) for entry_point in sorted(entry_paths)],
+        "modules": [(relative_path, f"modules/{relative_path}.{ext}") for relative_path in sorted(files)],
+    }
+    if fmt == "html":
+        from pygments.formatters.html import HtmlFormatter
+
+        css = STYLE + HtmlFormatter(cssclass="highlight").get_style_defs(".highlight")
+        jobs["style.css"] = {"kind": "style", "fmt": fmt, "path": "style.css", "css": css}
+    return jobs
+
+
+def _markdown_to_html(text):
+    try:
+        import markdown
+    except ImportError:
+        # Without the optional markdown package: paragraphs and fenced code only
+        blocks, in_code, lines = [], False, []
+        for line in text.splitlines() + [""]:
+            if line.strip().startswith("```"):
+                if in_code:
+                    blocks.append(f"<pre><code>{html.escape(chr(10).join(lines))}</code></pre>")
+                    lines = []
+                elif lines:
+                    blocks.append(f"<p>{html.escape(' '.join(lines))}</p>")
+                    lines = []
+                in_code = not in_code
+            elif not in_code and not line.strip():
+                if lines:
+                    blocks.append(f"<p>{html.escape(' '.join(lines))}</p>")
+                lines = []
+            else:
+                lines.append(line)
+        return "\n".join(blocks)
+    # Documentation comes from the LLM: raw HTML in it is shown as text, never passed through
+    md = markdown.Markdown(extensions=["fenced_code", "tables"])
+    md.preprocessors.deregister("html_block")
+    md.inlinePatterns.deregister("html")
+    return md.convert(text)
+
+
+def _highlight(code, start_line=1, line_anchors=False):
+    from pygments import highlight
+    # Not the lazy pygments.lexers / pygments.formatters attributes: their loaders are not
+    # thread-safe and sites of several repositories are rendered concurrently
+    from pygments.lexers.python import PythonLexer
+    from pygments.formatters.html import HtmlFormatter
+
+    formatter = HtmlFormatter(linenos="inline", linenostart=start_line, cssclass="highlight",
+                              lineanchors="L" if line_anchors else "", anchorlinenos=line_anchors)
+    return highlight(code, PythonLexer(), formatter)
+
+
+def _html_page(job, body):
+    index = job.get("index", "index.html")
+    css = _link(job["path"], "style.css")
+    return (f'<!doctype html>\n<html><head><meta charset="utf-8"><title>{html.escape(job["title"])}</title>'
+            f'<link rel="stylesheet" href="{css}"></head>\n<body><nav><a href="{index}">Index</a></nav>\n'
+            f'{body}\n</body></html>\n')
+
+
+def _component_links(job, items):
+    """(name, href or None) for a job's (component ID, documented) pairs."""
+    ext = _ext(job["fmt"])
+    return [(comp_id, _link(job["path"], f"components/{comp_id}.{ext}") if documented else None)
+            for comp_id, documented in items]
+
+
+def _html_links(items):
+    return "<ul class=\"links\">" + "".join(
+        f'<li><a href="{href}"><code>{html.escape(name)}</code></a></li>' if href
+        else f"<li><code>{html.escape(name)}</code></li>" for name, href in items
+    ) + "</ul>"
+
+
+def _md_links(items):
+    return "\n".join(f"- [`{name}`]({href})" if href else f"- `{name}`" for name, href in items) or "_None_"
+
+
+def render_page(job):
+    """Text of the page described by job."""
+    kind, fmt = job["kind"], job["fmt"]
+    if kind == "style":
+        return job["css"]
+
+    if kind == "source":
+        with open(job["file_path"], "r", encoding="utf-8", errors="replace") as f:
+            code = f.read()
+        if fmt == "html":
+            return _html_page(job, f"<h1>{html.escape(job['title'])}</h1>{_highlight(code, line_anchors=True)}")
+        # Markdown: the file split at every documented component, each part anchored
+        lines = code.splitlines()
+        starts = [1] + [line for line in job["anchors"] if line > 1]
+        sections = [f"[Index]({job['index']})\n\n# {job['title']}\n"]
+        for start, end in zip(starts, starts[1:] + [len(lines) + 1]):
+            sections.append(f'<a id="L-{start}"></a>\n\n```python\n' + "\n".join(lines[start - 1:end - 1]) + "\n```\n")
+        return "\n".join(sections)
+
+    if kind == "component":
+        where = f"{job['relative_path']}:{job['start_line']}–{job['end_line']}"
+        if fmt == "html":
+            source_link = f'<a href="{job["source"]}">{html.escape(where)}</a>' if job["source"] else html.escape(where)
+            body = (f"<h1><code>{html.escape(job['title'])}</code></h1>"
+                    f'<p class="meta">{html.escape(job["component_type"])} · {source_link} · '
+                    f'<a href="{job["module"]}">module</a></p>'
+                    f"<article>{_markdown_to_html(job['content'])}</article>"
+                    f"<h2>Source</h2>{_highlight(job['source_code'], job['start_line'])}"
+                    f"<h2>Depends on</h2>{_html_links(_component_links(job, job['depends_on']))}"
+                    f"<h2>Used by</h2>{_html_links(_component_links(job, job['used_by']))}")
+            return _html_page(job, body)
+        source_link = f"[{where}]({job['source']})" if job["source"] else where
+        return (f"[Index]({job['index']}) · [Module]({job['module']})\n\n# `{job['title']}`\n\n"
+                f"*{job['component_type']}* · {source_link}\n\n{job['content']}\n\n"
+                f"## Source\n\n```python\n{job['source_code']}\n```\n\n"
+                f"## Depends on\n\n{_md_links(_component_links(job, job['depends_on']))}\n\n## Used by\n\n{_md_links(_component_links(job, job['used_by']))}\n")
+
+    if kind in ("module", "entry"):
+        heading = f"Module {job['title']}" if kind == "module" else f"Entry point {job['title']}"
+        source = job.get("source")
+        items = _component_links(job, job["components"])
+        if fmt == "html":
+            source_link = f'<p><a href="{source}">Source</a></p>' if source else ""
+            return _html_page(job, f"<h1>{html.escape(heading)}</h1>{source_link}{_html_links(items)}")
+        source_link = f"[Source]({source})\n\n" if source else ""
+        return f"[Index]({job['index']})\n\n# {heading}\n\n{source_link}{_md_links(items)}\n"
+
+    if kind == "index":
+        if fmt == "html":
+            return _html_page(job, f"<h1>{html.escape(job['title'])}</h1>"
+                                   f"<h2>Entry points</h2>{_html_links(job['entry_points'])}"
+                                   f"<h2>Modules</h2>{_html_links(job['modules'])}")
+        return (f"# {job['title']}\n\n## Entry points\n\n{_md_links(job['entry_points'])}\n\n"
+                f"## Modules\n\n{_md_links(job['modules'])}\n")
+    raise ValueError(f"Unknown page kind '{kind}'")
+
+
+def _write_pages(site_dir, jobs):
+    """Runs in the worker processes."""
+    for job in jobs:
+        path = os.path.join(site_dir, job["path"])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(render_page(job))
+    return len(jobs)
+
+
+def build_site(graph, doc_store, site_dir, fmt="html", workers=None, title="Documentation"):
+    """
+    Render (or incrementally update) the static site of a repository.
+
+    Args:
+        graph: Serialized dependency graph
+        doc_store: docgen.doc_store.DocStore of the repository
+        site_dir: Output directory; its manifest.json drives incremental rebuilds
+        fmt: "html" or "markdown"
+        workers: Render processes (default: CPU count)
+
+    Returns:
+        SiteStats
+    """
+    if fmt not in SITE_FORMATS:
+        raise ValueError(f"Unknown site format '{fmt}', expected one of {SITE_FORMATS}")
+    started = time.perf_counter()
+    entry_points = {entry_point: doc_store.entry_point_components(entry_point)
+                    for entry_point in doc_store.entry_points()}
+    parts = doc_store.all_parts()
+    documented = {part["component_id"]: part for part in parts if part["component_id"] in graph}
+    dependents = reverse_edges(graph)
+    signatures = {comp_id: [_signature(graph[comp_id], part, dependents[comp_id]), graph[comp_id]["relative_path"]]
+                  for comp_id, part in documented.items()}
+    file_paths = {graph[comp_id]["relative_path"]: graph[comp_id]["file_path"] for comp_id in documented}
+    stamps = {relative_path: _file_stamp(file_path) for relative_path, file_path in file_paths.items()}
+
+    manifest_path = os.path.join(site_dir, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    previous = manifest["pages"] if manifest.get("format") == fmt else {}
+
+    if previous and manifest.get("version") == SITE_VERSION and "components" in manifest:
+        old_signatures, old_stamps = manifest["components"], manifest["files"]
+        changed = {comp_id for comp_id, signature in signatures.items() if old_signatures.get(comp_id) != signature}
+        changed.update(comp_id for comp_id in old_signatures if comp_id not in signatures)
+        affected = {comp_id for comp_id in changed if comp_id in documented}
+        # Pages link to a neighbour's page only while it is documented
+        flipped = {comp_id for comp_id in changed if (comp_id in signatures) != (comp_id in old_signatures)}
+        for comp_id in flipped & graph.keys():
+            affected.update(dep for dep in graph[comp_id]["depends_on"] if dep in documented)
+            affected.update(dep for dep in dependents[comp_id] if dep in documented)
+        gone = flipped - graph.keys()
+        if gone:
+            affected.update(comp_id for comp_id in documented if not gone.isdisjoint(graph[comp_id]["depends_on"]))
+        modules = {signature[1] for comp_id in changed
+                   for signature in (signatures.get(comp_id), old_signatures.get(comp_id)) if signature}
+        modules.update(relative_path for relative_path in stamps.keys() | old_stamps.keys()
+                       if stamps.get(relative_path) != old_stamps.get(relative_path))
+        jobs = plan_site(graph, parts, entry_points, fmt, title, components=affected, modules=modules,
+                         dependents=dependents)
+
+        # Unplanned pages keep their hashes, as long as they still exist
+        ext = _ext(fmt)
+        pages = {f"components/{comp_id}.{ext}" for comp_id in documented}
+        pages.update(f"modules/{relative_path}.{ext}" for relative_path in stamps)
+        pages.update(f"source/{relative_path}.{ext}" for relative_path, stamp in stamps.items() if stamp)
+        hashes = {path: previous[path] for path in pages if path in previous and path not in jobs}
+    else:
+        jobs = plan_site(graph, parts, entry_points, fmt, title, dependents=dependents)
+        hashes = {}
+    hashes.update((path, _job_hash(job)) for path, job in jobs.items())
+
+    stale = [jobs[path] for path, page_hash in hashes.items() if path in jobs and previous.get(path) != page_hash]
+    if len(stale) < PARALLEL_MIN_PAGES:
+        _write_pages(site_dir, stale)
+    else:
+        chunks = [stale[i:i + CHUNK_SIZE] for i in range(0, len(stale), CHUNK_SIZE)]
+        # Sites are built from repository threads: fork-server workers inherit no held locks
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("forkserver")) as pool:
+            list(pool.map(_write_pages, [site_dir] * len(chunks), chunks))
+
+    removed = [path for path in previous if path not in hashes]
+    for path in removed:
+        try:
+            os.remove(os.path.join(site_dir, path))
+        except FileNotFoundError:
+            pass
+
+    os.makedirs(site_dir, exist_ok=True)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        # json.dumps uses the C encoder, json.dump does not
+        f.write(json.dumps({"version": SITE_VERSION, "format": fmt, "pages": hashes,
+                            "components": signatures, "files": stamps}))
+    os.replace(tmp_path, manifest_path)
+
+    stats = SiteStats(pages=len(hashes), rendered=len(stale), removed=len(removed),
+                      seconds=time.perf_counter() - started)
+    logger.info(f"Site {site_dir}: {stats.stats()}")
+    return stats
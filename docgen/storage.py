@@ -0,0 +1,347 @@
+"""
+Bounded storage for clones, uploads and generated artifacts.
+
+Everything written for a repository is found by its key (the directory name,
+docgen.pipeline.repo_key): the clone or upload under knowledge_base/, the
+dependency graph, the documentation directory, the static site and its rows in
+the documentation store. StorageManager reports their size per repository and
+keeps the total bounded:
+
+- usage() / total_bytes(): space per repository and artifact kind
+- acquire() / release() (or `with using(repo)`): reference counts for artifacts in
+  use by a job or run; referenced repositories are never evicted or compressed
+- enforce(): evict least recently used, unreferenced repositories until the total
+  is under the quota
+- compress_cold(): gzip the graph and documentation JSON of repositories not used
+  for a while; acquire() restores them before anyone reads them
+
+Last access times and references live in output/storage.sqlite3. A holder's
+reference is refreshed in the background until it is released, so long runs keep
+their protection; references not refreshed for stale_ref_seconds (a crashed
+holder) no longer count.
+"""
+
+import os
+import gzip
+import time
+import uuid
+import shutil
+import socket
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from docgen.doc_store import DocStore
+from docgen.pipeline import dependency_graph_path_for, doc_store_path_for
+
+logger = logging.getLogger("docstring_generator")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS repos (
+    repo TEXT PRIMARY KEY,
+    last_access REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS refs (
+    repo TEXT NOT NULL,
+    holder TEXT NOT NULL,
+    acquired_at REAL NOT NULL,
+    PRIMARY KEY (repo, holder)
+);
+"""
+
+ARTIFACT_KINDS = ("clone", "graph", "documentation", "site", "store")
+
+QUOTA_ENV = "DOCGEN_STORAGE_QUOTA_MB"
+COMPRESS_ENV = "DOCGEN_COMPRESS_AFTER_DAYS"
+
+COMPRESSED_SUFFIX = ".gz"
+
+
+def _size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            try:
+                total += os.path.getsize(os.path.join(root, file))
+            except FileNotFoundError:
+                continue
+    return total
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return 0.0
+
+
+def _gzip(path):
+    tmp_path = f"{path}{COMPRESSED_SUFFIX}.tmp"
+    with open(path, "rb") as src, gzip.open(tmp_path, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.replace(tmp_path, path + COMPRESSED_SUFFIX)
+    os.remove(path)
+
+
+def _gunzip(path):
+    original = path[:-len(COMPRESSED_SUFFIX)]
+    tmp_path = f"{original}.tmp"
+    with gzip.open(path, "rb") as src, open(tmp_path, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.replace(tmp_path, original)
+    os.remove(path)
+
+
+class StorageManager:
+    """
+    Args:
+        output_dir: Root of the generated artifacts
+        knowledge_base: Directory of clones and uploads (only these are ever deleted)
+        quota_bytes: Bound for total_bytes() enforced by enforce() (None: unbounded)
+        compress_after_seconds: Idle time after which maintain() compresses a repository
+        stale_ref_seconds: Age after which a reference is treated as left over by a crash
+    """
+
+    def __init__(self, output_dir="output", knowledge_base="knowledge_base", quota_bytes=None,
+                 compress_after_seconds=None, stale_ref_seconds=6 * 3600):
+        self.output_dir = output_dir
+        self.knowledge_base = knowledge_base
+        self.quota_bytes = quota_bytes
+        self.compress_after_seconds = compress_after_seconds
+        self.stale_ref_seconds = stale_ref_seconds
+        self._lock = threading.Lock()
+        # holder -> event stopping the thread that refreshes its reference
+        self._holders = {}
+        os.makedirs(output_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(output_dir, "storage.sqlite3"), timeout=60,
+                                    check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls, output_dir="output", knowledge_base="knowledge_base"):
+        """Quota from DOCGEN_STORAGE_QUOTA_MB, compression from DOCGEN_COMPRESS_AFTER_DAYS."""
+        quota = os.getenv(QUOTA_ENV)
+        days = os.getenv(COMPRESS_ENV)
+        return cls(output_dir, knowledge_base,
+                   quota_bytes=int(float(quota) * 1024 * 1024) if quota else None,
+                   compress_after_seconds=float(days) * 86400 if days else None)
+
+    def close(self):
+        with self._lock:
+            for stop in self._holders.values():
+                stop.set()
+            self._holders = {}
+            self.conn.close()
+
+    # Artifacts
+
+    def paths(self, repo):
+        """{kind: path} of the file-system artifacts of a repository."""
+        return {
+            "clone": os.path.join(self.knowledge_base, repo),
+            "graph": dependency_graph_path_for(os.path.join(self.knowledge_base, repo), self.output_dir,
+                                               self.knowledge_base),
+            "documentation": os.path.join(self.output_dir, "documentation", repo),
+            "site": os.path.join(self.output_dir, "site", repo),
+        }
+
+    def _compressible(self, repo):
+        """Graph and documentation JSON files of a repository (compressed or not)."""
+        paths = self.paths(repo)
+        files = [paths["graph"], paths["graph"] + COMPRESSED_SUFFIX]
+        for root, _, names in os.walk(paths["documentation"]):
+            files.extend(os.path.join(root, name) for name in names
+                         if name.endswith(".json") or name.endswith(".json" + COMPRESSED_SUFFIX))
+        return [path for path in files if os.path.exists(path)]
+
+    def _store(self, repo=None):
+        return DocStore(doc_store_path_for(self.output_dir), repo=repo)
+
+    def repos(self):
+        """Every repository with a catalog entry or an artifact on disk."""
+        with self._lock:
+            repos = {row[0] for row in self.conn.execute("SELECT repo FROM repos")}
+        if os.path.isdir(self.knowledge_base):
+            repos.update(name for name in os.listdir(self.knowledge_base)
+                         if os.path.isdir(os.path.join(self.knowledge_base, name)))
+        graph_dir = os.path.join(self.output_dir, "dependency_graphs")
+        if os.path.isdir(graph_dir):
+            for name in os.listdir(graph_dir):
+                name = name[:-len(COMPRESSED_SUFFIX)] if name.endswith(COMPRESSED_SUFFIX) else name
+                if name.startswith("dependency_graph_") and name.endswith(".json"):
+                    repos.add(name[len("dependency_graph_"):-len(".json")])
+        for kind in ("documentation", "site"):
+            directory = os.path.join(self.output_dir, kind)
+            if os.path.isdir(directory):
+                repos.update(name for name in os.listdir(directory) if os.path.isdir(os.path.join(directory, name)))
+        return sorted(repos)
+
+    # Access and references
+
+    def touch(self, repo):
+        with self._lock:
+            self.conn.execute("INSERT INTO repos (repo, last_access) VALUES (?, ?) "
+                              "ON CONFLICT (repo) DO UPDATE SET last_access = excluded.last_access",
+                              (repo, time.time()))
+            self.conn.commit()
+
+    def acquire(self, repo, holder=None):
+        """
+        Reference a repository's artifacts (restoring compressed files); returns the
+        holder ID. The reference is kept fresh until release().
+        """
+        holder = holder or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        stop = threading.Event()
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO refs (repo, holder, acquired_at) VALUES (?, ?, ?)",
+                              (repo, holder, time.time()))
+            self.conn.commit()
+            self._holders[holder] = stop
+        threading.Thread(target=self._keep_alive, args=(repo, holder, stop), daemon=True,
+                         name=f"storage-ref-{repo}").start()
+        self.touch(repo)
+        self.restore(repo)
+        return holder
+
+    def _keep_alive(self, repo, holder, stop):
+        while not stop.wait(self.stale_ref_seconds / 4):
+            with self._lock:
+                if stop.is_set():
+                    return
+                self.conn.execute("UPDATE refs SET acquired_at = ? WHERE repo = ? AND holder = ?",
+                                  (time.time(), repo, holder))
+                self.conn.commit()
+
+    def release(self, repo, holder):
+        with self._lock:
+            stop = self._holders.pop(holder, None)
+            if stop is not None:
+                stop.set()
+            self.conn.execute("DELETE FROM refs WHERE repo = ? AND holder = ?", (repo, holder))
+            self.conn.commit()
+        self.touch(repo)
+
+    @contextmanager
+    def using(self, repo):
+        holder = self.acquire(repo)
+        try:
+            yield self
+        finally:
+            self.release(repo, holder)
+
+    def refs(self, repo):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM refs WHERE repo = ? AND acquired_at > ?",
+                                     (repo, time.time() - self.stale_ref_seconds)).fetchone()[0]
+
+    def last_access(self, repo):
+        """Recorded last access, else the newest modification time of its artifacts."""
+        with self._lock:
+            row = self.conn.execute("SELECT last_access FROM repos WHERE repo = ?", (repo,)).fetchone()
+        if row is not None:
+            return row[0]
+        paths = self.paths(repo)
+        return max([_mtime(path) for path in paths.values()] + [_mtime(paths["graph"] + COMPRESSED_SUFFIX)])
+
+    # Usage
+
+    def usage(self, repo=None):
+        """
+        {repo: {clone, graph, documentation, site, store, total (bytes), compressed
+        (files), last_access, refs}} for one repository or all of them.
+        """
+        store_sizes = self._store().sizes() if os.path.exists(doc_store_path_for(self.output_dir)) else {}
+        usage = {}
+        for name in ([repo] if repo is not None else self.repos()):
+            paths = self.paths(name)
+            entry = {kind: _size(path) for kind, path in paths.items() if kind != "graph"}
+            entry["graph"] = sum(_size(path) for path in (paths["graph"], paths["graph"] + COMPRESSED_SUFFIX)
+                                 if os.path.exists(path))
+            entry["store"] = store_sizes.get(name, 0)
+            entry = {kind: entry[kind] for kind in ARTIFACT_KINDS}
+            entry["total"] = sum(entry.values())
+            entry["compressed"] = sum(path.endswith(COMPRESSED_SUFFIX) for path in self._compressible(name))
+            entry["last_access"] = self.last_access(name)
+            entry["refs"] = self.refs(name)
+            usage[name] = entry
+        return usage
+
+    def total_bytes(self):
+        return sum(entry["total"] for entry in self.usage().values())
+
+    # Eviction and compression
+
+    def evict(self, repo, force=False):
+        """Delete every artifact of a repository; returns the bytes freed (0 if it is referenced)."""
+        if self.refs(repo) and not force:
+            return 0
+        freed = self.usage(repo)[repo]["total"]
+        paths = self.paths(repo)
+        for kind in ("clone", "documentation", "site"):
+            shutil.rmtree(paths[kind], ignore_errors=True)
+        for path in (paths["graph"], paths["graph"] + COMPRESSED_SUFFIX):
+            if os.path.exists(path):
+                os.remove(path)
+        store = self._store(repo)
+        store.delete_repo()
+        store.close()
+        with self._lock:
+            self.conn.execute("DELETE FROM repos WHERE repo = ?", (repo,))
+            self.conn.commit()
+        logger.info(f"Evicted {repo}: {freed} bytes")
+        return freed
+
+    def enforce(self, quota_bytes=None):
+        """Evict unreferenced repositories, least recently used first, until the total fits the quota."""
+        quota = quota_bytes if quota_bytes is not None else self.quota_bytes
+        if quota is None:
+            return []
+        usage = self.usage()
+        total = sum(entry["total"] for entry in usage.values())
+        evicted = []
+        for repo in sorted(usage, key=lambda name: usage[name]["last_access"]):
+            if total <= quota:
+                break
+            if usage[repo]["refs"]:
+                continue
+            total -= self.evict(repo)
+            evicted.append(repo)
+        if total > quota:
+            logger.warning(f"Storage still at {total} bytes over a quota of {quota}: remaining repositories are in use")
+        return evicted
+
+    def compress_cold(self, older_than_seconds=None):
+        """Gzip the graph and documentation JSON of unreferenced repositories idle for this long."""
+        older_than = older_than_seconds if older_than_seconds is not None else self.compress_after_seconds
+        if older_than is None:
+            return 0
+        cutoff = time.time() - older_than
+        compressed = 0
+        for repo in self.repos():
+            if self.last_access(repo) > cutoff or self.refs(repo):
+                continue
+            for path in self._compressible(repo):
+                if not path.endswith(COMPRESSED_SUFFIX):
+                    _gzip(path)
+                    compressed += 1
+        if compressed:
+            logger.info(f"Compressed {compressed} cold graph and documentation files")
+        return compressed
+
+    def restore(self, repo):
+        """Decompress a repository's compressed files; returns how many there were."""
+        restored = 0
+        for path in self._compressible(repo):
+            if path.endswith(COMPRESSED_SUFFIX):
+                _gunzip(path)
+                restored += 1
+        return restored
+
+    def maintain(self):
+        """compress_cold and enforce with the configured limits."""
+        return {"compressed": self.compress_cold(), "evicted": self.enforce()}
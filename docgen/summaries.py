@@ -0,0 +1,150 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, field
+
+from utils.toposort import dependency_first_dfs
+from docgen.parts import source_hash
+
+logger = logging.getLogger("docstring_generator")
+
+# Upper bounds (in characters, roughly 4 per token) that keep prompts small
+SUMMARY_CHARS = 600
+CONTEXT_CHARS = 6000
+
+
+def _clip(text, limit):
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+class SummaryCache:
+    """Summaries persisted across runs, keyed by the hash of what was summarized."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = {}
+        self.hits = 0
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def get(self, key):
+        with self._lock:
+            summary = self.entries.get(key)
+            if summary is not None:
+                self.hits += 1
+            return summary
+
+    def put(self, key, summary):
+        with self._lock:
+            self.entries[key] = summary
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+
+@dataclass
+class Summaries:
+    """One-paragraph summaries of components (by ID) and modules (by relative path)."""
+    components: dict = field(default_factory=dict)
+    modules: dict = field(default_factory=dict)
+
+    def context_for(self, comp_id, graph, max_chars=CONTEXT_CHARS):
+        """Compact replacement for the growing previous_docs history: the summary of the
+        component's module followed by the summaries of its direct dependencies."""
+        component = graph[comp_id]
+        blocks = []
+        module_summary = self.modules.get(component["relative_path"])
+        if module_summary:
+            blocks.append(f"Module {component['relative_path']}: {module_summary}")
+        for dep in component["depends_on"]:
+            if dep in self.components:
+                blocks.append(f"{dep}: {self.components[dep]}")
+
+        context, used = [], 0
+        for block in blocks:
+            if used + len(block) > max_chars:
+                break
+            context.append(block)
+            used += len(block) + 2
+        return "\n\n".join(context)
+
+
+def _ask(chain, inputs):
+    return _clip(chain.invoke(inputs).content, SUMMARY_CHARS)
+
+
+def build_summaries(graph, summary_chain, module_chain=None, cache=None, ids=None):
+    """
+    Bottom-up pass: summarize leaf components first (dependency_first_dfs order) so
+    each component's prompt can use the short summaries of its dependencies, then
+    summarize every module from the summaries of its components.
+
+    Args:
+        graph: Serialized dependency graph (component ID -> component dict)
+        summary_chain, module_chain: Chains from llm.chain_setup.get_summary_chains
+        cache: Optional SummaryCache; unchanged code is never summarized twice
+        ids: Optionally restrict the pass to these component IDs
+    """
+    keep = set(ids) if ids is not None else set(graph)
+    deps_graph = {
+        comp_id: {dep for dep in graph[comp_id]["depends_on"] if dep in keep}
+        for comp_id in keep
+    }
+    summaries = Summaries()
+    calls = 0
+
+    for comp_id in dependency_first_dfs(deps_graph):
+        component = graph[comp_id]
+        dependency_summaries = "\n".join(
+            f"- {dep}: {summaries.components[dep]}"
+            for dep in component["depends_on"] if dep in summaries.components
+        )
+        # The cache is shared across repositories: the same source depending on different
+        # code must not reuse a summary written from the other dependencies
+        digest = hashlib.sha256(dependency_summaries.encode("utf-8")).hexdigest()
+        key = f"component:{source_hash(component)}:{digest}"
+        summary = cache.get(key) if cache is not None else None
+        if summary is None:
+            summary = _ask(summary_chain, {
+                "code": component["source_code"],
+                "dependency_summaries": _clip(dependency_summaries, CONTEXT_CHARS) or "none",
+            })
+            calls += 1
+            if cache is not None:
+                cache.put(key, summary)
+        summaries.components[comp_id] = summary
+
+    if module_chain is not None:
+        by_module = {}
+        for comp_id in sorted(keep):
+            by_module.setdefault(graph[comp_id]["relative_path"], []).append(comp_id)
+        for module, members in by_module.items():
+            member_summaries = "\n".join(f"- {m}: {summaries.components[m]}" for m in members)
+            digest = hashlib.sha256(member_summaries.encode("utf-8")).hexdigest()
+            key = f"module:{module}:{digest}"
+            summary = cache.get(key) if cache is not None else None
+            if summary is None:
+                summary = _ask(module_chain, {
+                    "module": module,
+                    "component_summaries": _clip(member_summaries, CONTEXT_CHARS),
+                })
+                calls += 1
+                if cache is not None:
+                    cache.put(key, summary)
+            summaries.modules[module] = summary
+
+    if cache is not None:
+        cache.save()
+    logger.info(f"Bottom-up summaries: {len(summaries.components)} components, "
+                f"{len(summaries.modules)} modules, {calls} LLM calls")
+    return summaries
@@ -0,0 +1,247 @@
+"""
+Watch mode: keeps a repository's dependency graph and documentation up to date
+while its files change.
+
+RepoPoller finds changed .py files by comparing snapshots of their mtime and size.
+With the optional watchdog package installed, the OS file events (inotify, FSEvents,
+ReadDirectoryChangesW) say when to take one, so an idle repository is never walked;
+otherwise it is polled every `interval` seconds, backing off to `max_interval` while
+nothing changes. Bursts of saves are debounced: a batch is only handed over once no
+file changed for `debounce` seconds.
+WatchSession then re-parses only the touched files (utils.build_graph.patch_graph),
+saves the patched graph, marks changed components and their direct dependents
+dirty in the part store and regenerates the entry points whose dependency closure
+contains a dirty component. Every other part is reused from the store.
+"""
+
+import os
+import time
+import logging
+import threading
+
+from utils.build_graph import patch_graph
+from utils.loader import load_graph
+from utils.reachability import ReachabilityIndex
+from docgen.entrypoints import find_entrypoints
+from docgen.generator import generate_docs
+from docgen.dedup import DocCache
+from docgen.pipeline import documentation_path_for, repo_key, save_documentation
+
+logger = logging.getLogger("docstring_generator")
+
+
+class RepoPoller:
+    """Detects added, modified and deleted .py files by their mtime and size, woken by
+    watchdog's file events when it is installed (use_watchdog=False always polls)."""
+
+    def __init__(self, repo_path, interval=1.0, debounce=0.5, max_interval=10.0, use_watchdog=True):
+        self.repo_path = os.path.abspath(repo_path)
+        self.interval = interval
+        self.max_interval = max(max_interval, interval)
+        self.debounce = debounce
+        self._snapshot = self.snapshot()
+        self._wake = threading.Event()
+        self._closed = False
+        self._observer = self._start_observer() if use_watchdog else None
+
+    def _start_observer(self):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return None
+
+        wake = self._wake
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                # Directory "modified" events follow every write inside it (.pyc files too)
+                if event.is_directory:
+                    relevant = event.event_type in ("created", "deleted", "moved")
+                else:
+                    paths = (event.src_path, getattr(event, "dest_path", "") or "")
+                    relevant = any(str(path).endswith(".py") for path in paths)
+                if relevant:
+                    wake.set()
+
+        observer = Observer()
+        observer.daemon = True
+        try:
+            observer.schedule(Handler(), self.repo_path, recursive=True)
+            observer.start()
+        except OSError:
+            # e.g. out of inotify watches: poll instead
+            logger.warning(f"Could not watch {self.repo_path} for file events, polling it")
+            return None
+        return observer
+
+    def close(self):
+        """Stop the file event observer; a pending wait_for_changes returns."""
+        self._closed = True
+        self._wake.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    def snapshot(self):
+        state = {}
+        for root, _, files in os.walk(self.repo_path):
+            for file in files:
+                if not file.endswith(".py"):
+                    continue
+                file_path = os.path.join(root, file)
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                state[os.path.relpath(file_path, self.repo_path)] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def poll(self):
+        """Relative paths changed since the previous poll."""
+        current = self.snapshot()
+        previous, self._snapshot = self._snapshot, current
+        return {path for path in previous.keys() | current.keys() if previous.get(path) != current.get(path)}
+
+    def wait_for_changes(self, stop_event):
+        """Block until a burst of changes has settled; returns the changed paths
+        (empty if stop_event was set first, or close() was called)."""
+        changed = set()
+        idle_interval = self.interval
+        while True:
+            if changed:
+                timeout = self.debounce
+            else:
+                timeout = self.max_interval if self._observer is not None else idle_interval
+            woke = self._wake.wait(timeout)
+            self._wake.clear()
+            if stop_event.is_set() or self._closed:
+                return set()
+            if self._observer is not None and not woke and not changed:
+                # No file event: nothing to look at
+                continue
+            batch = self.poll()
+            if batch:
+                changed |= batch
+                idle_interval = self.interval
+            elif changed:
+                return changed
+            else:
+                idle_interval = min(idle_interval * 2, self.max_interval)
+
+
+class WatchSession:
+    """
+    Background thread that applies file changes of one repository to its
+    dependency graph and documentation.
+
+    Args:
+        repo_path: Repository to watch (usually under knowledge_base/)
+        dependency_graph_path: Saved graph to load and keep patched
+        chain: Documentation chain (llm.chain_setup.get_chain)
+        part_store: docgen.doc_store.DocStore of the repository
+        documentation_dir: Where the per-entry-point JSON files are written
+        storage: docgen.storage.StorageManager; the repository stays referenced (never
+            evicted or compressed) until stop()
+        storage_holder: A reference already acquired for the session (else one is acquired)
+
+    `version` is incremented after every applied batch and `last_update` describes
+    it, so a UI can poll both cheaply and refresh when the version moves.
+    """
+
+    def __init__(self, repo_path, dependency_graph_path, chain, part_store,
+                 documentation_dir="output/documentation", interval=1.0, debounce=0.5, storage=None,
+                 storage_holder=None):
+        self.repo_path = repo_path
+        self.storage = storage
+        self.storage_holder = storage_holder
+        if storage is not None and storage_holder is None:
+            # Restores compressed files before the graph is loaded
+            self.storage_holder = storage.acquire(repo_key(repo_path))
+        self.dependency_graph_path = dependency_graph_path
+        self.chain = chain
+        self.part_store = part_store
+        self.documentation_dir = documentation_dir
+        self.poller = RepoPoller(repo_path, interval=interval, debounce=debounce)
+        self.graph = load_graph(dependency_graph_path)
+        self.doc_cache = DocCache()
+        self.version = 0
+        self.last_update = None
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"watch-{os.path.basename(repo_path)}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        logger.info(f"Watching {self.repo_path} for changes")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.poller.close()
+        if self._thread.is_alive():
+            self._thread.join()
+        if self.storage is not None and self.storage_holder is not None:
+            self.storage.release(repo_key(self.repo_path), self.storage_holder)
+            self.storage_holder = None
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop.is_set():
+            changed_files = self.poller.wait_for_changes(self._stop)
+            if not changed_files:
+                continue
+            try:
+                self.apply(changed_files)
+            except Exception as e:
+                logger.exception(f"Watch update failed for {sorted(changed_files)}")
+                self.error = str(e)
+
+    def apply(self, changed_files):
+        """Patch the graph for changed_files and regenerate the affected entry points."""
+        started = time.perf_counter()
+        patch = patch_graph(self.repo_path, self.graph, changed_files, self.dependency_graph_path)
+
+        # Changed components and their direct dependents; everything else is reused.
+        # Components added by the patch have no part yet and are generated as well
+        dirty = self.part_store.mark_dirty(self.graph)
+        index = ReachabilityIndex.from_components(self.graph)
+        affected = set()
+        for comp_id in dirty | (patch.changed & set(self.graph)):
+            affected.update(index.impact(comp_id, include_self=True))
+
+        entry_points = find_entrypoints(self.graph)
+        # Entry points whose code was deleted
+        for entry_point in set(self.part_store.entry_points()) - set(entry_points):
+            self.part_store.delete_entry_point(entry_point)
+
+        regenerated = []
+        for entry_point in entry_points:
+            if entry_point not in affected:
+                continue
+            final_docs = generate_docs(entry_point, self.graph, self.chain,
+                [], list(self.graph.keys()), [], [],
+                doc_cache=self.doc_cache, part_store=self.part_store
+                ) or []
+            self.part_store.save()
+            self.part_store.save_entry_point(entry_point, final_docs)
+            save_documentation(final_docs, documentation_path_for(entry_point, self.documentation_dir))
+            regenerated.append(entry_point)
+
+        self.error = None
+        self.last_update = {
+            "files": patch.files,
+            "changed": len(patch.changed),
+            "removed": len(patch.removed),
+            "dirty": len(dirty),
+            "entry_points": regenerated,
+            "seconds": round(time.perf_counter() - started, 2),
+            "finished_at": time.time(),
+        }
+        self.version += 1
+        logger.info(f"Watch update {self.version}: {self.last_update}")
+        return self.last_update
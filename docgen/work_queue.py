@@ -0,0 +1,383 @@
+"""
+Durable work queue for distributing documentation generation over processes and hosts.
+
+The queue is a SQLite database with one job per component (keyed by repository
+and component ID). A producer enqueues the components of a dependency graph; any
+number of worker processes lease jobs whose dependencies are finished, keep the
+lease alive with heartbeats while the LLM call runs, and complete or fail them.
+Failed jobs are retried up to max_attempts times; a job whose lease expires
+(crashed or partitioned worker) is handed to the next worker. Components of one
+dependency cycle do not wait for each other.
+
+Jobs carry the serialized component and finished jobs the generated output, so
+workers only need the database. Results are merged back into ordered
+per-entry-point documentation with merge_entry_point.
+
+The database uses WAL for processes on one host. For workers on other hosts,
+put it on shared storage with working POSIX locks and pass shared_storage=True
+(rollback journal, as WAL needs shared memory on one machine).
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import logging
+import sqlite3
+import threading
+
+from utils.toposort import build_work_plan
+from docgen.generator import _invoke_chain
+from docgen.retriever import retrieve
+from docgen.parts import source_hash
+
+logger = logging.getLogger("docstring_generator")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    repo TEXT NOT NULL,
+    component_id TEXT NOT NULL,
+    source_hash TEXT NOT NULL,
+    component TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    waiting INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    output TEXT,
+    error TEXT,
+    updated_at REAL,
+    PRIMARY KEY (repo, component_id)
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, waiting);
+
+CREATE TABLE IF NOT EXISTS job_deps (
+    repo TEXT NOT NULL,
+    component_id TEXT NOT NULL,
+    dep_id TEXT NOT NULL,
+    PRIMARY KEY (repo, dep_id, component_id)
+);
+CREATE INDEX IF NOT EXISTS job_deps_component ON job_deps (repo, component_id);
+"""
+
+# Statuses: pending -> leased -> done, or back to pending on a retryable failure,
+# or failed after max_attempts. Finished (done or failed) jobs release their dependents.
+
+
+class WorkQueue:
+    """
+    Args:
+        path: SQLite database, shared by the producer and every worker
+        lease_seconds: How long a lease lasts without a heartbeat
+        max_attempts: Leases a job gets before it is marked failed
+        shared_storage: Use a rollback journal so hosts sharing the file can use it
+    """
+
+    def __init__(self, path, lease_seconds=60, max_attempts=3, shared_storage=False):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Transactions are managed explicitly (BEGIN IMMEDIATE) to serialize leases
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.execute(f"PRAGMA journal_mode={'DELETE' if shared_storage else 'WAL'}")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def _transaction(self, fn, *args):
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(*args)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            return result
+
+    # Producer
+
+    def enqueue(self, repo, graph, ids=None, part_store=None):
+        """
+        Add (or refresh) jobs for the components ids of graph (all by default).
+
+        Jobs whose source and dependencies' sources are unchanged keep their state,
+        so enqueueing again resumes an interrupted run; failed jobs get a new set
+        of attempts. Components with a stored,
+        clean part in part_store are enqueued as done with that output.
+        """
+        ids = set(graph) if ids is None else set(ids)
+        deps_graph = {comp_id: {dep for dep in graph[comp_id]["depends_on"] if dep in ids} for comp_id in ids}
+        plan = build_work_plan(deps_graph)
+        unit_of = {comp_id: unit for level in plan.levels for unit in level for comp_id in unit}
+        # Dependencies first, so jobs are leased roughly bottom-up
+        order = plan.order()
+
+        def apply():
+            existing = {
+                comp_id: (job_hash, status) for comp_id, job_hash, status in self.conn.execute(
+                    "SELECT component_id, source_hash, status FROM jobs WHERE repo = ?", (repo,)
+                )
+            }
+            hashes = {comp_id: source_hash(graph[comp_id]) for comp_id in ids}
+            changed = {comp_id for comp_id in ids if existing.get(comp_id, (None,))[0] != hashes[comp_id]}
+            now = time.time()
+            rows = []
+            for comp_id in order:
+                if (comp_id not in changed and not (deps_graph[comp_id] & changed)
+                        and existing[comp_id][1] != "failed"):
+                    continue
+                component = graph[comp_id]
+                output = part_store.get(comp_id, component) if part_store is not None else None
+                rows.append((repo, comp_id, hashes[comp_id], json.dumps(component),
+                             "done" if output is not None else "pending",
+                             json.dumps(output) if output is not None else None, now))
+            self.conn.executemany(
+                """INSERT INTO jobs (repo, component_id, source_hash, component, status, output, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (repo, component_id) DO UPDATE SET
+                       source_hash = excluded.source_hash, component = excluded.component,
+                       status = excluded.status, output = excluded.output, attempts = 0,
+                       lease_owner = NULL, lease_expires = NULL, error = NULL,
+                       updated_at = excluded.updated_at""",
+                rows
+            )
+            stale = set(existing) - ids
+            self.conn.executemany("DELETE FROM jobs WHERE repo = ? AND component_id = ?",
+                                  [(repo, comp_id) for comp_id in stale])
+
+            self.conn.execute("DELETE FROM job_deps WHERE repo = ?", (repo,))
+            self.conn.executemany(
+                "INSERT INTO job_deps (repo, component_id, dep_id) VALUES (?, ?, ?)",
+                [(repo, comp_id, dep) for comp_id, deps in deps_graph.items()
+                 for dep in deps if unit_of[dep] != unit_of[comp_id]]
+            )
+            self.conn.execute(
+                """UPDATE jobs SET waiting = (
+                       SELECT COUNT(*) FROM job_deps d
+                       JOIN jobs j ON j.repo = d.repo AND j.component_id = d.dep_id
+                       WHERE d.repo = jobs.repo AND d.component_id = jobs.component_id
+                         AND j.status NOT IN ('done', 'failed'))
+                   WHERE repo = ?""",
+                (repo,)
+            )
+            return len(rows)
+
+        queued = self._transaction(apply)
+        logger.info(f"Work queue {self.path}: {queued} of {len(ids)} jobs of {repo} (re)queued")
+        return queued
+
+    # Workers
+
+    def _finish(self, repo, component_id, status, output=None, error=None):
+        self.conn.execute(
+            """UPDATE jobs SET status = ?, output = ?, error = ?, lease_owner = NULL,
+                   lease_expires = NULL, updated_at = ?
+               WHERE repo = ? AND component_id = ?""",
+            (status, json.dumps(output) if output is not None else None, error, time.time(),
+             repo, component_id)
+        )
+        # Dependents stop waiting for it
+        self.conn.execute(
+            """UPDATE jobs SET waiting = waiting - 1
+               WHERE repo = ? AND component_id IN (
+                   SELECT component_id FROM job_deps WHERE repo = ? AND dep_id = ?)""",
+            (repo, repo, component_id)
+        )
+
+    def lease(self, owner):
+        """Lease one ready job: (repo, component_id, component) or None."""
+        def apply():
+            now = time.time()
+            # Expired leases that used up their attempts fail for good
+            for repo, component_id in self.conn.execute(
+                    """SELECT repo, component_id FROM jobs
+                       WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?""",
+                    (now, self.max_attempts)).fetchall():
+                self._finish(repo, component_id, "failed", error="lease expired")
+
+            row = self.conn.execute(
+                """SELECT rowid, repo, component_id, component FROM jobs
+                   WHERE (status = 'pending' AND waiting = 0) OR (status = 'leased' AND lease_expires < ?)
+                   ORDER BY rowid LIMIT 1""",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                """UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?,
+                       attempts = attempts + 1, updated_at = ?
+                   WHERE rowid = ?""",
+                (owner, now + self.lease_seconds, now, row[0])
+            )
+            return row[1], row[2], json.loads(row[3])
+
+        return self._transaction(apply)
+
+    def heartbeat(self, owner, repo, component_id):
+        """Extend a lease; False if it was lost (expired and taken by another worker)."""
+        with self._lock:
+            cursor = self.conn.execute(
+                """UPDATE jobs SET lease_expires = ? WHERE repo = ? AND component_id = ?
+                       AND status = 'leased' AND lease_owner = ?""",
+                (time.time() + self.lease_seconds, repo, component_id, owner)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, owner, repo, component_id, output):
+        def apply():
+            if not self._owns(owner, repo, component_id):
+                return False
+            self._finish(repo, component_id, "done", output=output)
+            return True
+
+        return self._transaction(apply)
+
+    def fail(self, owner, repo, component_id, error):
+        """Give a leased job back for a retry, or mark it failed after max_attempts."""
+        def apply():
+            if not self._owns(owner, repo, component_id):
+                return False
+            attempts = self.conn.execute(
+                "SELECT attempts FROM jobs WHERE repo = ? AND component_id = ?", (repo, component_id)
+            ).fetchone()[0]
+            if attempts >= self.max_attempts:
+                self._finish(repo, component_id, "failed", error=error)
+            else:
+                self.conn.execute(
+                    """UPDATE jobs SET status = 'pending', error = ?, lease_owner = NULL,
+                           lease_expires = NULL, updated_at = ?
+                       WHERE repo = ? AND component_id = ?""",
+                    (error, time.time(), repo, component_id)
+                )
+            return True
+
+        return self._transaction(apply)
+
+    def _owns(self, owner, repo, component_id):
+        row = self.conn.execute(
+            "SELECT status, lease_owner FROM jobs WHERE repo = ? AND component_id = ?", (repo, component_id)
+        ).fetchone()
+        return row is not None and row[0] == "leased" and row[1] == owner
+
+    def dependency_docs(self, repo, dep_ids):
+        """Generated content of the finished dependencies among dep_ids."""
+        dep_ids = list(dep_ids)
+        if not dep_ids:
+            return {}
+        with self._lock:
+            rows = self.conn.execute(
+                f"""SELECT component_id, output FROM jobs
+                    WHERE repo = ? AND status = 'done' AND component_id IN ({','.join('?' * len(dep_ids))})""",
+                [repo] + dep_ids
+            ).fetchall()
+        return {comp_id: json.loads(output) for comp_id, output in rows if output}
+
+    # Progress and results
+
+    def progress(self, repo=None):
+        """Job counts by status, for one repository or the whole queue."""
+        sql = "SELECT status, COUNT(*) FROM jobs"
+        params = ()
+        if repo is not None:
+            sql += " WHERE repo = ?"
+            params = (repo,)
+        with self._lock:
+            counts = dict(self.conn.execute(sql + " GROUP BY status", params).fetchall())
+        return {status: counts.get(status, 0) for status in ("pending", "leased", "done", "failed")}
+
+    def wait(self, repo=None, poll_interval=1.0):
+        """Block until every job (of repo) is finished; returns the final progress."""
+        while True:
+            progress = self.progress(repo)
+            if progress["pending"] == 0 and progress["leased"] == 0:
+                return progress
+            time.sleep(poll_interval)
+
+    def outputs(self, repo):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT component_id, output FROM jobs WHERE repo = ? AND status = 'done'", (repo,)
+            ).fetchall()
+        return {comp_id: json.loads(output) for comp_id, output in rows if output}
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def merge_entry_point(graph, entry_point, outputs, index=None):
+    """Ordered documentation of one entry point (same order as generate_docs) from job outputs
+    (index: utils.reachability.ReachabilityIndex of graph, if built)."""
+    parts = []
+    for component in retrieve(graph, entry_point, index):
+        output = outputs.get(component["id"])
+        if output is None:
+            continue
+        output["component_id"] = component["id"]
+        output["file_path"] = component['file_path']
+        output["start_line"] = component['start_line']
+        output["end_line"] = component['end_line']
+        parts.append(output)
+    return parts
+
+
+def run_worker(queue_path, chain=None, chain_config=None, exit_when_idle=True, poll_interval=1.0,
+               lease_seconds=60, max_attempts=3, shared_storage=False):
+    """
+    Worker loop: lease a job, document it with the documentation of its finished
+    dependencies as previous_docs, complete it. A heartbeat thread keeps the lease
+    alive during the LLM call. Returns the number of jobs completed.
+    """
+    if chain is None:
+        from llm.chain_setup import get_chain
+        chain = get_chain(chain_config)
+
+    work_queue = WorkQueue(queue_path, lease_seconds=lease_seconds, max_attempts=max_attempts,
+                           shared_storage=shared_storage)
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    completed = 0
+    try:
+        while True:
+            job = work_queue.lease(owner)
+            if job is None:
+                progress = work_queue.progress()
+                if exit_when_idle and progress["pending"] == 0 and progress["leased"] == 0:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            repo, comp_id, component = job
+            done = threading.Event()
+
+            def beat():
+                while not done.wait(lease_seconds / 3):
+                    if not work_queue.heartbeat(owner, repo, comp_id):
+                        logger.warning(f"Lost the lease on {repo}:{comp_id}")
+                        return
+
+            heartbeat = threading.Thread(target=beat, daemon=True)
+            heartbeat.start()
+            try:
+                dependency_docs = work_queue.dependency_docs(repo, component["depends_on"])
+                prev_docs = "\n\n".join(
+                    dependency_docs[dep]["content"].strip() for dep in component["depends_on"]
+                    if dep in dependency_docs and dependency_docs[dep].get("content")
+                )
+                output = _invoke_chain(chain, component, prev_docs)
+                if not isinstance(output, dict) or "content" not in output:
+                    raise ValueError(f"Unreadable documentation output: {output}")
+            except Exception as e:
+                done.set()
+                logger.warning(f"Job {repo}:{comp_id} failed: {e}")
+                work_queue.fail(owner, repo, comp_id, str(e))
+                continue
+            done.set()
+            heartbeat.join()
+            if work_queue.complete(owner, repo, comp_id, output):
+                completed += 1
+    finally:
+        work_queue.close()
+    return completed
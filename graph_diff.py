@@ -0,0 +1,51 @@
+"""
+Structural diff of two dependency graph builds (utils.graph_diff).
+
+Prints the summary stats and the changed components with their blast radius, and
+optionally writes the full changeset as JSON for review or targeted regeneration.
+Graphs are the dependency_graph_*.json files written by BuildGraph; `cli.py
+--refresh` also records the changeset of every rebuilt repository in its run.
+
+Usage:
+    python graph_diff.py old_graph.json new_graph.json
+    python graph_diff.py old_graph.json new_graph.json --depth 2 --output changeset.json
+"""
+
+import sys
+import json
+import argparse
+from utils.loader import load_graph
+from utils.graph_diff import diff_graphs
+
+
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("old", help="Dependency graph of the earlier build")
+    arg_parser.add_argument("new", help="Dependency graph of the later build")
+    arg_parser.add_argument("--depth", type=int, help="Limit the blast radius to this many dependents away")
+    arg_parser.add_argument("--output", help="Write the changeset JSON here")
+    return arg_parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    changeset = diff_graphs(load_graph(args.old), load_graph(args.new), max_depth=args.depth)
+
+    print(json.dumps(changeset.stats(), indent=2))
+    for label, ids in (("added", changeset.added), ("removed", changeset.removed),
+                       ("changed", changeset.changed), ("rewired", changeset.rewired)):
+        for comp_id in ids:
+            print(f"{label:>8}  {comp_id}")
+    for origin, target in sorted(changeset.moved.items()):
+        print(f"{'moved':>8}  {origin} -> {target}")
+    if changeset.blast_radius:
+        print(f"\n{len(changeset.blast_radius)} components depend on these changes")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(changeset.to_dict(), f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
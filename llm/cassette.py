@@ -0,0 +1,128 @@
+"""
+Record/replay of LLM interactions.
+
+A cassette is a gzip-compressed JSON Lines file with one record per model call:
+the SHA-256 of the rendered prompt, the response content and the latency of the
+original call. In record mode (ProviderConfig.cassette_mode="record") every call
+goes to the real model and is appended to the cassette. In replay mode the model
+is never built: responses are served from the cassette, in recorded order when a
+prompt was sent several times, optionally sleeping for the original latency
+(scaled by ProviderConfig.simulate_latency) so scheduling and caching changes can
+be benchmarked offline with realistic, reproducible timings.
+
+Keys are taken from the rendered prompt rather than the chain inputs, so editing
+a prompt template invalidates the affected records instead of replaying stale
+answers.
+
+Queue workers in separate processes may record to the same cassette: appends
+take an exclusive lock on "<path>.lock" (fcntl, where available) so their gzip
+members never interleave and only the first writer adds the version header.
+"""
+
+import os
+import gzip
+import json
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within the process
+    fcntl = None
+
+CASSETTE_VERSION = 1
+
+
+class CassetteMiss(LookupError):
+    """Replay was asked for a prompt that was never recorded."""
+
+
+def prompt_key(prompt_value):
+    text = prompt_value.to_string() if hasattr(prompt_value, "to_string") else str(prompt_value)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """Recorded responses by prompt key; appends are flushed one record at a time."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.records = {}
+        self._replayed = {}
+        self.hits = 0
+        self.misses = 0
+        if os.path.exists(path):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    if "key" in record:
+                        self.records.setdefault(record["key"], []).append(record)
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def record(self, key, content, latency):
+        record = {"key": key, "content": content, "latency": round(latency, 4)}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock, self._file_lock():
+            new_file = not os.path.exists(self.path)
+            # Every append is a complete gzip member, so an interrupted run keeps its records
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                if new_file:
+                    f.write(json.dumps({"version": CASSETTE_VERSION}) + "\n")
+                f.write(json.dumps(record) + "\n")
+            self.records.setdefault(key, []).append(record)
+
+    def replay(self, key):
+        with self._lock:
+            records = self.records.get(key)
+            if not records:
+                self.misses += 1
+                raise CassetteMiss(f"No recorded response for prompt {key[:12]} in {self.path}")
+            # Repeated prompts get their responses in recorded order, then wrap around
+            position = self._replayed.get(key, 0)
+            self._replayed[key] = position + 1
+            self.hits += 1
+            return records[position % len(records)]
+
+
+class RecordingModel:
+    """Wraps a chat model and appends every call to the cassette."""
+
+    def __init__(self, model, cassette):
+        self.model = model
+        self.cassette = cassette
+
+    def invoke(self, prompt_value):
+        t0 = time.perf_counter()
+        response = self.model.invoke(prompt_value)
+        self.cassette.record(prompt_key(prompt_value), response.content, time.perf_counter() - t0)
+        return response
+
+
+class ReplayModel:
+    """Serves recorded responses; simulate_latency=1 sleeps for the original latency."""
+
+    def __init__(self, cassette, simulate_latency=0):
+        self.cassette = cassette
+        self.simulate_latency = simulate_latency
+
+    def invoke(self, prompt_value):
+        from langchain_core.messages import AIMessage
+
+        record = self.cassette.replay(prompt_key(prompt_value))
+        if self.simulate_latency:
+            time.sleep(record["latency"] * self.simulate_latency)
+        return AIMessage(content=record["content"])
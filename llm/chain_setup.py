@@ -1,9 +1,35 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from prompts.doc_prompt import doc_prompt
-
-def get_chain():
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.0-flash",
-        temperature=0
-    )
-    return doc_prompt | llm
\ No newline at end of file
+import threading
+
+_lock = threading.Lock()
+_chains = {}
+
+
+def get_chain(config=None, repo_context=None):
+    """Documentation chain for an llm.providers.ProviderConfig (read from the
+    LLM_* environment variables by default). Chains are built once per
+    configuration and reuse the provider's pooled client.
+
+    repo_context (docgen.repo_context.repo_overview) is baked into the static
+    system prefix of every prompt, which providers cache across the calls of a
+    repository."""
+    # Imported lazily: LangChain and the provider clients take seconds to import
+    from llm.providers import ProviderConfig, get_llm
+    from prompts.doc_prompt import doc_prompt
+
+    config = config or ProviderConfig.from_env()
+    if repo_context is not None:
+        return doc_prompt.partial(repo_context=repo_context) | get_llm(config)
+    with _lock:
+        if config not in _chains:
+            _chains[config] = doc_prompt | get_llm(config)
+        return _chains[config]
+
+
+def get_summary_chains(config=None):
+    """(component summary chain, module summary chain) for the bottom-up pass."""
+    from llm.providers import ProviderConfig, get_llm
+    from prompts.doc_prompt import summary_prompt, module_summary_prompt
+
+    config = config or ProviderConfig.from_env()
+    llm = get_llm(config)
+    return summary_prompt | llm, module_summary_prompt | llm
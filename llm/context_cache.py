@@ -0,0 +1,105 @@
+"""
+Prompt prefix caching and per-call usage metering.
+
+Documentation prompts (prompts.doc_prompt) start with a system message that is
+identical for every component of a repository: the guidelines and the repository
+overview. Providers bill and process a repeated prefix cheaply when it is long
+enough: Gemini 2.x and OpenAI cache it implicitly, the cached part shows up as
+usage_metadata["input_token_details"]["cache_read"]. Offline, the "fake" provider
+uses LocalContextCache as a stand-in with the same accounting, and can simulate
+prompt processing time for the uncached part (ProviderConfig.prefill_rate) so the
+effect on time to first token can be measured without a provider.
+
+UsageMeter collects billed input tokens (cached / uncached), output tokens and
+time to first token of every call made through llm.providers.get_llm.
+"""
+
+import threading
+from collections import OrderedDict
+
+# Roughly 4 characters per token
+CHARS_PER_TOKEN = 4
+
+# Smallest prefix the providers cache (OpenAI and Gemini Flash: 1024 tokens)
+MIN_CACHED_TOKENS = 1024
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def split_prompt(prompt_value):
+    """(static prefix, variable suffix) of a rendered prompt: every message but the
+    last one, and the last one."""
+    messages = prompt_value.to_messages() if hasattr(prompt_value, "to_messages") else []
+    if len(messages) < 2:
+        text = prompt_value.to_string() if hasattr(prompt_value, "to_string") else str(prompt_value)
+        return "", text
+    prefix = "\n".join(f"{message.type}: {message.content}" for message in messages[:-1])
+    return prefix, f"{messages[-1].type}: {messages[-1].content}"
+
+
+class LocalContextCache:
+    """LRU of recently seen prompt prefixes, standing in for a provider's cache."""
+
+    def __init__(self, capacity=64, min_tokens=MIN_CACHED_TOKENS):
+        self.capacity = capacity
+        self.min_tokens = min_tokens
+        self._lock = threading.Lock()
+        self._prefixes = OrderedDict()
+
+    def lookup(self, prefix):
+        """Tokens of prefix served from the cache (0 on a miss, which caches it)."""
+        tokens = estimate_tokens(prefix) if prefix else 0
+        if tokens < self.min_tokens:
+            return 0
+        with self._lock:
+            if prefix in self._prefixes:
+                self._prefixes.move_to_end(prefix)
+                return tokens
+            self._prefixes[prefix] = True
+            if len(self._prefixes) > self.capacity:
+                self._prefixes.popitem(last=False)
+            return 0
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class UsageMeter:
+    """Token usage and time to first token of the calls of one configuration."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.input_tokens = 0
+        self.cached_tokens = 0
+        self.output_tokens = 0
+        self.first_token_s = []
+
+    def observe(self, message, first_token_s):
+        usage = getattr(message, "usage_metadata", None) or {}
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += usage.get("input_tokens", 0)
+            self.cached_tokens += (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+            self.output_tokens += usage.get("output_tokens", 0)
+            self.first_token_s.append(first_token_s)
+
+    def stats(self):
+        with self._lock:
+            calls = self.calls or 1
+            return {
+                "calls": self.calls,
+                "input_tokens": self.input_tokens,
+                "cached_input_tokens": self.cached_tokens,
+                "billed_input_tokens_per_call": round((self.input_tokens - self.cached_tokens) / calls, 1),
+                "cache_hit_rate": round(self.cached_tokens / self.input_tokens, 3) if self.input_tokens else 0.0,
+                "output_tokens": self.output_tokens,
+                "first_token_p50_s": round(_percentile(self.first_token_s, 0.5), 3),
+                "first_token_p95_s": round(_percentile(self.first_token_s, 0.95), 3),
+            }
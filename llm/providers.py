@@ -0,0 +1,233 @@
+"""
+LLM provider layer.
+
+A ProviderConfig selects one of:
+  - "gemini": Google Gemini through langchain-google-genai (default, as before)
+  - "openai": any OpenAI-compatible endpoint, e.g. api.openai.com or a local
+              llama.cpp / vLLM server (--base-url http://localhost:8000/v1);
+              needs the optional langchain-openai package
+  - "fake":   deterministic offline model for tests and benchmarks
+
+Any of them can be recorded to or replayed from a cassette (llm.cassette) with
+cassette=<path> and cassette_mode="record" / "replay" (LLM_CASSETTE,
+LLM_CASSETTE_MODE); replay never contacts the provider.
+
+Usage of every call (billed input tokens, prompt cache reads, output tokens and
+time to first token) is metered per configuration, see get_usage. With stream=True
+responses are streamed so the first token is timed exactly; otherwise it is the
+latency of the whole call. Prompt caching itself is done by the providers (or by
+llm.context_cache.LocalContextCache for "fake").
+
+Models are created once per configuration and shared by every entry point,
+session and thread in the process, so HTTP connections are pooled and reused.
+Each configuration has its own concurrency limit and timeout; docgen.routing
+uses the pool field to keep a separate limit per model tier.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from dataclasses import dataclass, replace, fields
+from typing import Optional
+
+PROVIDERS = ("gemini", "openai", "fake")
+CASSETTE_MODES = ("record", "replay")
+DEFAULT_MODELS = {"openai": "gpt-4o-mini", "fake": "default"}
+
+
+@dataclass(frozen=True)
+class ProviderConfig:
+    provider: str = "gemini"
+    model: str = "gemini-2.0-flash"
+    base_url: Optional[str] = None
+    api_key: Optional[str] = None
+    temperature: float = 0
+    timeout: float = 120
+    max_retries: int = 2
+    max_concurrency: int = 4
+    max_connections: int = 20
+    cassette: Optional[str] = None
+    cassette_mode: str = "replay"
+    simulate_latency: float = 0
+    stream: bool = False
+    prefill_rate: float = 0
+    # Configurations that differ only in pool still get their own client and limit
+    pool: Optional[str] = None
+
+    @classmethod
+    def from_env(cls, prefix="LLM_", **overrides):
+        """Read LLM_PROVIDER, LLM_MODEL, LLM_BASE_URL, LLM_API_KEY, LLM_TIMEOUT, ... ."""
+        values = {}
+        for f in fields(cls):
+            raw = os.getenv(f"{prefix}{f.name.upper()}")
+            if raw is None or raw == "":
+                continue
+            if f.type in (bool, "bool"):
+                values[f.name] = raw.lower() in ("1", "true", "yes")
+            elif f.type in (float, "float"):
+                values[f.name] = float(raw)
+            elif f.type in (int, "int"):
+                values[f.name] = int(raw)
+            else:
+                values[f.name] = raw
+        values.update({k: v for k, v in overrides.items() if v is not None})
+        config = cls(**values)
+        # Default model of the final provider, unless one was given
+        if config.provider != "gemini" and "model" not in values:
+            config = replace(config, model=DEFAULT_MODELS.get(config.provider, config.model))
+        if config.provider not in PROVIDERS:
+            raise ValueError(f"Unknown LLM provider '{config.provider}', expected one of {PROVIDERS}")
+        if config.cassette_mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode '{config.cassette_mode}', expected one of {CASSETTE_MODES}")
+        return config
+
+
+_lock = threading.Lock()
+_models = {}
+_cassettes = {}
+_meters = {}
+
+
+def _build_gemini(config):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    kwargs = {}
+    if config.api_key:
+        kwargs["google_api_key"] = config.api_key
+    return ChatGoogleGenerativeAI(
+        model=config.model,
+        temperature=config.temperature,
+        timeout=config.timeout,
+        max_retries=config.max_retries,
+        **kwargs
+    )
+
+
+def _build_openai(config):
+    try:
+        from langchain_openai import ChatOpenAI
+    except ImportError as e:
+        raise ImportError("The 'openai' provider needs the langchain-openai package "
+                          "(pip install langchain-openai)") from e
+    import httpx
+
+    # One pooled, keep-alive client per configuration
+    http_client = httpx.Client(
+        limits=httpx.Limits(max_connections=config.max_connections,
+                            max_keepalive_connections=config.max_connections),
+        timeout=config.timeout
+    )
+    return ChatOpenAI(
+        model=config.model,
+        base_url=config.base_url,
+        # Local servers usually ignore the key but the client insists on one
+        api_key=config.api_key or os.getenv("OPENAI_API_KEY") or "not-needed",
+        temperature=config.temperature,
+        timeout=config.timeout,
+        max_retries=config.max_retries,
+        stream_usage=True,
+        http_client=http_client
+    )
+
+
+def _build_fake(config):
+    from langchain_core.messages import AIMessage
+    from langchain_core.runnables import RunnableLambda
+    from llm.context_cache import LocalContextCache, estimate_tokens, split_prompt
+
+    context_cache = LocalContextCache()
+
+    def respond(prompt_value):
+        text = prompt_value.to_string() if hasattr(prompt_value, "to_string") else str(prompt_value)
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+        prefix, suffix = split_prompt(prompt_value)
+        cached = context_cache.lookup(prefix)
+        input_tokens = (estimate_tokens(prefix) if prefix else 0) + estimate_tokens(suffix)
+        if config.prefill_rate:
+            # Only the uncached part of the prompt has to be processed
+            time.sleep((input_tokens - cached) / config.prefill_rate)
+        content = json.dumps({
+            "code": "",
+            "content": f"Generated documentation {digest} ({len(text)} prompt characters)."
+        })
+        output_tokens = estimate_tokens(content)
+        return AIMessage(content=content, usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+            "input_token_details": {"cache_read": cached},
+        })
+
+    return RunnableLambda(respond, name="FakeDocModel")
+
+
+_BUILDERS = {"gemini": _build_gemini, "openai": _build_openai, "fake": _build_fake}
+
+
+def _build_model(config):
+    if not config.cassette:
+        return _BUILDERS[config.provider](config)
+
+    from llm.cassette import Cassette, RecordingModel, ReplayModel
+
+    # One cassette per file, shared by the doc and summary chains of every configuration
+    if config.cassette not in _cassettes:
+        _cassettes[config.cassette] = Cassette(config.cassette)
+    cassette = _cassettes[config.cassette]
+    if config.cassette_mode == "replay":
+        return ReplayModel(cassette, simulate_latency=config.simulate_latency)
+    return RecordingModel(_BUILDERS[config.provider](config), cassette)
+
+
+def get_cassette(path):
+    """Cassette opened by get_llm for path (hit / miss counters), if any."""
+    return _cassettes.get(path)
+
+
+def get_usage(config):
+    """llm.context_cache.UsageMeter of the calls made with config, if any."""
+    return _meters.get(config)
+
+
+def get_llm(config: Optional[ProviderConfig] = None):
+    """
+    Shared model for a configuration, wrapped so that at most config.max_concurrency
+    requests are in flight at once across the whole process.
+    """
+    config = config or ProviderConfig.from_env()
+    with _lock:
+        if config not in _models:
+            from langchain_core.runnables import RunnableLambda
+            from llm.context_cache import UsageMeter
+
+            model = _build_model(config)
+            semaphore = threading.BoundedSemaphore(config.max_concurrency)
+            meter = _meters[config] = UsageMeter()
+            # Cassettes record and replay whole responses
+            stream = config.stream and not config.cassette
+
+            def invoke(prompt_value):
+                with semaphore:
+                    t0 = time.perf_counter()
+                    if not stream:
+                        response = model.invoke(prompt_value)
+                        first_token_s = time.perf_counter() - t0
+                    else:
+                        response = first_token_s = None
+                        for chunk in model.stream(prompt_value):
+                            if response is None:
+                                first_token_s = time.perf_counter() - t0
+                                response = chunk
+                            else:
+                                response = response + chunk
+                        if response is None:
+                            # Nothing was streamed: ask for the whole response instead
+                            response = model.invoke(prompt_value)
+                            first_token_s = time.perf_counter() - t0
+                meter.observe(response, first_token_s)
+                return response
+
+            _models[config] = RunnableLambda(invoke, name=f"{config.provider}:{config.model}")
+        return _models[config]
@@ -1,32 +1,221 @@
 import sys
 import logging
 import os
-import shutil
 from dotenv import load_dotenv
-from utils.build_graph import BuildGraph
-from utils.loader import get_doc
-from docgen.entrypoints import find_entrypoints
-from docgen.retriever import retrieve
-from docgen.generator import generate_docs
-from llm.chain_setup import get_chain
+import uuid
+import hashlib
+from utils.loader import load_graph
+from docgen.doc_store import DocStore
+from docgen.repo_context import repo_overview
+from docgen.pipeline import (
+    repo_dir_name, clone_repository, dependency_graph_path_for, repo_key, doc_store_path_for
+)
 import streamlit as st
-from pathlib import Path
-from git import Repo
 from datetime import datetime
-import json
-from pygments import highlight
-from pygments.lexers import PythonLexer
-from pygments.formatters import HtmlFormatter
-import streamlit.components.v1 as components
+
+# Documentation items rendered per page in the left column
+PAGE_SIZE = 25
+
+# Heavy dependencies (GitPython, LangChain/Gemini, Pygments, streamlit.components)
+# are imported on the code path that needs them so the first paint is not delayed.
+
+
+@st.cache_resource
+def open_doc_store(repo):
+    return DocStore(doc_store_path_for(), repo=repo)
+
+
+@st.cache_resource
+def job_service():
+    """docgen.jobs.JobService shared by all sessions; its jobs outlive reruns and closed tabs."""
+    from docgen.jobs import JobService, jobs_path_for
+
+    return JobService(jobs_path_for(), workers=int(os.getenv("DOCGEN_JOB_WORKERS", "2"))).start()
+
+
+def current_user():
+    """Per-browser user ID kept in the URL, so a reopened page finds its jobs again."""
+    if "user" not in st.query_params:
+        st.query_params["user"] = uuid.uuid4().hex[:12]
+    return st.query_params["user"]
+
+
+@st.cache_resource
+def storage_manager():
+    """docgen.storage.StorageManager with the quota and compression settings of the environment."""
+    from docgen.storage import StorageManager
+
+    return StorageManager.from_env()
+
+
+@st.cache_data(ttl=60)
+def repo_usage():
+    return storage_manager().usage()
+
+
+def storage_usage():
+    """Space used per repository (clone, graph, docs, site, store) in the sidebar."""
+    usage = repo_usage()
+    with st.sidebar.expander(f"💾 Storage: {sum(entry['total'] for entry in usage.values()) / 2**20:.1f} MB"):
+        for repo, entry in sorted(usage.items(), key=lambda item: -item[1]["total"]):
+            st.caption(f"**{repo}**: {entry['total'] / 2**20:.1f} MB, last used "
+                       f"{datetime.fromtimestamp(entry['last_access']).strftime('%Y-%m-%d %H:%M')}"
+                       + (f", {entry['compressed']} compressed file(s)" if entry["compressed"] else ""))
+
+
+def use_repo(repo):
+    """Restore a repository's compressed files before reading them; counts as an access for LRU eviction."""
+    storage_manager().touch(repo)
+    storage_manager().restore(repo)
+
+
+def open_job(job):
+    """Show the documentation of a finished job."""
+    result = job["result"]
+    use_repo(result["repo"])
+    st.session_state.job_outputs = result["entry_points"]
+    if not result["entry_points"]:
+        return
+    st.session_state.last_output_file = result["entry_points"][-1][1]
+    st.session_state.doc_repo = result["repo"]
+    st.session_state.repo_path = job["repo_path"]
+    st.session_state.last_entry_point = result["entry_points"][-1][0]
+
+    st.session_state.docs_generated = True
+    st.session_state.doc_entry_point = None
+    st.session_state.doc_offset = 0
+    st.session_state.doc_focus = None
+    st.session_state.show_right = False
+    st.session_state.selected_file = None
+
+
+@st.fragment(run_every=2)
+def job_status(user):
+    """Polls the user's recent jobs; the job started in this session opens when it is done."""
+    service = job_service()
+    jobs = service.jobs_for(user, limit=5)
+    if not jobs:
+        return
+    st.markdown("##### ⏳ Documentation jobs")
+    for job in jobs:
+        name = os.path.basename(job["repo_path"])
+        if job["status"] in ("queued", "running"):
+            fraction = job["done"] / job["total"] if job["total"] else 0.0
+            st.progress(fraction, text=f"{name}: {job['stage']}")
+            if job["status"] == "queued" and st.button("✖️ Cancel", key=f"cancel_{job['id']}"):
+                service.cancel(job["id"], user)
+        elif job["status"] == "done":
+            result = job["result"]
+            info_col, open_col = st.columns([4, 1])
+            info_col.caption(f"✅ {name}: {len(result['entry_points'])} entry point(s), "
+                             f"{result['llm_calls']} LLM call(s), {result['deduplicated']} deduplicated, "
+                             f"{result['reused']} reused from previous runs")
+            if open_col.button("📖 Open", key=f"open_{job['id']}"):
+                open_job(job)
+                st.rerun()
+        else:
+            st.caption(f"❌ {name}: {job['error']}")
+
+    followed = next((job for job in jobs if job["id"] == st.session_state.get("job_id")), None)
+    if followed is not None and followed["status"] == "done":
+        st.session_state.job_id = None
+        open_job(followed)
+        st.rerun()
+
+
+@st.cache_resource
+def watch_sessions():
+    """Running docgen.watch.WatchSession per repository path, shared by all sessions."""
+    return {}
+
+
+def start_watch(repo_path):
+    from llm.chain_setup import get_chain
+    from docgen.watch import WatchSession
+
+    sessions = watch_sessions()
+    if repo_path not in sessions:
+        dependency_graph_path = dependency_graph_path_for(repo_path)
+        storage = storage_manager()
+        # Referenced (restored, never evicted or compressed) until the session stops
+        holder = storage.acquire(repo_key(repo_path))
+        try:
+            # The overview stays fixed for the session so the cached prompt prefix does too
+            chain = get_chain(repo_context=repo_overview(load_graph(dependency_graph_path)))
+            sessions[repo_path] = WatchSession(
+                repo_path, dependency_graph_path, chain, open_doc_store(repo_key(repo_path)),
+                storage=storage, storage_holder=holder
+            ).start()
+        except Exception:
+            storage.release(repo_key(repo_path), holder)
+            raise
+    return sessions[repo_path]
+
+
+def stop_watch(repo_path):
+    session = watch_sessions().pop(repo_path, None)
+    if session is not None:
+        session.stop()
+
+
+@st.fragment(run_every=2)
+def watch_status(session):
+    """Polls the watch session; a new version reruns the app so the docs refresh in place."""
+    if session.error:
+        st.warning(f"⚠️ Last update failed: {session.error}")
+    elif session.last_update:
+        update = session.last_update
+        st.caption(f"🔁 Updated {len(update['files'])} file(s) at "
+                   f"{datetime.fromtimestamp(update['finished_at']).strftime('%H:%M:%S')}: "
+                   f"{update['changed']} changed, {update['removed']} removed, "
+                   f"{len(update['entry_points'])} entry point(s) regenerated in {update['seconds']} s")
+    else:
+        st.caption("👀 Watching for changes...")
+    if session.version != st.session_state.get("watch_version", 0):
+        st.session_state.watch_version = session.version
+        st.rerun()
+
+
+@st.cache_resource(max_entries=32)
+def coarse_diagram(dependency_graph_path, graph_mtime, focus):
+    """docgen.diagrams.coarsen for one level; recomputed when the graph file changes."""
+    from docgen.diagrams import coarsen
+
+    return coarsen(load_graph(dependency_graph_path), focus)
+
+
+def architecture_diagram(repo_path):
+    """Module-level diagram of the repository with drill-down into packages, modules and classes."""
+    from docgen.diagrams import DiagramCache, to_dot
+    import streamlit.components.v1 as components
+
+    dependency_graph_path = dependency_graph_path_for(repo_path)
+    use_repo(repo_key(repo_path))
+    focus = tuple(st.session_state.get("diagram_focus", ()))
+    coarse = coarse_diagram(dependency_graph_path, os.path.getmtime(dependency_graph_path), focus)
+
+    st.caption("🗺️ " + " / ".join(("repository",) + focus))
+    inside = sorted(node for node in coarse.expandable if coarse.in_focus(node))
+    drill_col, up_col = st.columns([4, 1])
+    with drill_col:
+        target = st.selectbox("Drill into", inside, format_func=lambda node: node.rsplit("/", 1)[-1])
+        if target and st.button("🔍 Drill down"):
+            st.session_state.diagram_focus = target.split("/")
+            st.rerun()
+    with up_col:
+        if focus and st.button("⬆️ Up"):
+            st.session_state.diagram_focus = list(focus[:-1])
+            st.rerun()
+
+    svg = DiagramCache("output/diagrams").render(coarse)
+    components.html(f'<div style="overflow:auto">{svg}</div>', height=520, scrolling=True)
+    st.download_button("⬇️ Download DOT", to_dot(coarse), file_name="architecture.dot", mime="text/vnd.graphviz")
 
 
 def clone_repo(repo_url, clone_dir="/knowledge_base/dummy"):
-    # Clean up old repo if it exists
-    if os.path.exists(clone_dir):
-        shutil.rmtree(clone_dir)
-    
     st.info("📦 Cloning repository...")
-    Repo.clone_from(repo_url, clone_dir)
+    # Cleans up an old clone if it exists
+    clone_repository(repo_url, clone_dir)
     st.success("✅ Repository cloned successfully!")
     return clone_dir
 
@@ -69,7 +258,7 @@ if option == "🔗 GitHub Repository Link":
     repo_link = st.text_input("Enter GitHub Repository URL:")
     if repo_link:
         try:
-            clone_dir_name = repo_link.split("/")[-1].split(".")[0]
+            clone_dir_name = repo_dir_name(repo_link)
             repo_path = f"knowledge_base/{clone_dir_name}"
             if not os.path.exists(repo_path):
                 with st.spinner("🔄 Cloning repository..."):
@@ -82,100 +271,55 @@ if option == "🔗 GitHub Repository Link":
 elif option == "📄 Upload Python File":
     uploaded_file = st.file_uploader("Upload a Python file", type=["py"])
     if uploaded_file is not None:
-        uid = datetime.now().strftime('%Y%m%d%H%M%S')
-        upload_dir = f"knowledge_base/{uploaded_file.name}_{uid}"
-        os.makedirs(upload_dir, exist_ok=True)
+        # Named by content, so uploading the same file again reuses its directory and outputs
+        digest = hashlib.sha1(uploaded_file.getbuffer()).hexdigest()[:12]
+        upload_dir = f"knowledge_base/{uploaded_file.name}_{digest}"
         file_path = os.path.join(upload_dir, uploaded_file.name)
-        with open(file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
+        if not os.path.exists(file_path):
+            os.makedirs(upload_dir, exist_ok=True)
+            with open(file_path, "wb") as f:
+                f.write(uploaded_file.getbuffer())
         progress_placeholder.info(f"✅ File uploaded successfully: {uploaded_file.name}")
         repo_path = upload_dir
 
-if st.button("🚀 Generate Documentation") and repo_path:
-    # for entry_point in entry_points
-    dir_name = repo_path.split("/")[-1]
-    
-    dependency_graph_path = f"output/dependency_graphs/dependency_graph_{dir_name}.json"
-
-    os.makedirs(os.path.dirname(dependency_graph_path), exist_ok=True)
-
-    # repo_path = "knowledge_base/PowerPoint-Generator-Python-Project" 
-
-    if not os.path.exists(dependency_graph_path):
-        progress_placeholder.info("📂 Understanding repository structure...")
-        BuildGraph(repo_path=repo_path, dependency_graph_path=dependency_graph_path)
-
-    else:
-        progress_placeholder.info("📂 Repository graph already available.")
-
-    progress_placeholder.info("🔍 Finding entry points...")
-
-    docs, graph = get_doc(dependency_graph_path)
-    entry_points = find_entrypoints(graph)
-    logger.info(f"Entrypoints found: {entry_points}")
+storage_usage()
 
-    all_docs = []
+bottom_up = st.checkbox("🧱 Bottom-up summaries (compact prompts for large entry points)")
+refresh_graph = st.checkbox("🔄 Re-parse repository (pick up code changes since the last run)")
 
-    for entry_point in entry_points:
-
-        # for entry_point_id in entry_points:
-        expanded_results = retrieve(graph,entry_point)
-
-        for res in expanded_results:
-            print(res["id"], "=> depends on", res["depends_on"])
-            print("------------------------------------")
-
-        progress_placeholder.info("📝 Generating documentation...")
-
-        llm_chain = get_chain()
-
-        seen = []
-        documentation_parts = []
-        conversation_history = []
-
-        # intro_block = f"""
-        # `
-        # {entry_point}
-        # `
-
-        # This is the entry point of the code. The detailed explanation is provided below.
-        # """
-
-        # documentation_parts.append(intro_block)
-
-        final_docs = generate_docs(entry_point, graph, llm_chain,
-            seen, list(graph.keys()), documentation_parts, conversation_history
-            )
-        
-        safe_name = entry_point.replace(".", "_").replace(" ", "_")
-
-        progress_placeholder.success(f"✅ Documentation ready for {entry_point}")
-
-        output_file = Path(f"output/documentation/documentation_{safe_name}.json")
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+if st.button("🚀 Generate Documentation") and repo_path:
+    # Runs on the shared job service, not in this script thread: reruns and closed tabs don't stop it
+    st.session_state.job_id = job_service().submit(
+        current_user(), repo_path, {"refresh": refresh_graph, "bottom_up": bottom_up}
+    )
+    progress_placeholder.info("🕒 Documentation job queued. It keeps running if you close this page.")
 
-        with open(output_file, "w", encoding="utf-8", errors="ignore") as f:
-            f.write(json.dumps(final_docs))
+job_status(current_user())
 
-        print("Documentation generated in output/documentation/documentation_{safe_name}.json")
+if st.session_state.get("docs_generated", False):
+    # Another job's maintenance may have compressed the documents since they were opened
+    if "doc_repo" in st.session_state:
+        use_repo(st.session_state.doc_repo)
 
-        with open(output_file, "rb") as f:
+    for entry_point, output_file in st.session_state.get("job_outputs", []):
+        if os.path.exists(output_file):
+            with open(output_file, "rb") as f:
                 st.download_button(
                     label=f"⬇️ Download {entry_point} Documentation",
                     data=f,
-                    file_name=f"documentation_{safe_name}.json",
-                    mime="application/json" # change this format.....
+                    file_name=os.path.basename(output_file),
+                    mime="application/json",
+                    key=f"download_{entry_point}"
                 )
-        all_docs.extend(final_docs)
-        st.session_state.last_output_file = str(output_file)
 
-        st.session_state.docs_generated = True
-        st.session_state.last_docs = all_docs
-        st.session_state.show_right = False
-        st.session_state.selected_file = None
-        # st.json(final_docs)
+    # Keep the graph and the docs live while the repository changes
+    if st.checkbox("👀 Watch repository (update docs when files are saved)", key="watch"):
+        watch_status(start_watch(st.session_state.repo_path))
+    elif st.session_state.get("repo_path"):
+        stop_watch(st.session_state.repo_path)
 
-if st.session_state.get("docs_generated", False):
+    if st.checkbox("🗺️ Architecture diagram", key="diagram"):
+        architecture_diagram(st.session_state.repo_path)
 
         # Slider to control the width ratio of the left column (only shown if right is visible)
     if st.session_state.show_right:
@@ -192,28 +336,82 @@ if st.session_state.get("docs_generated", False):
     # Left Column Content
     with col1:
 
-        FILE_PATH_JSON = st.session_state.last_output_file
-        with open(FILE_PATH_JSON, "r", encoding="utf-8") as f_json:
-            json_data = json.load(f_json)
-            content_only = [item.get("content") for item in json_data]
-
-            file_paths = [item.get("file_path") for item in json_data]
-            start_lines = [item.get("start_line") for item in json_data]
-            end_lines = [item.get("end_line") for item in json_data]
-            with st.container(height=600):
-                for i,content in enumerate(content_only):
-                    st.write(content)
-                    if st.button("Code link", key=f"block_{i}"):
-                        st.session_state.selected_file = file_paths[i]
-                        st.session_state.start_line = start_lines[i]
-                        st.session_state.end_line = end_lines[i]
-                        st.session_state.show_right = True
-                        st.rerun()
-        
-            
+        doc_store = open_doc_store(st.session_state.doc_repo)
+
+        # Only one page of documentation is read and rendered per rerun; the session
+        # keeps the entry point, the page offset and the focused component ID
+        st.session_state.setdefault("doc_offset", 0)
+        query = st.text_input("🔎 Search documentation")
+        total = None
+        if query:
+            if st.session_state.get("doc_query") != query:
+                st.session_state.doc_query = query
+                st.session_state.doc_offset = 0
+            json_data = doc_store.search(query, limit=PAGE_SIZE + 1, offset=st.session_state.doc_offset)
+            has_next = len(json_data) > PAGE_SIZE
+            json_data = json_data[:PAGE_SIZE]
+        else:
+            stored_entry_points = doc_store.entry_points()
+            entry_point = st.selectbox(
+                "Entry point", stored_entry_points,
+                index=stored_entry_points.index(st.session_state.last_entry_point)
+                if st.session_state.last_entry_point in stored_entry_points else 0
+            )
+            if entry_point != st.session_state.get("doc_entry_point") or st.session_state.get("doc_query"):
+                st.session_state.doc_entry_point = entry_point
+                st.session_state.doc_query = None
+                st.session_state.doc_offset = 0
+            total = doc_store.count(entry_point) if entry_point else 0
+            if st.session_state.doc_offset >= total:
+                # The documentation shrank (e.g. in watch mode): show its last page
+                st.session_state.doc_offset = max(0, total - 1) // PAGE_SIZE * PAGE_SIZE
+
+            # Jump-to index over the entry point's component IDs
+            jump = st.text_input("⤵️ Jump to component", placeholder="Component ID or part of it")
+            if jump and entry_point:
+                matches = doc_store.find(entry_point, jump)
+                if matches:
+                    target = st.selectbox("Matching components", matches, format_func=lambda match: match[1])
+                    if st.button("Go"):
+                        st.session_state.doc_offset = target[0] - target[0] % PAGE_SIZE
+                        st.session_state.doc_focus = target[1]
+                else:
+                    st.caption("No matching component.")
+
+            json_data = doc_store.page(entry_point, st.session_state.doc_offset, PAGE_SIZE) if entry_point else []
+            has_next = st.session_state.doc_offset + PAGE_SIZE < total
+
+        offset = st.session_state.doc_offset
+        prev_col, info_col, next_col = st.columns([1, 3, 1])
+        if prev_col.button("◀ Prev", disabled=offset == 0):
+            st.session_state.doc_offset = max(0, offset - PAGE_SIZE)
+            st.rerun()
+        if next_col.button("Next ▶", disabled=not has_next):
+            st.session_state.doc_offset = offset + PAGE_SIZE
+            st.rerun()
+        if json_data:
+            info_col.caption(f"Items {offset + 1}–{offset + len(json_data)}"
+                             + (f" of {total}" if total is not None else ""))
+
+        with st.container(height=600):
+            for item in json_data:
+                if item["component_id"] == st.session_state.get("doc_focus"):
+                    st.markdown(f"**➡️ {item['component_id']}**")
+                st.write(item.get("content"))
+                if st.button("Code link", key=f"code_{item['component_id']}"):
+                    st.session_state.selected_file = item.get("file_path")
+                    st.session_state.start_line = item.get("start_line")
+                    st.session_state.end_line = item.get("end_line")
+                    st.session_state.show_right = True
+                    st.rerun()
 
     # Right Column Content
     if st.session_state.show_right:
+        from pygments import highlight
+        from pygments.lexers import PythonLexer
+        from pygments.formatters import HtmlFormatter
+        import streamlit.components.v1 as components
+
         with col2:
             if st.button("Close Right Panel"):
                     st.session_state.show_right = False
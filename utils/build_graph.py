@@ -1,23 +1,29 @@
 from .parser import DependencyParser
-from .toposort import build_graph_from_components, dependency_first_dfs
+from .parse_cache import open_parse_cache
+from .toposort import build_graph_from_components, dependency_first_dfs, build_work_plan
+import os
+import json
 import logging
-import sys
-
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+from dataclasses import dataclass, field
 
+# Logging is configured by the entry point (main.py), not on import
 logger = logging.getLogger("docstring_generator")
 
-def BuildGraph(repo_path, dependency_graph_path):
-    parser = DependencyParser(repo_path)
-    components = parser.parse_repository()
-        
+def BuildGraph(repo_path, dependency_graph_path, parse_cache=None):
+    """
+    parse_cache: utils.parse_cache.ParseCache for per-file records shared across
+    repositories (the one configured by DOCGEN_PARSE_CACHE when not given).
+    """
+    own_cache = parse_cache is None
+    if own_cache:
+        parse_cache = open_parse_cache()
+    try:
+        parser = DependencyParser(repo_path, parse_cache=parse_cache)
+        components = parser.parse_repository()
+    finally:
+        if own_cache and parse_cache is not None:
+            parse_cache.close()
+
     # Save the dependency graph for future reference
     parser.save_dependency_graph(dependency_graph_path)
     logger.info(f"Dependency graph saved to: {dependency_graph_path}")
@@ -42,4 +48,60 @@ def BuildGraph(repo_path, dependency_graph_path):
     for i, comp_id in enumerate(sorted_components):
         component = components[comp_id]
         print(f"{i+1}. Processing {component.id} (Type : {component.component_type})")
-        print(f"Source : {component.source_code[:50]}...")
\ No newline at end of file
+        print(f"Source : {component.source_code[:50]}...")
+
+    # Level-parallel schedule over the SCC-condensed graph
+    plan = build_work_plan(graph)
+    logger.info(f"Work plan stats: {plan.stats()}")
+    return plan
+
+
+@dataclass
+class GraphPatch:
+    """What patch_graph changed: added or modified component IDs and removed ones."""
+    files: list = field(default_factory=list)
+    changed: set = field(default_factory=set)
+    removed: set = field(default_factory=set)
+
+
+def patch_graph(repo_path, graph, touched_files, dependency_graph_path=None):
+    """
+    Re-parse only touched_files (paths relative to repo_path, including new and
+    deleted files) and patch the serialized dependency graph in place.
+
+    Components of untouched files keep their dependencies, minus references to
+    components that no longer exist; a reference from an untouched file to a newly
+    added component is only picked up once that file is touched or fully re-parsed.
+    """
+    touched = sorted(set(touched_files))
+    old_ids = {comp_id for comp_id, comp in graph.items() if comp["relative_path"] in touched}
+
+    parser = DependencyParser(repo_path)
+    components = parser.parse_files(touched, known_ids=set(graph) - old_ids)
+    new = {comp_id: comp.to_dict() for comp_id, comp in components.items()}
+
+    patch = GraphPatch(files=touched)
+    patch.removed = old_ids - set(new)
+    patch.changed = {comp_id for comp_id, comp in new.items() if graph.get(comp_id) != comp}
+    for comp_id in old_ids:
+        del graph[comp_id]
+    graph.update(new)
+
+    # Drop dangling references to removed components
+    if patch.removed:
+        for comp in graph.values():
+            if any(dep in patch.removed for dep in comp["depends_on"]):
+                comp["depends_on"] = [
+                    dep for dep in comp["depends_on"]
+                    if dep in graph or dep.split(".", 1)[0] in parser.modules
+                ]
+
+    if dependency_graph_path:
+        tmp_path = f"{dependency_graph_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(graph, f, indent=2)
+        os.replace(tmp_path, dependency_graph_path)
+
+    logger.info(f"Patched dependency graph from {len(touched)} files: "
+                f"{len(patch.changed)} changed, {len(patch.removed)} removed components")
+    return patch
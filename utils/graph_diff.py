@@ -0,0 +1,188 @@
+"""
+Structural diff between two builds of a dependency graph.
+
+Components are matched by ID with one hash join, compared by a content hash of
+their type and source, and their dependency lists are compared as sorted edge
+lists with a single merge pass, so the whole diff is linear in the size of the
+two graphs (plus the per-component sort of its dependencies). Removed and added
+components with the same content are reported as moves (renamed module or
+function). The blast radius is everything that transitively depends on a
+changed, added or rewired component in the new graph, plus the surviving
+dependents of removed components, each with its distance from the change.
+
+The resulting changeset is a small JSON document for code review and for
+targeted regeneration of the affected documentation.
+"""
+
+import hashlib
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Any
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(component: Dict[str, Any]) -> str:
+    """Hash of a serialized component's type and source code. It is also the source
+    hash the part stores key documentation by (docgen.parts.source_hash), so a
+    changeset names exactly the parts that have to be regenerated."""
+    key = f"{component.get('component_type', '')}:{component.get('source_code') or ''}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def _merge_edges(old_deps: List[str], new_deps: List[str]) -> Tuple[List[str], List[str]]:
+    """(added, removed) between two sorted, duplicate-free dependency lists."""
+    added, removed = [], []
+    i = j = 0
+    while i < len(old_deps) and j < len(new_deps):
+        if old_deps[i] == new_deps[j]:
+            i += 1
+            j += 1
+        elif old_deps[i] < new_deps[j]:
+            removed.append(old_deps[i])
+            i += 1
+        else:
+            added.append(new_deps[j])
+            j += 1
+    removed.extend(old_deps[i:])
+    added.extend(new_deps[j:])
+    return added, removed
+
+
+@dataclass
+class GraphDiff:
+    """
+    Changeset between an old and a new graph. IDs are sorted; edges are
+    (dependent, dependency) pairs; blast_radius maps affected component IDs of the
+    new graph to their distance from the nearest change (1 = direct dependent).
+    """
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    moved: Dict[str, str] = field(default_factory=dict)
+    rewired: List[str] = field(default_factory=list)
+    edges_added: List[Tuple[str, str]] = field(default_factory=list)
+    edges_removed: List[Tuple[str, str]] = field(default_factory=list)
+    blast_radius: Dict[str, int] = field(default_factory=dict)
+    unchanged: int = 0
+
+    def affected(self) -> List[str]:
+        """Components of the new graph whose documentation may be out of date."""
+        return sorted(set(self.added) | set(self.changed) | set(self.rewired) | set(self.blast_radius))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "added": len(self.added),
+            "removed": len(self.removed),
+            "changed": len(self.changed),
+            "moved": len(self.moved),
+            "rewired": len(self.rewired),
+            "unchanged": self.unchanged,
+            "edges_added": len(self.edges_added),
+            "edges_removed": len(self.edges_removed),
+            "blast_radius": len(self.blast_radius),
+            "max_distance": max(self.blast_radius.values(), default=0),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stats": self.stats(),
+            "added": self.added,
+            "removed": self.removed,
+            "changed": self.changed,
+            "moved": self.moved,
+            "rewired": self.rewired,
+            "edges": {
+                "added": [list(edge) for edge in self.edges_added],
+                "removed": [list(edge) for edge in self.edges_removed],
+            },
+            "blast_radius": self.blast_radius,
+        }
+
+
+def diff_graphs(old: Dict[str, Dict[str, Any]], new: Dict[str, Dict[str, Any]],
+                max_depth: Optional[int] = None) -> GraphDiff:
+    """
+    Diff two serialized dependency graphs (component ID -> component dict).
+
+    Args:
+        old, new: Graphs as loaded by utils.loader.load_graph
+        max_depth: Stop the blast radius this many dependents away from a change
+                   (None = transitive)
+
+    Returns:
+        A GraphDiff
+    """
+    result = GraphDiff()
+    for comp_id, comp in new.items():
+        before = old.get(comp_id)
+        if before is None:
+            result.added.append(comp_id)
+            result.edges_added.extend((comp_id, dep) for dep in comp["depends_on"])
+            continue
+        if content_hash(before) != content_hash(comp):
+            result.changed.append(comp_id)
+        old_deps, new_deps = before["depends_on"], comp["depends_on"]
+        if old_deps != new_deps:
+            added, removed = _merge_edges(sorted(set(old_deps)), sorted(set(new_deps)))
+            if added or removed:
+                result.rewired.append(comp_id)
+                result.edges_added.extend((comp_id, dep) for dep in added)
+                result.edges_removed.extend((comp_id, dep) for dep in removed)
+    for comp_id, comp in old.items():
+        if comp_id not in new:
+            result.removed.append(comp_id)
+            result.edges_removed.extend((comp_id, dep) for dep in comp["depends_on"])
+
+    # Same content under a new ID: a rename or a move to another module
+    removed_by_hash = {}
+    for comp_id in result.removed:
+        removed_by_hash.setdefault(content_hash(old[comp_id]), comp_id)
+    for comp_id in result.added:
+        origin = removed_by_hash.pop(content_hash(new[comp_id]), None)
+        if origin is not None:
+            result.moved[origin] = comp_id
+
+    # Components whose only change is in their dependencies do not count as changed
+    changed = set(result.changed)
+    result.rewired = [comp_id for comp_id in result.rewired if comp_id not in changed]
+    result.unchanged = len(new) - len(result.added) - len(result.changed) - len(result.rewired)
+
+    result.blast_radius = _blast_radius(old, new, result, max_depth)
+    for ids in (result.added, result.removed, result.changed, result.rewired):
+        ids.sort()
+    result.edges_added.sort()
+    result.edges_removed.sort()
+    logger.info(f"Graph diff: {result.stats()}")
+    return result
+
+
+def _blast_radius(old, new, result, max_depth):
+    seeds = set(result.added) | set(result.changed) | set(result.rewired)
+    removed = set(result.removed)
+    dependents: Dict[str, List[str]] = {}
+    for comp_id, comp in new.items():
+        for dep in comp["depends_on"]:
+            dependents.setdefault(dep, []).append(comp_id)
+
+    distance: Dict[str, int] = {}
+    queue = deque((comp_id, 0) for comp_id in sorted(seeds))
+    # Survivors that depended on a removed component lost a dependency
+    if removed:
+        for comp_id, comp in old.items():
+            if comp_id in new and comp_id not in seeds and comp_id not in distance \
+                    and any(dep in removed for dep in comp["depends_on"]):
+                distance[comp_id] = 1
+                queue.append((comp_id, 1))
+
+    while queue:
+        comp_id, depth = queue.popleft()
+        if max_depth is not None and depth >= max_depth:
+            continue
+        for dependent in dependents.get(comp_id, ()):
+            if dependent in seeds or dependent in distance:
+                continue
+            distance[dependent] = depth + 1
+            queue.append((dependent, depth + 1))
+    return dict(sorted(distance.items()))
@@ -1,12 +1,15 @@
 import json
-from langchain.schema import Document
-from typing import List
-from langchain_core.runnables import chain
 
 
-def get_doc(output_path):
+def load_graph(output_path):
     with open(output_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+        return json.load(f)
+
+
+def get_doc(output_path):
+    from langchain.schema import Document
+
+    data = load_graph(output_path)
 
     docs = []
     for comp_id, comp in data.items():
@@ -25,8 +28,19 @@ def get_doc(output_path):
     return docs,data
 
 
-def retrieve_with_dependencies(query, retriever, data):
+def retrieve_with_dependencies(query, retriever, data, index=None):
     results = retriever.invoke(query)
+
+    if index is not None:
+        # Closure straight from the precomputed utils.reachability.ReachabilityIndex
+        expanded = []
+        seen = set()
+        for doc in results:
+            for comp_id in index.closure(doc.metadata["id"], include_self=True):
+                if comp_id not in seen:
+                    seen.add(comp_id)
+                    expanded.append(data[comp_id])
+        return results, expanded
     
     expanded = []
     seen = set()
@@ -0,0 +1,143 @@
+"""
+Content-addressed cache of per-file parse results, shared by every repository.
+
+Forks, vendored libraries and generated clients put the same file in many
+repositories. The repository-independent result of parsing a file
+(utils.parser.FileRecord: components with module-relative IDs, raw imports and
+unresolved references) is stored under the SHA-256 of the file's bytes, the
+parser version and the Python version (whose AST the records come from), so a
+file parsed once is never parsed again in any repository; only import
+resolution runs per repository.
+
+Records are marshalled nested tuples compressed with zlib, in one SQLite table.
+Each record keeps the time its extraction took, which is what a hit saves.
+"""
+
+import os
+import sys
+import time
+import zlib
+import marshal
+import hashlib
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass
+
+from .parser import PARSER_VERSION, FileRecord
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    key BLOB PRIMARY KEY,
+    record BLOB NOT NULL,
+    parse_seconds REAL NOT NULL,
+    created_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+# DOCGEN_PARSE_CACHE: path of the cache database, or "off" to parse without it
+CACHE_ENV = "DOCGEN_PARSE_CACHE"
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "docgen", "parse_cache.sqlite3")
+
+# New records are written in batches of this many
+FLUSH_EVERY = 256
+
+
+@dataclass
+class ParseCacheStats:
+    hits: int = 0
+    misses: int = 0
+    parse_seconds: float = 0.0   # extracting the records of misses
+    lookup_seconds: float = 0.0  # reading and decoding the records of hits
+    saved_seconds: float = 0.0   # extraction time of the hits, minus their lookups
+
+    def stats(self):
+        files = self.hits + self.misses
+        return {
+            "files": files,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / files, 4) if files else 0.0,
+            "parse_s": round(self.parse_seconds, 3),
+            "lookup_s": round(self.lookup_seconds, 3),
+            "saved_s": round(self.saved_seconds, 3),
+        }
+
+
+def encode_record(record):
+    return zlib.compress(marshal.dumps(record.to_tuple()), 6)
+
+
+def decode_record(blob):
+    return FileRecord.from_tuple(marshal.loads(zlib.decompress(blob)))
+
+
+class ParseCache:
+    """
+    Args:
+        path: SQLite database (shared by processes and repositories)
+        version: Records of other parser versions are never returned
+    """
+
+    def __init__(self, path=DEFAULT_PATH, version=PARSER_VERSION):
+        self.path = path
+        self.namespace = f"{version}:{sys.version_info[0]}.{sys.version_info[1]}:".encode("utf-8")
+        self.stats = ParseCacheStats()
+        self._pending = []
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def key(self, data):
+        return hashlib.sha256(self.namespace + data).digest()
+
+    def get(self, data):
+        """FileRecord of a file with these bytes, or None."""
+        started = time.perf_counter()
+        with self._lock:
+            row = self.conn.execute("SELECT record, parse_seconds FROM records WHERE key = ?",
+                                    (self.key(data),)).fetchone()
+        if row is None:
+            self.stats.misses += 1
+            return None
+        record = decode_record(row[0])
+        elapsed = time.perf_counter() - started
+        self.stats.hits += 1
+        self.stats.lookup_seconds += elapsed
+        self.stats.saved_seconds += row[1] - elapsed
+        return record
+
+    def put(self, data, record, parse_seconds):
+        self.stats.parse_seconds += parse_seconds
+        with self._lock:
+            self._pending.append((self.key(data), encode_record(record), parse_seconds, time.time()))
+            if len(self._pending) >= FLUSH_EVERY:
+                self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self.conn.executemany("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)", self._pending)
+            self.conn.commit()
+            self._pending = []
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self.conn.close()
+
+
+def open_parse_cache(path=None):
+    """The shared cache (path, else DOCGEN_PARSE_CACHE, else DEFAULT_PATH); None if it is "off"."""
+    path = path or os.getenv(CACHE_ENV) or DEFAULT_PATH
+    if path.lower() in ("off", "0", "false", "none"):
+        return None
+    return ParseCache(path)
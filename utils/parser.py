@@ -7,11 +7,14 @@ Improved import resolution for repo-relative modules and alias handling.
 
 import ast
 import os
+import sys
 import json
+import time
+import hashlib
 import logging
 import builtins
 from dataclasses import dataclass, field
-from typing import Dict, List, Set, Tuple, Optional, Any, Union
+from typing import Dict, List, Set, Tuple, Optional, Any, Union, Iterable, NamedTuple
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -26,23 +29,31 @@ STANDARD_MODULES = {
 }
 EXCLUDED_NAMES = {'self', 'cls'}
 
+# Version of the per-file records below; they are cached by file content
+# (utils.parse_cache), so bump it whenever extraction changes what they contain
+PARSER_VERSION = 2
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class CodeComponent:
     """
     Represents a single code component (function, class, method, or assignment) in a Python codebase.
+
+    Produced once parsing has finished: immutable, slotted, with interned IDs and a
+    tuple of dependencies, and without references to the AST it was extracted from.
     """
     id: str
-    node: ast.AST
     component_type: str  # 'class', 'function', 'method', 'assignment'
     file_path: str
     relative_path: str
-    depends_on: Set[str] = field(default_factory=set)
+    depends_on: Tuple[str, ...] = ()
     source_code: Optional[str] = None
     start_line: int = 0
     end_line: int = 0
     has_docstring: bool = False
     docstring: str = ""
+    fingerprint: str = ""
+    complexity: int = 0  # cyclomatic complexity; 0 in graphs saved before it was recorded
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -55,27 +66,112 @@ class CodeComponent:
             'start_line': self.start_line,
             'end_line': self.end_line,
             'has_docstring': self.has_docstring,
-            'docstring': self.docstring
+            'docstring': self.docstring,
+            'fingerprint': self.fingerprint,
+            'complexity': self.complexity
         }
 
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> 'CodeComponent':
         component = CodeComponent(
-            id=data['id'],
-            node=None,
-            component_type=data['component_type'],
-            file_path=data['file_path'],
-            relative_path=data['relative_path'],
-            depends_on=set(data.get('depends_on', [])),
+            id=sys.intern(data['id']),
+            component_type=sys.intern(data['component_type']),
+            file_path=sys.intern(data['file_path']),
+            relative_path=sys.intern(data['relative_path']),
+            depends_on=tuple(sys.intern(dep) for dep in data.get('depends_on', [])),
             source_code=data.get('source_code'),
             start_line=data.get('start_line', 0),
             end_line=data.get('end_line', 0),
             has_docstring=data.get('has_docstring', False),
-            docstring=data.get('docstring', "")
+            docstring=data.get('docstring', ""),
+            fingerprint=data.get('fingerprint', ""),
+            complexity=data.get('complexity', 0)
         )
         return component
 
 
+@dataclass
+class ParsedComponent:
+    """
+    Parse-time record of a code component. Holds its AST node and a mutable set of
+    dependencies only while its file is being analysed; freeze() turns it into the
+    AST-free CodeComponent kept after parsing.
+    """
+    id: str
+    node: Optional[ast.AST]
+    component_type: str  # 'class', 'function', 'method', 'assignment'
+    file_path: str
+    relative_path: str
+    depends_on: Set[str] = field(default_factory=set)
+    source_code: Optional[str] = None
+    start_line: int = 0
+    end_line: int = 0
+    has_docstring: bool = False
+    docstring: str = ""
+    fingerprint: str = ""
+    complexity: int = 0
+
+    def freeze(self) -> CodeComponent:
+        return CodeComponent(
+            id=sys.intern(self.id),
+            component_type=sys.intern(self.component_type),
+            file_path=sys.intern(self.file_path),
+            relative_path=sys.intern(self.relative_path),
+            depends_on=tuple(sorted(sys.intern(dep) for dep in self.depends_on)),
+            source_code=self.source_code,
+            start_line=self.start_line,
+            end_line=self.end_line,
+            has_docstring=self.has_docstring,
+            docstring=self.docstring,
+            fingerprint=self.fingerprint,
+            complexity=self.complexity
+        )
+
+
+class ComponentRecord(NamedTuple):
+    """
+    Repository-independent parse result of one component: its ID relative to the
+    module (Class.method), its source and metadata, and the names and dotted
+    attribute chains it refers to (ReferenceCollector).
+    """
+    name: str
+    component_type: str
+    source_code: str
+    start_line: int
+    end_line: int
+    has_docstring: bool
+    docstring: str
+    fingerprint: str
+    names: Tuple[str, ...]
+    attributes: Tuple[Tuple[str, ...], ...]
+    complexity: int
+
+
+class FileRecord(NamedTuple):
+    """
+    Everything parsing one file yields that does not depend on where the file lives:
+    its components and its unresolved imports. DependencyParser qualifies the IDs and
+    resolves imports and references against the repository.
+    """
+    imports: Tuple[str, ...]
+    from_imports: Tuple[Tuple[Optional[str], int, Tuple[str, ...]], ...]
+    components: Tuple[ComponentRecord, ...]
+
+    def to_tuple(self) -> tuple:
+        """Plain nested tuples (marshal-able)."""
+        return self.imports, self.from_imports, tuple(tuple(component) for component in self.components)
+
+    @staticmethod
+    def from_tuple(data: tuple) -> 'FileRecord':
+        imports, from_imports, components = data
+        return FileRecord(imports, from_imports, tuple(ComponentRecord(*component) for component in components))
+
+
+def _decode_source(data: bytes) -> str:
+    """Same text as reading the file in text mode (UTF-8, universal newlines)."""
+    return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+
 class ImportCollector(ast.NodeVisitor):
     """
     Collects imports and resolves them to repo-relative module paths when possible.
@@ -91,6 +187,8 @@ class ImportCollector(ast.NodeVisitor):
         # self.imports: Dict[str, str] = {}      # identifier -> module_full_path
         self.imports = set()
         self.from_imports: Dict[str, Set[str]] = {}  # resolved_module -> set(names)
+        # Unresolved (module, level, names) of every 'from' import, for the parse cache
+        self.raw_from_imports: List[Tuple[Optional[str], int, Tuple[str, ...]]] = []
 
     def visit_Import(self, node: ast.Import):
         for name in node.names:
@@ -98,15 +196,24 @@ class ImportCollector(ast.NodeVisitor):
         self.generic_visit(node)
 
     def visit_ImportFrom(self, node: ast.ImportFrom):
+        # star imports are hard to resolve; record wildcard marker
+        # keep '*' as name so downstream can detect
+        names = tuple('*' if alias.name == '*' else alias.asname or alias.name for alias in node.names)
+        level = getattr(node, "level", 0) or 0
+        self.raw_from_imports.append((node.module, level, names))
+        # Without a current module only the raw imports are recorded (resolved later per repository)
+        if self.current_module is not None:
+            self.add_from_import(node.module, level, names)
+        self.generic_visit(node)
+
+    def add_from_import(self, module: Optional[str], level: int, names: Iterable[str]):
         """
         Resolve 'from X import Y' with support for:
           - absolute imports
           - implicit repo-relative resolution (prefix with current package)
-          - relative imports (node.level)
+          - relative imports (level)
         """
-        module = node.module  # may be None for 'from . import X'
-        level = getattr(node, "level", 0)
-
+        # module may be None for 'from . import X'
         resolved_module = None
 
         # Build current module parts (e.g., AutoDiff.main -> ['AutoDiff', 'main'])
@@ -160,16 +267,7 @@ class ImportCollector(ast.NodeVisitor):
         key = resolved_module or (module or "")
         if key not in self.from_imports:
             self.from_imports[key] = set()
-
-        for alias in node.names:
-            if alias.name == '*':
-                # star imports are hard to resolve; record wildcard marker
-                # keep '*' as name so downstream can detect
-                self.from_imports[key].add('*')
-            else:
-                self.from_imports[key].add(alias.asname or alias.name)
-
-        self.generic_visit(node)
+        self.from_imports[key].update(names)
 
 
 class MethodDependencyCollector(ast.NodeVisitor):
@@ -195,21 +293,18 @@ class MethodDependencyCollector(ast.NodeVisitor):
         return deps
 
 
-class DependencyCollector(ast.NodeVisitor):
+class ReferenceCollector(ast.NodeVisitor):
     """
-    Collects dependencies between code components by analyzing attribute access,
-    function calls, class bases and name references. It uses the import mappings
-    resolved by ImportCollector to link to repo modules.
+    Collects what a component refers to: simple names and dotted attribute chains
+    (function calls, class bases, name references), minus built-ins, self/cls and
+    local variables. This half of dependency collection depends only on the code,
+    so its output can be cached per file content; DependencyCollector resolves it
+    against the repository.
     """
 
-    def __init__(self, imports, from_imports: Dict[str, Set[str]], current_module: str, repo_modules: Set[str]):
-        # imports: identifier -> module_full_path (e.g. 'utils' -> 'AutoDiff.utils' or 'AutoDiff' -> 'AutoDiff.utils')
-        # from_imports: resolved_module -> set(names)
-        self.imports = imports
-        self.from_imports = from_imports
-        self.current_module = current_module
-        self.repo_modules = repo_modules
-        self.dependencies: Set[str] = set()
+    def __init__(self):
+        self.names: Dict[str, None] = {}  # ordered set
+        self.attributes: Dict[Tuple[str, ...], None] = {}
         self._current_class = None
         self.local_variables: Set[str] = set()
 
@@ -218,7 +313,7 @@ class DependencyCollector(ast.NodeVisitor):
         self._current_class = node.name
         for base in node.bases:
             if isinstance(base, ast.Name):
-                self._add_dependency(base.id)
+                self._add_name(base.id)
             elif isinstance(base, ast.Attribute):
                 self._process_attribute(base)
         self.generic_visit(node)
@@ -234,14 +329,14 @@ class DependencyCollector(ast.NodeVisitor):
         # handle direct function calls possibly imported via 'from module import func'
         if isinstance(node.func, ast.Name):
             name = node.func.id
-            self._add_dependency(name)
+            self._add_name(name)
         elif isinstance(node.func, ast.Attribute):
             self._process_attribute(node.func)
         self.generic_visit(node)
 
     def visit_Name(self, node: ast.Name):
         if isinstance(node.ctx, ast.Load):
-            self._add_dependency(node.id)
+            self._add_name(node.id)
         self.generic_visit(node)
 
     def visit_Attribute(self, node: ast.Attribute):
@@ -249,72 +344,97 @@ class DependencyCollector(ast.NodeVisitor):
         self.generic_visit(node)
 
     def _process_attribute(self, node: ast.Attribute):
-        """
-        Handles dotted expressions and resolves them to repo modules where possible.
-        Example patterns:
-          - alias.Class -> import alias maps to AutoDiff.utils -> dependency AutoDiff.utils.Class
-          - AutoDiff.utils.Class -> longest prefix match of parts (AutoDiff.utils) found in repo_modules
-          - from-import based attribute usage -> resolved via from_imports
-        """
-
+        """Record a dotted expression (e.g. module.submodule.Class.method) rooted at a name."""
         parts = []
         current = node
-        
+
         # Traverse the attribute chain (e.g., module.submodule.Class.method)
         while isinstance(current, ast.Attribute):
             parts.insert(0, current.attr)
             current = current.value
-        
+
         if isinstance(current, ast.Name):
             parts.insert(0, current.id)
-            
-            # Skip if the first part is a local variable
-            if parts[0] in self.local_variables:
+
+            # Skip if the first part is a local variable (at this point of the body)
+            # or in our excluded names
+            if parts[0] in self.local_variables or parts[0] in EXCLUDED_NAMES:
                 return
-                
-            # Skip if the first part is in our excluded names
-            if parts[0] in EXCLUDED_NAMES:
+            self.attributes[tuple(parts)] = None
+
+    def _add_name(self, name: str):
+        """Record a simple name reference unless it's a built-in or local var."""
+        if name in BUILTIN_TYPES or name in EXCLUDED_NAMES or name in self.local_variables:
+            return
+        self.names[name] = None
+
+
+class DependencyCollector:
+    """
+    Resolves the references of a component (ReferenceCollector) to dependencies
+    between code components, using the import mappings resolved by
+    ImportCollector to link to repo modules.
+    """
+
+    def __init__(self, imports, from_imports: Dict[str, Set[str]], current_module: str, repo_modules: Set[str]):
+        # imports: identifier -> module_full_path (e.g. 'utils' -> 'AutoDiff.utils' or 'AutoDiff' -> 'AutoDiff.utils')
+        # from_imports: resolved_module -> set(names)
+        self.imports = imports
+        self.from_imports = from_imports
+        self.current_module = current_module
+        self.repo_modules = repo_modules
+        self.dependencies: Set[str] = set()
+
+    def resolve(self, names: Iterable[str], attributes: Iterable[Tuple[str, ...]]) -> Set[str]:
+        for parts in attributes:
+            self._process_attribute(parts)
+        for name in names:
+            self._add_dependency(name)
+        return self.dependencies
+
+    def _process_attribute(self, parts: Tuple[str, ...]):
+        """
+        Handles dotted expressions and resolves them to repo modules where possible.
+        Example patterns:
+          - alias.Class -> import alias maps to AutoDiff.utils -> dependency AutoDiff.utils.Class
+          - AutoDiff.utils.Class -> longest prefix match of parts (AutoDiff.utils) found in repo_modules
+          - from-import based attribute usage -> resolved via from_imports
+        """
+        # Check if the first part is an imported module
+        if parts[0] in self.imports:
+            module_path = parts[0]
+            # Skip standard library modules
+            if module_path in STANDARD_MODULES:
                 return
-                
-            # Check if the first part is an imported module
-            if parts[0] in self.imports:
-                module_path = parts[0]
-                # Skip standard library modules
-                if module_path in STANDARD_MODULES:
-                    return
-                    
-                # If it's a repo module, add as dependency
-                if module_path in self.repo_modules:
-                    if len(parts) > 1:
-                        # Example: module.Class or module.function
-                        self.dependencies.add(f"{module_path}.{parts[1]}")
-            
-            # Check from imports
-            elif parts[0] in self.from_imports.keys():
-                # Skip standard library modules
-                if parts[0] in STANDARD_MODULES:
-                    return
-                    
-                # Check if the name is in the imported names
-                if len(parts) > 1 and parts[1] in self.from_imports[parts[0]]:
-                    self.dependencies.add(f"{parts[0]}.{parts[1]}")
+
+            # If it's a repo module, add as dependency
+            if module_path in self.repo_modules:
+                if len(parts) > 1:
+                    # Example: module.Class or module.function
+                    self.dependencies.add(f"{module_path}.{parts[1]}")
+
+        # Check from imports
+        elif parts[0] in self.from_imports.keys():
+            # Skip standard library modules
+            if parts[0] in STANDARD_MODULES:
+                return
+
+            # Check if the name is in the imported names
+            if len(parts) > 1 and parts[1] in self.from_imports[parts[0]]:
+                self.dependencies.add(f"{parts[0]}.{parts[1]}")
 
     def _add_dependency(self, name: str):
         """
         Add a dependency for a simple name reference:
-           - If it's a built-in or local var, ignore
            - If name was imported via 'from module import name', map to module.name
            - Otherwise assume local module reference current_module.name
         """
-        if name in BUILTIN_TYPES or name in EXCLUDED_NAMES or name in self.local_variables:
-            return
-
         # Check from_imports first
         for module, imported_names in self.from_imports.items():
             # Skip standard library modules
             if module in STANDARD_MODULES:
                 continue
-                
+
             if name in imported_names and module in self.repo_modules:
                 self.dependencies.add(f"{module}.{name}")
                 return
@@ -324,6 +444,95 @@ class DependencyCollector(ast.NodeVisitor):
         self.dependencies.add(local_component_id)
 
 
+class SourceIndex:
+    """
+    Line start offsets of one file's source, computed in a single pass.
+
+    AST column offsets are UTF-8 byte offsets, so segments are cut from the encoded
+    buffer: each lookup is a slice instead of re-splitting the whole file as
+    ast.get_source_segment does on every call.
+    """
+
+    def __init__(self, source: str):
+        self.buffer = source.encode("utf-8")
+        self.line_starts = [0]
+        position = self.buffer.find(b"\n")
+        while position != -1:
+            self.line_starts.append(position + 1)
+            position = self.buffer.find(b"\n", position + 1)
+
+    def _line_end(self, lineno: int) -> int:
+        """Offset just past the last character of a line (newline excluded)."""
+        if lineno < len(self.line_starts):
+            return self.line_starts[lineno] - 1
+        return len(self.buffer)
+
+    def view(self, node: ast.AST) -> memoryview:
+        """Zero-copy view of the node's source in the encoded buffer."""
+        end_lineno = getattr(node, "end_lineno", None) or node.lineno
+        end_col_offset = getattr(node, "end_col_offset", None)
+        if end_col_offset is None:
+            # No column information: whole lines, like the line-based fallback
+            start = self.line_starts[node.lineno - 1]
+            end = self._line_end(end_lineno)
+        else:
+            start = self.line_starts[node.lineno - 1] + node.col_offset
+            end = self.line_starts[end_lineno - 1] + end_col_offset
+        return memoryview(self.buffer)[start:end]
+
+    def segment(self, node: ast.AST) -> str:
+        """Same text as ast.get_source_segment(source, node)."""
+        return str(self.view(node), "utf-8")
+
+
+def component_fingerprint(node: ast.AST, component_type: str) -> str:
+    """
+    Content hash of a component's normalized AST.
+
+    ast.dump without attributes drops line/column information, so formatting,
+    whitespace and comments do not affect the hash. The component ID (module and
+    class qualification) is not part of it either, which lets identical code living
+    in different modules share one fingerprint. Names used inside the code are kept,
+    since renaming them changes what the documentation has to say.
+    """
+    dumped = ast.dump(node, annotate_fields=False, include_attributes=False)
+    return hashlib.sha256(f"{component_type}:{dumped}".encode("utf-8")).hexdigest()
+
+
+# Nodes that add a branch to the control flow
+_BRANCH_NODES = {ast.If, ast.IfExp, ast.For, ast.AsyncFor, ast.While, ast.ExceptHandler,
+                 ast.Assert, ast.match_case}
+
+
+def cyclomatic_complexity(node: ast.AST, measured: Optional[Dict[int, int]] = None) -> int:
+    """
+    McCabe complexity of a component: 1 plus one for every branch (if, loop, except,
+    assert, match case), every extra operand of and/or and every comprehension loop
+    and filter. Nested functions and a class's methods count towards it, as they are
+    part of the source documented with the component.
+
+    measured maps the id() of subtrees whose complexity is already known (a class's
+    methods) to it, so they are not walked again.
+    """
+    complexity = 1
+    stack = [node]
+    while stack:
+        child = stack.pop()
+        kind = type(child)
+        if kind in _BRANCH_NODES:
+            complexity += 1
+        elif kind is ast.BoolOp:
+            complexity += len(child.values) - 1
+        elif kind is ast.comprehension:
+            complexity += 1 + len(child.ifs)
+        for grandchild in ast.iter_child_nodes(child):
+            if measured and id(grandchild) in measured:
+                complexity += measured[id(grandchild)] - 1
+            else:
+                stack.append(grandchild)
+    return complexity
+
+
 def add_parent_to_nodes(tree: ast.AST) -> None:
     """
     Add a 'parent' attribute to each node in the AST for upward navigation.
@@ -338,24 +547,59 @@ class DependencyParser:
     Parses Python code to build a dependency graph between code components.
     """
 
-    def __init__(self, repo_path: str):
+    def __init__(self, repo_path: str, parse_cache=None):
+        """parse_cache: optional utils.parse_cache.ParseCache shared across repositories."""
         self.repo_path = os.path.abspath(repo_path)
+        self.parse_cache = parse_cache
         self.components: Dict[str, CodeComponent] = {}
+        # Parse-time records, replaced by frozen CodeComponents once parsing is done
+        self._parsed: Dict[str, ParsedComponent] = {}
         self.dependency_graph: Dict[str, List[str]] = {}
         self.modules: Set[str] = set()
 
     def parse_repository(self):
         logger.info(f"Parsing repository at {self.repo_path}")
 
-        # First pass: collect modules and code components
+        for _ in self.iter_parsed_files():
+            pass
+
+        if self.parse_cache is not None:
+            self.parse_cache.flush()
+            logger.info(f"Parse cache: {self.parse_cache.stats.stats()}")
+
+        # Resolve dependencies (drop references to components that do not exist)
+        self._resolve_dependencies()
+
+        # Freeze into compact, AST-free records
+        self.components = {comp_id: component.freeze() for comp_id, component in self._parsed.items()}
+        self._parsed = {}
+
+        logger.info(f"Found {len(self.components)} code components")
+        return self.components
+
+    def parse_files(self, relative_paths: Iterable[str], known_ids: Iterable[str] = ()) -> Dict[str, CodeComponent]:
         """
-        os.walk - Goes through all the files in the directory either topdown or bottom up way.
-        file_to_module_path = converts mod1/mod2/file to mod1.mod2.file where mod1 is relative to repo_path.
-        self.modules - This will have all the files that end with .py with relative path to repo_path.
-        
-        Result:
-            self.modules will have all the python files with their relative paths.
+        Re-parse only the given files (paths relative to the repository; deleted
+        files are skipped). Dependencies are kept if they point at a component of
+        these files or at one of known_ids, the components of the rest of the graph.
         """
+        self.modules = {module_path for _, _, module_path in self._python_files()}
+        self._parsed = {}
+        for relative_path in relative_paths:
+            file_path = os.path.join(self.repo_path, relative_path)
+            if not relative_path.endswith(".py") or not os.path.isfile(file_path):
+                continue
+            module_path = self._file_to_module_path(relative_path)
+            file_components = self._parse_file(file_path, relative_path, module_path)
+            self._add_class_method_dependencies(file_components)
+
+        self._resolve_dependencies(set(known_ids))
+        components = {comp_id: component.freeze() for comp_id, component in self._parsed.items()}
+        self._parsed = {}
+        return components
+
+    def _python_files(self):
+        """Yield (file_path, relative_path, module_path) for every .py file of the repository."""
         for root, _, files in os.walk(self.repo_path):
             for file in files:
                 if not file.endswith(".py"):
@@ -363,257 +607,288 @@ class DependencyParser:
 
                 file_path = os.path.join(root, file)
                 relative_path = os.path.relpath(file_path, self.repo_path)
-                module_path = self._file_to_module_path(relative_path)
-                self.modules.add(module_path)
+                yield file_path, relative_path, self._file_to_module_path(relative_path)
+
+    def iter_parsed_files(self):
+        """
+        Parse the repository one file at a time, yielding (module_path, components)
+        as soon as each file is done. Dependencies of the yielded ParsedComponents
+        are not filtered yet: references into files that come later cannot be
+        checked until those files have been parsed.
+        """
+        # First pass: collect modules
+        """
+        os.walk - Goes through all the files in the directory either topdown or bottom up way.
+        file_to_module_path = converts mod1/mod2/file to mod1.mod2.file where mod1 is relative to repo_path.
+        self.modules - This will have all the files that end with .py with relative path to repo_path.
+        
+        Result:
+            self.modules will have all the python files with their relative paths.
+        """
+        for _, _, module_path in self._python_files():
+            self.modules.add(module_path)
 
         # Second pass: parse files (now that self.modules is populated)
         """
         For every file in the repo perform parsing.
         """
-        for root, _, files in os.walk(self.repo_path):
-            for file in files:
-                if not file.endswith(".py"):
-                    continue
-
-                file_path = os.path.join(root, file)
-                relative_path = os.path.relpath(file_path, self.repo_path)
-                module_path = self._file_to_module_path(relative_path)
-                self._parse_file(file_path, relative_path, module_path)
+        for file_path, relative_path, module_path in self._python_files():
+            file_components = self._parse_file(file_path, relative_path, module_path)
 
-        # Resolve dependencies (analyze component bodies)
-        self._resolve_dependencies()
-
-        # Add method dependencies to classes
-        self._add_class_method_dependencies()
-
-        logger.info(f"Found {len(self.components)} code components")
-        return self.components
+            # Add method dependencies to classes
+            self._add_class_method_dependencies(file_components)
+            yield module_path, file_components
 
     def _file_to_module_path(self, file_path: str) -> str:
         """Convert a file path (relative to repo) to a Python module path (dotted)."""
         path = file_path[:-3] if file_path.endswith(".py") else file_path
         return path.replace(os.path.sep, ".")
 
-    def _parse_file(self, file_path: str, relative_path: str, module_path: str):
+    def _parse_file(self, file_path: str, relative_path: str, module_path: str) -> List[ParsedComponent]:
         """
         Parse a single Python file to collect code components.
-        
-        ast.parse(code) - This will give all the component types in the code.
-        eg: <ast.ImportFrom object at 0x000001EFBEE4E410>
-            <ast.ClassDef object at 0x000001EFBEE4E3B0>
 
-        add_parent_to_nodes(tree) - Parent->Child link is already established in AST tree by default.
-                                    This function add child->parent backward link
-                
+        The repository-independent part (_extract_file_record) is taken from the parse
+        cache when a file with the same content was parsed before, in any repository;
+        only import resolution and the module-qualified IDs are computed per repository.
         """
 
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                source = f.read()
-
-            tree = ast.parse(source)
-            add_parent_to_nodes(tree)
+            with open(file_path, "rb") as f:
+                data = f.read()
 
-            # Collect imports with repo-aware resolution
-            import_collector = ImportCollector(module_path, self.modules)
-            import_collector.visit(tree)
+            record = self.parse_cache.get(data) if self.parse_cache is not None else None
+            if record is None:
+                started = time.perf_counter()
+                record = self._extract_file_record(_decode_source(data))
+                if self.parse_cache is not None:
+                    self.parse_cache.put(data, record, time.perf_counter() - started)
 
-            # Collect code components
-            self._collect_components(tree, file_path, relative_path, module_path, source)
+            return self._add_file_record(record, file_path, relative_path, module_path)
 
         except (SyntaxError, UnicodeDecodeError) as e:
             logger.warning(f"Error parsing {file_path}: {e}")
+            return []
+
+    def _extract_file_record(self, source: str) -> FileRecord:
+        """
+        ast.parse(code) - This will give all the component types in the code.
+        eg: <ast.ImportFrom object at 0x000001EFBEE4E410>
+            <ast.ClassDef object at 0x000001EFBEE4E3B0>
+
+        The references of the file's components are collected right away, so the
+        file's AST can be released before the next file is parsed.
+        """
+        tree = ast.parse(source)
 
-    def _collect_components(self, tree: ast.AST, file_path: str, relative_path: str,
-                            module_path: str, source: str):
-        """Collect classes, top-level functions, methods and assignments (top-level)."""
+        # Imports as written; resolving them needs the repository
+        import_collector = ImportCollector(None, set())
+        import_collector.visit(tree)
+
+        # Collect code components; records replaced by a later definition with the same name are dropped
+        file_components = self._collect_components(tree, source)
+        latest = {component.id: component for component in file_components}
+
+        records = []
+        for component in file_components:
+            if latest[component.id] is not component:
+                continue
+            records.append(self._component_record(component))
+            component.node = None
+
+        return FileRecord(
+            imports=tuple(sorted(import_collector.imports)),
+            from_imports=tuple(import_collector.raw_from_imports),
+            components=tuple(records),
+        )
+
+    def _collect_components(self, tree: ast.AST, source: str) -> List[ParsedComponent]:
+        """
+        Collect classes, top-level functions, methods and assignments (top-level).
+        IDs are relative to the module (Class.method) and file paths are left empty;
+        _add_file_record fills both in for the repository. The cyclomatic complexity
+        of each component is measured while its AST is at hand; the metrics that need
+        the graph are derived later (docgen.routing.component_metrics).
+        """
+        index = SourceIndex(source)
+        top_level = {id(node) for node in tree.body}
+        file_components: List[ParsedComponent] = []
         for node in ast.walk(tree):
             if isinstance(node, ast.ClassDef):
-                class_id = f"{module_path}.{node.name}"
-                has_docstring = (
-                    len(node.body) > 0
-                    and isinstance(node.body[0], ast.Expr)
-                    and isinstance(node.body[0].value, ast.Constant)
-                    and isinstance(node.body[0].value.value, str)
-                )
-                docstring = self._get_docstring(source, node) if has_docstring else ""
-                component = CodeComponent(
+                class_id = node.name
+                docstring_node = self._docstring_node(node)
+                has_docstring = docstring_node is not None
+                docstring = self._get_docstring(docstring_node)
+                component = ParsedComponent(
                     id=class_id,
                     node=node,
                     component_type="class",
-                    file_path=file_path,
-                    relative_path=relative_path,
-                    source_code=self._get_source_segment(source, node),
+                    file_path="",
+                    relative_path="",
+                    source_code=self._get_source_segment(index, node),
                     start_line=node.lineno,
                     end_line=getattr(node, "end_lineno", node.lineno),
                     has_docstring=has_docstring,
-                    docstring=docstring
+                    docstring=docstring,
+                    fingerprint=component_fingerprint(node, "class")
                 )
-                self.components[class_id] = component
+                file_components.append(component)
 
                 # methods
+                measured = {}
                 for item in node.body:
                     if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
                         method_id = f"{class_id}.{item.name}"
-                        method_has_docstring = (
-                            len(item.body) > 0
-                            and isinstance(item.body[0], ast.Expr)
-                            and isinstance(item.body[0].value, ast.Constant)
-                            and isinstance(item.body[0].value.value, str)
-                        )
-                        method_docstring = self._get_docstring(source, item) if method_has_docstring else ""
-                        method_component = CodeComponent(
+                        method_docstring_node = self._docstring_node(item)
+                        method_has_docstring = method_docstring_node is not None
+                        method_docstring = self._get_docstring(method_docstring_node)
+                        method_component = ParsedComponent(
                             id=method_id,
                             node=item,
                             component_type="method",
-                            file_path=file_path,
-                            relative_path=relative_path,
-                            source_code=self._get_source_segment(source, item),
+                            file_path="",
+                            relative_path="",
+                            source_code=self._get_source_segment(index, item),
                             start_line=item.lineno,
                             end_line=getattr(item, "end_lineno", item.lineno),
                             has_docstring=method_has_docstring,
-                            docstring=method_docstring
+                            docstring=method_docstring,
+                            fingerprint=component_fingerprint(item, "method"),
+                            complexity=cyclomatic_complexity(item)
                         )
-                        self.components[method_id] = method_component
+                        file_components.append(method_component)
+                        measured[id(item)] = method_component.complexity
+                component.complexity = cyclomatic_complexity(node, measured)
 
             elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
                 # Only collect top-level functions
-                if hasattr(node, 'parent') and isinstance(node.parent, ast.Module):
-                    func_id = f"{module_path}.{node.name}"
-                    has_docstring = (
-                        len(node.body) > 0
-                        and isinstance(node.body[0], ast.Expr)
-                        and isinstance(node.body[0].value, ast.Constant)
-                        and isinstance(node.body[0].value.value, str)
-                    )
-                    docstring = self._get_docstring(source, node) if has_docstring else ""
-                    component = CodeComponent(
+                if id(node) in top_level:
+                    func_id = node.name
+                    docstring_node = self._docstring_node(node)
+                    has_docstring = docstring_node is not None
+                    docstring = self._get_docstring(docstring_node)
+                    component = ParsedComponent(
                         id=func_id,
                         node=node,
                         component_type="function",
-                        file_path=file_path,
-                        relative_path=relative_path,
-                        source_code=self._get_source_segment(source, node),
+                        file_path="",
+                        relative_path="",
+                        source_code=self._get_source_segment(index, node),
                         start_line=node.lineno,
                         end_line=getattr(node, "end_lineno", node.lineno),
                         has_docstring=has_docstring,
-                        docstring=docstring
+                        docstring=docstring,
+                        fingerprint=component_fingerprint(node, "function"),
+                        complexity=cyclomatic_complexity(node)
                     )
-                    self.components[func_id] = component
+                    file_components.append(component)
 
             elif isinstance(node, ast.Assign):
                 # top-level assignments
-                if hasattr(node, 'parent') and isinstance(node.parent, ast.Module):
+                if id(node) in top_level:
                     for target in node.targets:
                         if isinstance(target, ast.Name):
-                            assign_id = f"{module_path}.{target.id}"
-                            component = CodeComponent(
+                            assign_id = target.id
+                            component = ParsedComponent(
                                 id=assign_id,
                                 node=node,
                                 component_type="assignment",
-                                file_path=file_path,
-                                relative_path=relative_path,
-                                source_code=self._get_source_segment(source, node),
+                                file_path="",
+                                relative_path="",
+                                source_code=self._get_source_segment(index, node),
                                 start_line=node.lineno,
-                                end_line=getattr(node, "end_lineno", node.lineno)
+                                end_line=getattr(node, "end_lineno", node.lineno),
+                                fingerprint=component_fingerprint(node, "assignment"),
+                                complexity=cyclomatic_complexity(node)
                             )
-                            self.components[assign_id] = component
+                            file_components.append(component)
+
+        return file_components
+
+    def _component_record(self, component: ParsedComponent) -> ComponentRecord:
+        """Analyze a collected component's AST node for the names it refers to."""
+        component_node = component.node
+        reference_collector = ReferenceCollector()
+
+        # For functions and methods, collect variables defined in the function
+        if isinstance(component_node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            # Add function parameters to local variables
+            for arg in component_node.args.args:
+                reference_collector.local_variables.add(arg.arg)
+
+        elif hasattr(component_node, "args"):
+            for arg in component_node.args.args:
+                reference_collector.local_variables.add(arg.arg)
+
+        reference_collector.visit(component_node)
+
+        return ComponentRecord(
+            name=component.id,
+            component_type=component.component_type,
+            source_code=component.source_code,
+            start_line=component.start_line,
+            end_line=component.end_line,
+            has_docstring=component.has_docstring,
+            docstring=component.docstring,
+            fingerprint=component.fingerprint,
+            names=tuple(reference_collector.names),
+            attributes=tuple(reference_collector.attributes),
+            complexity=component.complexity,
+        )
 
-    def _resolve_dependencies(self):
+    def _add_file_record(self, record: FileRecord, file_path: str, relative_path: str,
+                         module_path: str) -> List[ParsedComponent]:
+        """Qualify a file record's components for this repository and resolve their dependencies."""
+        import_collector = ImportCollector(module_path, self.modules)
+        import_collector.imports = set(record.imports)
+        for module, level, names in record.from_imports:
+            import_collector.add_from_import(module, level, names)
+
+        file_components = []
+        for component_record in record.components:
+            dependency_collector = DependencyCollector(
+                import_collector.imports,
+                import_collector.from_imports,
+                module_path,
+                self.modules
+            )
+            component = ParsedComponent(
+                id=f"{module_path}.{component_record.name}",
+                node=None,
+                component_type=component_record.component_type,
+                file_path=file_path,
+                relative_path=relative_path,
+                depends_on=dependency_collector.resolve(component_record.names, component_record.attributes),
+                source_code=component_record.source_code,
+                start_line=component_record.start_line,
+                end_line=component_record.end_line,
+                has_docstring=component_record.has_docstring,
+                docstring=component_record.docstring,
+                fingerprint=component_record.fingerprint,
+                complexity=component_record.complexity
+            )
+            self._parsed[component.id] = component
+            file_components.append(component)
+        return file_components
+
+    def _resolve_dependencies(self, known_ids: Set[str] = frozenset()):
         """
-        Analyze each collected component's AST node to discover dependencies.
+        Filter out dependencies that do not point at a component of the repository
+        (needs every file to be parsed first, or the IDs of the others in known_ids).
         """
-        for component_id, component in list(self.components.items()):
-            file_path = component.file_path
-
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    source = f.read()
-
-                tree = ast.parse(source)
-                add_parent_to_nodes(tree)
-
-                # Collect imports for this file (with repo context)
-                import_collector = ImportCollector(self._file_to_module_path(component.relative_path), self.modules)
-                import_collector.visit(tree)
-
-                # Identify the relevant AST node for this component
-                component_node = None
-                module_path = self._file_to_module_path(component.relative_path)
+        for component in self._parsed.values():
+            component.depends_on = {
+                dep for dep in component.depends_on
+                if dep in self._parsed or dep in known_ids or dep.split(".", 1)[0] in self.modules
+            }
 
-                if component.component_type == "function":
-                    for node in ast.iter_child_nodes(tree):
-                        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == component.id.split(".")[-1]:
-                            component_node = node
-                            break
-
-                elif component.component_type == "assignment":
-                    for node in ast.iter_child_nodes(tree):
-                        if isinstance(node, ast.Assign):
-                            if any(isinstance(t, ast.Name) and f"{module_path}.{t.id}" == component_id for t in node.targets):
-                                component_node = node
-                                break
-
-                elif component.component_type == "class":
-                    for node in ast.iter_child_nodes(tree):
-                        if isinstance(node, ast.ClassDef) and node.name == component.id.split(".")[-1]:
-                            component_node = node
-                            break
-
-                elif component.component_type == "method":
-                    # Find method inside class
-                    class_name, method_name = component.id.split(".")[-2:]
-                    class_node = None
-                    
-                    for node in ast.iter_child_nodes(tree):
-                        if isinstance(node, ast.ClassDef) and node.name == class_name:
-                            class_node = node
-                            for item in node.body:
-                                if (isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) 
-                                        and item.name == method_name):
-                                    component_node = item
-                                    break
-                            break
-                
-                if component_node:
-                    # Collect dependencies for this specific component
-                    dependency_collector = DependencyCollector(
-                        import_collector.imports,
-                        import_collector.from_imports,
-                        module_path,
-                        self.modules
-                    )
-                    
-                    # For functions and methods, collect variables defined in the function
-                    if isinstance(component_node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                        # Add function parameters to local variables
-                        for arg in component_node.args.args:
-                            dependency_collector.local_variables.add(arg.arg)
-                    
-                    elif hasattr(component_node, "args"):
-                        for arg in component_node.args.args:
-                            dependency_collector.local_variables.add(arg.arg)
-                            
-                    dependency_collector.visit(component_node)
-                    
-                    # Add dependencies to the component
-                    component.depends_on.update(dependency_collector.dependencies)
-                    
-                    # Filter out non-existent dependencies
-                    component.depends_on = {
-                        dep for dep in component.depends_on 
-                        if dep in self.components or dep.split(".", 1)[0] in self.modules
-                    }
-                
-            except (SyntaxError, UnicodeDecodeError) as e:
-                logger.warning(f"Error analyzing dependencies in {file_path}: {e}")
-
-    def _add_class_method_dependencies(self):
+    def _add_class_method_dependencies(self, file_components: List[ParsedComponent]):
         """
         Make classes depend on their methods (except __init__).
         """
         class_methods: Dict[str, List[str]] = {}
-        for component_id, component in self.components.items():
+        for component in file_components:
+            component_id = component.id
             if component.component_type == "method":
                 parts = component_id.split(".")
                 if len(parts) >= 2:
@@ -629,41 +904,33 @@ class DependencyParser:
         
         # Add method dependencies to their classes
         for class_id, method_ids in class_methods.items():
-            if class_id in self.components:
-                class_component = self.components[class_id]
+            if class_id in self._parsed:
+                class_component = self._parsed[class_id]
                 for method_id in method_ids:
                     class_component.depends_on.add(method_id)
 
-    def _get_source_segment(self, source: str, node: ast.AST) -> str:
+    def _get_source_segment(self, index: 'SourceIndex', node: ast.AST) -> str:
         try:
-            if hasattr(ast, "get_source_segment"):
-                segment = ast.get_source_segment(source, node)
-                if segment is not None:
-                    return segment
-            lines = source.split("\n")
-            start_line = node.lineno - 1
-            end_line = getattr(node, "end_lineno", node.lineno) - 1
-            return "\n".join(lines[start_line:end_line + 1])
+            return index.segment(node)
         except Exception as e:
             logger.warning(f"Error getting source segment: {e}")
             return ""
 
-    def _get_docstring(self, source: str, node: ast.AST) -> str:
-        try:
-            if isinstance(node, ast.FunctionDef) or isinstance(node, ast.AsyncFunctionDef):
-                for item in node.body:
-                    if isinstance(item, ast.Expr) and isinstance(item.value, ast.Constant):
-                        if isinstance(item.value.value, str):
-                            return item.value.value
-            elif isinstance(node, ast.ClassDef):
-                for item in node.body:
-                    if isinstance(item, ast.Expr) and isinstance(item.value, ast.Constant):
-                        if isinstance(item.value.value, str):
-                            return item.value.value
-            return ""
-        except Exception as e:
-            logger.warning(f"Error getting docstring: {e}")
-            return ""
+    @staticmethod
+    def _docstring_node(node: ast.AST) -> Optional[ast.Constant]:
+        """Return the string constant of the node's docstring, or None if it has none."""
+        body = getattr(node, "body", None)
+        if (
+            body
+            and isinstance(body[0], ast.Expr)
+            and isinstance(body[0].value, ast.Constant)
+            and isinstance(body[0].value.value, str)
+        ):
+            return body[0].value
+        return None
+
+    def _get_docstring(self, docstring_node: Optional[ast.Constant]) -> str:
+        return docstring_node.value if docstring_node is not None else ""
 
     def save_dependency_graph(self, output_path: str):
         serializable_components = {comp_id: comp.to_dict() for comp_id, comp in self.components.items()}
@@ -0,0 +1,199 @@
+"""
+Precomputed reachability index for dependency and impact queries.
+
+The index is built once per dependency graph over its SCC-condensed DAG (see
+utils.toposort.condense_graph). Every unit gets a post-order number from a DFS
+spanning forest, and its transitive closure is stored as a short list of merged
+post-order intervals (interval-labelled transitive closure). Members of one SCC
+share the same unit, so they reach each other and everything the unit reaches.
+
+Queries:
+  - reaches(a, b): binary search over a's intervals, O(log k)
+  - closure(node): everything node depends on, directly or transitively, in the
+    preorder of a depth-first walk of the dependencies in their given order (the
+    order docgen.retriever.retrieve documents them in), computed once per node
+  - impact(node): everything that depends on node ("what breaks if I change X")
+"""
+
+import logging
+from bisect import bisect_right
+from typing import Dict, List, Set, Tuple, Any, Iterable
+
+from .toposort import condense_graph
+
+logger = logging.getLogger(__name__)
+
+
+class _IntervalLabels:
+    """Interval-labelled transitive closure of a DAG given as unit -> successor units."""
+
+    def __init__(self, dag: Dict[int, Set[int]]):
+        has_incoming = set()
+        for successors in dag.values():
+            has_incoming.update(successors)
+
+        self.post: Dict[int, int] = {}
+        self.by_post: List[int] = []
+        low: Dict[int, int] = {}
+
+        # Iterative DFS over the spanning forest, roots first
+        roots = [unit for unit in sorted(dag) if unit not in has_incoming]
+        for root in roots + sorted(dag):
+            if root in low:
+                continue
+            low[root] = len(self.by_post)
+            work = [(root, iter(sorted(dag[root])))]
+            while work:
+                unit, successors = work[-1]
+                for successor in successors:
+                    if successor not in low:
+                        low[successor] = len(self.by_post)
+                        work.append((successor, iter(sorted(dag[successor]))))
+                        break
+                else:
+                    work.pop()
+                    self.post[unit] = len(self.by_post)
+                    self.by_post.append(unit)
+
+        # In a DAG every successor finishes before its predecessor, so labels can be
+        # built in increasing post-order from the labels of the successors
+        self.starts: Dict[int, List[int]] = {}
+        self.ends: Dict[int, List[int]] = {}
+        for unit in self.by_post:
+            own = (low[unit], self.post[unit])
+            # Successors whose whole label lies inside the own tree interval, or that
+            # are reachable from another successor, add nothing new
+            successors = [
+                successor for successor in sorted(dag[unit], key=self.post.get, reverse=True)
+                if not (own[0] <= self.starts[successor][0] and self.ends[successor][-1] <= own[1])
+            ]
+            kept = []
+            for successor in successors:
+                if not any(self.reaches(other, successor) for other in kept):
+                    kept.append(successor)
+            if not kept:
+                self.starts[unit] = [own[0]]
+                self.ends[unit] = [own[1]]
+                continue
+            intervals = [own]
+            for successor in kept:
+                intervals.extend(zip(self.starts[successor], self.ends[successor]))
+            self.starts[unit], self.ends[unit] = self._merge(intervals)
+
+    @staticmethod
+    def _merge(intervals: List[Tuple[int, int]]) -> Tuple[List[int], List[int]]:
+        intervals.sort()
+        starts, ends = [intervals[0][0]], [intervals[0][1]]
+        last_end = ends[0]
+        for start, end in intervals:
+            if start <= last_end + 1:
+                if end > last_end:
+                    last_end = ends[-1] = end
+            else:
+                starts.append(start)
+                ends.append(end)
+                last_end = end
+        return starts, ends
+
+    def reaches(self, source: int, target: int) -> bool:
+        number = self.post[target]
+        starts = self.starts[source]
+        i = bisect_right(starts, number) - 1
+        return i >= 0 and number <= self.ends[source][i]
+
+    def reachable(self, source: int) -> List[int]:
+        """Units reachable from source (itself included), in decreasing post-order."""
+        units = []
+        for start, end in zip(reversed(self.starts[source]), reversed(self.ends[source])):
+            units.extend(self.by_post[number] for number in range(end, start - 1, -1))
+        return units
+
+    def size(self) -> int:
+        return sum(len(starts) for starts in self.starts.values())
+
+
+class ReachabilityIndex:
+    """
+    Forward (dependencies) and reverse (dependents) reachability over a dependency
+    graph (node -> set of dependencies). Build it once per graph and reuse it for
+    every query.
+    """
+
+    def __init__(self, graph: Dict[str, Iterable[str]]):
+        # Dependencies in their given order, for the closure() walk
+        self._deps: Dict[str, List[str]] = {
+            node: [dep for dep in deps if dep in graph] for node, deps in graph.items()
+        }
+        self._closures: Dict[str, List[str]] = {}
+        graph = {node: set(deps) for node, deps in self._deps.items()}
+        self.unit_of, condensed, self.units = condense_graph(graph)
+
+        reverse: Dict[int, Set[int]] = {unit: set() for unit in condensed}
+        for unit, deps in condensed.items():
+            for dep in deps:
+                reverse[dep].add(unit)
+
+        self._forward = _IntervalLabels(condensed)
+        self._reverse = _IntervalLabels(reverse)
+        logger.info(f"Reachability index: {len(self.unit_of)} nodes, {len(self.units)} units, "
+                    f"{self._forward.size()} forward / {self._reverse.size()} reverse intervals")
+
+    @classmethod
+    def from_components(cls, components: Dict[str, Dict[str, Any]]) -> 'ReachabilityIndex':
+        """Build from the serialized dependency graph (component ID -> component dict)."""
+        return cls({comp_id: comp["depends_on"] for comp_id, comp in components.items()})
+
+    def __contains__(self, node: str) -> bool:
+        return node in self.unit_of
+
+    def reaches(self, source: str, target: str) -> bool:
+        """True if source depends on target, directly or transitively."""
+        if source not in self.unit_of or target not in self.unit_of:
+            return False
+        if source == target:
+            return True
+        return self._forward.reaches(self.unit_of[source], self.unit_of[target])
+
+    def _expand(self, node: str, labels: _IntervalLabels, include_self: bool) -> List[str]:
+        if node not in self.unit_of:
+            return []
+        own_unit = self.unit_of[node]
+        nodes = []
+        for unit in labels.reachable(own_unit):
+            members = self.units[unit]
+            if unit == own_unit:
+                # The node itself first, then the rest of its cycle
+                members = ((node,) if include_self else ()) + tuple(m for m in members if m != node)
+            nodes.extend(members)
+        return nodes
+
+    def _preorder(self, node: str) -> List[str]:
+        """Iterative equivalent of the recursive DFS of docgen.retriever.retrieve."""
+        order = [node]
+        seen = {node}
+        work = [iter(self._deps[node])]
+        while work:
+            for dep in work[-1]:
+                if dep not in seen:
+                    seen.add(dep)
+                    order.append(dep)
+                    work.append(iter(self._deps[dep]))
+                    break
+            else:
+                work.pop()
+        return order
+
+    def closure(self, node: str, include_self: bool = False) -> List[str]:
+        """Everything node depends on, in depth-first preorder (node itself first if
+        include_self). The walk is done once per node and cached, so every caller
+        asking for the same entry point shares it."""
+        if node not in self.unit_of:
+            return []
+        order = self._closures.get(node)
+        if order is None:
+            order = self._closures[node] = self._preorder(node)
+        return order[:] if include_self else order[1:]
+
+    def impact(self, node: str, include_self: bool = False) -> List[str]:
+        """Everything that depends on node, i.e. what may break if node changes."""
+        return self._expand(node, self._reverse, include_self)
@@ -7,7 +7,8 @@ including detection and resolution of dependency cycles.
 """
 
 import logging
-from typing import Dict, List, Set, Tuple, Any, Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple, Any, Optional, Iterable
 from collections import defaultdict, deque
 
 logger = logging.getLogger(__name__)
@@ -24,51 +25,61 @@ def detect_cycles(graph: Dict[str, Set[str]]) -> List[List[str]]:
     Returns:
         A list of lists, where each inner list contains the nodes in a cycle
     """
-    # Implementation of Tarjan's algorithm
-    index_counter = [0]
+    # Implementation of Tarjan's algorithm, iterative so deep graphs do not hit
+    # the recursion limit
+    index_counter = 0
     index = {}  # node -> index
     lowlink = {}  # node -> lowlink value
     onstack = set()  # nodes currently on the stack
     stack = []  # stack of nodes
     result = []  # list of cycles (strongly connected components)
     
-    def strongconnect(node):
+    def visit(node):
+        nonlocal index_counter
         # Set the depth index for node
-        index[node] = index_counter[0]
-        lowlink[node] = index_counter[0]
-        index_counter[0] += 1
+        index[node] = index_counter
+        lowlink[node] = index_counter
+        index_counter += 1
         stack.append(node)
         onstack.add(node)
-        
-        # Consider successors
-        for successor in graph.get(node, set()):
-            if successor not in index:
-                # Successor has not yet been visited; recurse on it
-                strongconnect(successor)
-                lowlink[node] = min(lowlink[node], lowlink[successor])
-            elif successor in onstack:
-                # Successor is on the stack and hence in the current SCC
-                lowlink[node] = min(lowlink[node], index[successor])
-        
-        # If node is a root node, pop the stack and generate an SCC
-        if lowlink[node] == index[node]:
-            # Start a new strongly connected component
-            scc = []
-            while True:
-                successor = stack.pop()
-                onstack.remove(successor)
-                scc.append(successor)
-                if successor == node:
-                    break
-            
-            # Only include SCCs with more than one node (actual cycles)
-            if len(scc) > 1:
-                result.append(scc)
+        return (node, iter(graph.get(node, set())))
     
     # Visit each node
-    for node in graph:
-        if node not in index:
-            strongconnect(node)
+    for root in graph:
+        if root in index:
+            continue
+        work = [visit(root)]
+        while work:
+            node, successors = work[-1]
+            # Consider successors
+            for successor in successors:
+                if successor not in index:
+                    # Successor has not yet been visited; descend into it
+                    work.append(visit(successor))
+                    break
+                elif successor in onstack:
+                    # Successor is on the stack and hence in the current SCC
+                    lowlink[node] = min(lowlink[node], index[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                
+                # If node is a root node, pop the stack and generate an SCC
+                if lowlink[node] == index[node]:
+                    # Start a new strongly connected component
+                    scc = []
+                    while True:
+                        successor = stack.pop()
+                        onstack.remove(successor)
+                        scc.append(successor)
+                        if successor == node:
+                            break
+                    
+                    # Only include SCCs with more than one node (actual cycles)
+                    if len(scc) > 1:
+                        result.append(scc)
     
     return result
 
@@ -159,8 +170,8 @@ def topological_sort(graph: Dict[str, Set[str]]) -> List[str]:
     # Check if the sort was successful (all nodes included)
     if len(result) != len(acyclic_graph):
         logger.warning("Topological sort failed: graph has cycles that weren't resolved")
-        # Return all nodes in some order to avoid breaking the process
-        return list(acyclic_graph.keys())
+        # Fall back to the SCC-condensed order, which is still dependencies first
+        return build_work_plan(graph).order()
     
     # Reverse the result to get dependencies first
     return result[::-1]
@@ -262,4 +273,122 @@ def build_graph_from_components(components: Dict[str, Any]) -> Dict[str, Set[str
             if dep_id in components:
                 graph[comp_id].add(dep_id)
     
-    return graph 
\ No newline at end of file
+    return graph 
+
+@dataclass
+class WorkPlan:
+    """
+    Level-parallel schedule of a dependency graph.
+
+    Strongly connected components are collapsed into a single unit (a tuple of the
+    member node IDs), so the condensed graph is always a DAG. levels[0] holds the
+    units with no dependencies; every unit in levels[i] only depends on units in
+    earlier levels, so all units of one level can be processed at the same time.
+    """
+    levels: List[List[Tuple[str, ...]]] = field(default_factory=list)
+    cycles: List[List[str]] = field(default_factory=list)
+
+    @property
+    def widths(self) -> List[int]:
+        """Number of units per level."""
+        return [len(level) for level in self.levels]
+
+    def order(self) -> List[str]:
+        """All nodes flattened level by level (dependencies first)."""
+        return [node for level in self.levels for unit in level for node in unit]
+
+    def stats(self) -> Dict[str, Any]:
+        widths = self.widths
+        units = sum(widths)
+        return {
+            "nodes": sum(len(unit) for level in self.levels for unit in level),
+            "units": units,
+            "levels": len(widths),
+            "cycles": len(self.cycles),
+            "largest_cycle": max((len(c) for c in self.cycles), default=0),
+            "max_width": max(widths, default=0),
+            "mean_width": units / len(widths) if widths else 0.0,
+            "widths": widths,
+        }
+
+
+def condense_graph(graph: Dict[str, Set[str]]) -> Tuple[Dict[str, int], Dict[int, Set[int]], List[Tuple[str, ...]]]:
+    """
+    Collapse the strongly connected components found by detect_cycles into super-nodes.
+
+    Dependencies that point outside the graph are ignored.
+
+    Args:
+        graph: A dependency graph represented as adjacency lists
+               (node -> set of dependencies)
+
+    Returns:
+        A tuple (unit_of, condensed, units) where unit_of maps every node to its unit
+        index, condensed is the acyclic unit-level graph (unit -> set of units it
+        depends on) and units[i] is the sorted tuple of nodes in unit i
+    """
+    unit_of: Dict[str, int] = {}
+    units: List[Tuple[str, ...]] = []
+
+    for cycle in detect_cycles(graph):
+        for node in cycle:
+            unit_of[node] = len(units)
+        units.append(tuple(sorted(cycle)))
+
+    for node in sorted(graph):
+        if node not in unit_of:
+            unit_of[node] = len(units)
+            units.append((node,))
+
+    condensed: Dict[int, Set[int]] = {i: set() for i in range(len(units))}
+    for node, deps in graph.items():
+        source = unit_of[node]
+        for dep in deps:
+            target = unit_of.get(dep)
+            if target is not None and target != source:
+                condensed[source].add(target)
+
+    return unit_of, condensed, units
+
+
+def build_work_plan(graph: Dict[str, Set[str]], nodes: Optional[Iterable[str]] = None) -> WorkPlan:
+    """
+    Compute topological levels (antichains) of the SCC-condensed dependency graph.
+
+    Args:
+        graph: A dependency graph with natural direction (A->B if A depends on B)
+        nodes: Optionally restrict the plan to these nodes (e.g. the dependency
+               closure of one entry point)
+
+    Returns:
+        A WorkPlan whose levels can each be processed concurrently
+    """
+    if nodes is not None:
+        keep = set(nodes)
+        graph = {node: {dep for dep in graph.get(node, set()) if dep in keep} for node in keep}
+
+    unit_of, condensed, units = condense_graph(graph)
+
+    # Kahn's algorithm on the condensed DAG, one level at a time
+    remaining = {unit: len(deps) for unit, deps in condensed.items()}
+    dependents: Dict[int, List[int]] = defaultdict(list)
+    for unit, deps in condensed.items():
+        for dep in deps:
+            dependents[dep].append(unit)
+
+    current = sorted(unit for unit, count in remaining.items() if count == 0)
+    levels: List[List[Tuple[str, ...]]] = []
+    while current:
+        levels.append([units[unit] for unit in current])
+        following = []
+        for unit in current:
+            for dependent in dependents[unit]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    following.append(dependent)
+        current = sorted(following)
+
+    plan = WorkPlan(levels=levels, cycles=[list(unit) for unit in units if len(unit) > 1])
+    logger.info(f"Work plan: {len(units)} units in {len(levels)} levels "
+                f"(max width {max(plan.widths, default=0)}, {len(plan.cycles)} cycles condensed)")
+    return plan
@@ -0,0 +1,71 @@
+"""
+Documentation worker: leases per-component jobs from a docgen.work_queue database
+and generates them, so one repository's documentation can be spread over several
+processes and hosts.
+
+Jobs are produced by `python cli.py <repo> --queue <db>`; start workers on any
+machine that can open the database:
+
+Usage:
+    python worker.py --queue output/queue/jobs.sqlite3 --processes 4
+    python worker.py --queue /mnt/shared/jobs.sqlite3 --shared-storage --processes 8 --provider openai
+"""
+
+import sys
+import logging
+import argparse
+from multiprocessing import Process
+from dotenv import load_dotenv
+from docgen.work_queue import run_worker
+from llm.providers import ProviderConfig
+
+logger = logging.getLogger("docstring_generator")
+
+
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--queue", required=True, help="Work queue database")
+    arg_parser.add_argument("--processes", type=int, default=4, help="Worker processes on this host")
+    arg_parser.add_argument("--provider", choices=["gemini", "openai", "fake"],
+                            help="LLM provider (default: LLM_PROVIDER or gemini)")
+    arg_parser.add_argument("--model", help="Model name (default: LLM_MODEL or the provider default)")
+    arg_parser.add_argument("--lease-seconds", type=float, default=60)
+    arg_parser.add_argument("--max-attempts", type=int, default=3)
+    arg_parser.add_argument("--shared-storage", action="store_true",
+                            help="The database is shared with other hosts (rollback journal instead of WAL)")
+    arg_parser.add_argument("--keep-running", action="store_true",
+                            help="Keep polling for new jobs instead of exiting when the queue is drained")
+    return arg_parser.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(processName)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stderr)
+        ]
+    )
+    load_dotenv()
+    args = parse_args(argv)
+    chain_config = ProviderConfig.from_env(provider=args.provider, model=args.model)
+
+    processes = [
+        Process(target=run_worker, name=f"worker-{i}", args=(args.queue,), kwargs={
+            "chain_config": chain_config,
+            "exit_when_idle": not args.keep_running,
+            "lease_seconds": args.lease_seconds,
+            "max_attempts": args.max_attempts,
+            "shared_storage": args.shared_storage,
+        })
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return 0 if all(process.exitcode == 0 for process in processes) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())